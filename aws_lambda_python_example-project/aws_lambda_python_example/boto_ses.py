@@ -1,31 +1,91 @@
 # -*- coding: utf-8 -*-
 
-import pynamodb_mate as pm
+"""
+The boto session, the clients and the pynamodb connection are created on
+first use, not at import time, so a Lambda function that doesn't use them
+doesn't pay for them on cold start. Once created, they are reused by the
+warm invocations. Use :func:`prewarm` to create them in advance.
+"""
+
+import typing as T
+import os
+
 from s3pathlib import context
 from boto_session_manager import BotoSesManager
 
 from .runtime import IS_LOCAL, IS_CI, IS_LAMBDA
+from .lazy import LazyProxy, resolve
+
+DEFAULT_AWS_REGION = "us-east-1"
+
+ENV_VAR_DEPLOY_TARGET_AWS_REGION = "DEPLOY_TARGET_AWS_REGION"
+"""
+If set, the automation scripts use this region instead of the default one,
+it is used by the multi target deployment orchestrator.
+"""
 
 # environment aware boto session manager
 if IS_LAMBDA:  # put production first
     bsm = BotoSesManager(
-        region_name="us-east-1",
+        region_name=DEFAULT_AWS_REGION,
     )
 elif IS_LOCAL:
     bsm = BotoSesManager(
         profile_name="my_aws_profile",
-        region_name="us-east-1",
+        region_name=os.environ.get(
+            ENV_VAR_DEPLOY_TARGET_AWS_REGION, DEFAULT_AWS_REGION
+        ),
     )
 elif IS_CI:
     bsm = BotoSesManager(
-        region_name="us-east-1",
+        region_name=os.environ.get(
+            ENV_VAR_DEPLOY_TARGET_AWS_REGION, DEFAULT_AWS_REGION
+        ),
     )
 else:  # pragma: no cover
     raise NotImplementedError
 
-# Set default s3pathlib boto session
-context.attach_boto_session(boto_ses=bsm.boto_ses)
+# Set default s3pathlib boto session, the ``bsm`` creates the boto session
+# on first use
+context.attach_boto_session(boto_ses=LazyProxy(lambda: bsm.boto_ses))
+
+
+def _create_pynamodb_connection():
+    import pynamodb_mate as pm
+
+    connection = pm.Connection(region=bsm.aws_region)
+    # the botocore client picks up the credential when it is created, it is
+    # shared by all threads and reused by the warm invocations
+    with bsm.awscli():
+        _ = connection.client
+    return connection
+
 
 # Set default pynamodb boto session
-with bsm.awscli():
-    pynamodb_connection = pm.Connection()
+pynamodb_connection = LazyProxy(_create_pynamodb_connection)
+
+
+def prewarm(
+    service_names: T.Iterable[str] = tuple(),
+    pynamodb: bool = False,
+):
+    """
+    Explicitly create the boto session and the clients in advance. For
+    example, call it at the module level of the ``app.py``, so they are
+    created in the Lambda init phase instead of the first invocation::
+
+        from aws_lambda_python_example.boto_ses import prewarm
+
+        prewarm(service_names=["s3"])
+
+    :param service_names: the AWS service names of the clients to create,
+        for ``s3``, the ``s3pathlib`` client is created too.
+    :param pynamodb: also create the pynamodb connection.
+    """
+    _ = bsm.boto_ses
+    for service_name in service_names:
+        bsm.get_client(service_name)
+        if service_name == "s3":
+            _ = context.s3_client
+    if pynamodb:
+        resolve(pynamodb_connection)
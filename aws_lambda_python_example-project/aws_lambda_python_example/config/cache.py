@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+"""
+Config cache for the AWS Lambda runtime.
+
+Reading the config from the parameter store is a ``GetParameter`` API call
+with KMS decryption. The module level ``config`` is loaded once per
+execution environment, so a cold start always pays for it, and the warm
+invocations never see a parameter update. The handlers call
+:func:`~aws_lambda_python_example.config.init.get_config` instead, it keeps
+the decoded parameter data in memory for the warm invocations:
+
+- within the TTL, the cached data is used, no API call.
+- after the TTL, only the parameter version is checked, by a ``GetParameter``
+    API call without decryption. If the version is not changed, the cached
+    data is used for another TTL. Otherwise, the parameter body is fetched
+    and decrypted again.
+
+So a parameter update reaches the warm execution environments within one
+TTL, and the refresh costs one KMS decryption per update, not one per
+invocation or per TTL. The decrypted secrets are never written to ``/tmp``.
+"""
+
+import typing as T
+import os
+import time
+import dataclasses
+
+import pysecret
+
+ENV_VAR_CONFIG_CACHE_TTL = "CONFIG_CACHE_TTL"
+"""
+Override the config cache TTL in seconds, ``0`` disables the cache.
+"""
+
+DEFAULT_CONFIG_CACHE_TTL = 300
+
+
+@dataclasses.dataclass
+class CacheEntry:
+    """
+    :param version: the parameter version.
+    :param fetched_at: the epoch time of the last fetch or version check.
+    :param value: the decoded parameter data.
+    """
+
+    version: int = dataclasses.field()
+    fetched_at: float = dataclasses.field()
+    value: dict = dataclasses.field()
+
+    def is_fresh(self, ttl: float, now: float) -> bool:
+        return (now - self.fetched_at) < ttl
+
+
+_memory_cache: T.Dict[str, CacheEntry] = dict()
+
+
+def get_ttl() -> float:
+    return float(os.environ.get(ENV_VAR_CONFIG_CACHE_TTL, DEFAULT_CONFIG_CACHE_TTL))
+
+
+def get_parameter_version(ssm_client, parameter_name: str) -> int:
+    """
+    Get the parameter version without decrypting the value.
+    """
+    response = ssm_client.get_parameter(Name=parameter_name, WithDecryption=False)
+    return response["Parameter"]["Version"]
+
+
+def fetch_parameter(ssm_client, parameter_name: str, now: float) -> CacheEntry:
+    parameter = pysecret.Parameter.load(
+        ssm_client=ssm_client,
+        name=parameter_name,
+        with_decryption=True,
+    )
+    return CacheEntry(
+        version=parameter.Version,
+        fetched_at=now,
+        value=parameter.json_dict,
+    )
+
+
+def load_parameter_data(
+    ssm_client,
+    parameter_name: str,
+    ttl: T.Optional[float] = None,
+    now: T.Optional[float] = None,
+) -> dict:
+    """
+    Load the decoded parameter data, use the cache when possible.
+
+    :param ttl: the cache TTL in seconds, default is the
+        ``CONFIG_CACHE_TTL`` environment variable or 300 seconds.
+    :param now: the current epoch time, for testing.
+
+    :return: the parameter data, it is the same object as the last call if
+        the parameter is not changed.
+    """
+    if ttl is None:
+        ttl = get_ttl()
+    if now is None:
+        now = time.time()
+    if ttl <= 0:
+        return fetch_parameter(ssm_client, parameter_name, now).value
+
+    entry = _memory_cache.get(parameter_name)
+    if entry is not None and entry.is_fresh(ttl, now):
+        return entry.value
+
+    if entry is not None and (
+        get_parameter_version(ssm_client, parameter_name) == entry.version
+    ):
+        entry.fetched_at = now
+    else:
+        entry = fetch_parameter(ssm_client, parameter_name, now)
+    _memory_cache[parameter_name] = entry
+    return entry.value
+
+
+def clear_cache(parameter_name: str):
+    """
+    Remove the parameter from the memory cache.
+    """
+    _memory_cache.pop(parameter_name, None)
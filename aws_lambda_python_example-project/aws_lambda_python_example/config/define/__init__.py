@@ -1,3 +1,4 @@
 # -*- coding: utf-8 -*-
 
-from .main import EnvEnum, Env, Config
+from .main import EnvEnum, Env, Config, ENV_VAR_DEPLOY_TARGET_ENV_NAME
+from .lbd_deploy import LambdaArchitectureEnum
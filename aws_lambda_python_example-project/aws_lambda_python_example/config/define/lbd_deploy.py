@@ -10,6 +10,38 @@ if T.TYPE_CHECKING:
     from .main import Env
 
 
+class LambdaArchitectureEnum:
+    """
+    The instruction set architecture of the Lambda function and layer.
+    """
+
+    x86_64 = "x86_64"
+    arm64 = "arm64"
+
+
+def get_lambda_layer_suffix(
+    architecture: str = LambdaArchitectureEnum.x86_64,
+    aws_region: T.Optional[str] = None,
+) -> str:
+    """
+    The suffix of the layer artifacts folder. The x86_64 layer in the
+    default region has no suffix, so the existing layer artifacts are still
+    used.
+
+    :param aws_region: None for the default region. The Lambda layer is a
+        regional resource, the layer in another region has its own
+        artifacts and index.
+
+    example: ``""``, ``"arm64"``, ``"us-west-2"``, ``"arm64-us-west-2"``
+    """
+    parts = list()
+    if architecture != LambdaArchitectureEnum.x86_64:
+        parts.append(architecture)
+    if aws_region is not None:
+        parts.append(aws_region)
+    return "-".join(parts)
+
+
 @dataclasses.dataclass
 class LambdaDeployMixin:
     @property
@@ -20,6 +52,20 @@ class LambdaDeployMixin:
     def lambda_layer_name(self: "Env") -> str:
         return self.project_name_snake
 
+    def get_lambda_layer_name(
+        self: "Env",
+        architecture: str = LambdaArchitectureEnum.x86_64,
+    ) -> str:
+        """
+        The x86_64 layer keeps the original name, so the existing layer
+        versions are still used.
+
+        example: ``${project_name_snake}``, ``${project_name_snake}_arm64``
+        """
+        if architecture == LambdaArchitectureEnum.x86_64:
+            return self.lambda_layer_name
+        return f"{self.lambda_layer_name}_{architecture}"
+
     # --------------------------------------------------------------------------
     # Temp folder
     #
@@ -49,6 +95,20 @@ class LambdaDeployMixin:
         """
         return self.s3dir_tmp.joinpath("requirements.txt")
 
+    def get_s3dir_tmp_lambda_layer(
+        self: "Env",
+        architecture: str = LambdaArchitectureEnum.x86_64,
+        aws_region: T.Optional[str] = None,
+    ) -> S3Path:
+        """
+        example: ``${s3dir_artifacts}/tmp/``, ``${s3dir_artifacts}/tmp/arm64/``,
+        ``${s3dir_artifacts}/tmp/arm64-us-west-2/``
+        """
+        suffix = get_lambda_layer_suffix(architecture, aws_region)
+        if not suffix:
+            return self.s3dir_tmp
+        return self.s3dir_tmp.joinpath(suffix).to_dir()
+
     # --------------------------------------------------------------------------
     # Lambda related S3 location
     #
@@ -75,14 +135,122 @@ class LambdaDeployMixin:
         """
         return self.s3dir_lambda.joinpath("layer").to_dir()
 
+    def get_s3dir_lambda_layer(
+        self: "Env",
+        architecture: str = LambdaArchitectureEnum.x86_64,
+        aws_region: T.Optional[str] = None,
+    ) -> S3Path:
+        """
+        example: ``${s3dir_artifacts}/lambda/layer/``,
+        ``${s3dir_artifacts}/lambda/layer-arm64/``,
+        ``${s3dir_artifacts}/lambda/layer-us-west-2/``
+        """
+        suffix = get_lambda_layer_suffix(architecture, aws_region)
+        if not suffix:
+            return self.s3dir_lambda_layer
+        return self.s3dir_lambda.joinpath(f"layer-{suffix}").to_dir()
+
+    @property
+    def s3path_lambda_layer_index(self: "Env") -> S3Path:
+        """
+        The requirements fingerprint to layer version index.
+
+        example: ``${s3dir_artifacts}/lambda/layer/index.json``
+        """
+        return self.s3dir_lambda_layer.joinpath("index.json")
+
+    def get_s3path_lambda_layer_index(
+        self: "Env",
+        architecture: str = LambdaArchitectureEnum.x86_64,
+        aws_region: T.Optional[str] = None,
+    ) -> S3Path:
+        """
+        example: ``${s3dir_artifacts}/lambda/layer-arm64/index.json``
+        """
+        return self.get_s3dir_lambda_layer(architecture, aws_region).joinpath(
+            "index.json"
+        )
+
+    @property
+    def s3dir_lambda_layer_cache(self: "Env") -> S3Path:
+        """
+        Per-distribution build cache for the Lambda layer.
+
+        example: ``${s3dir_artifacts}/lambda/layer-cache/``
+        """
+        return self.s3dir_lambda.joinpath("layer-cache").to_dir()
+
+    @property
+    def s3dir_wheelhouse(self: "Env") -> S3Path:
+        """
+        The S3 mirror of the shared wheelhouse used by the Lambda layer build.
+
+        example: ``${s3dir_artifacts}/wheelhouse/``
+        """
+        return self.s3dir_artifacts.joinpath("wheelhouse").to_dir()
+
+    def get_lambda_layer_partition_name(
+        self: "Env",
+        partition: int,
+        architecture: str = LambdaArchitectureEnum.x86_64,
+    ) -> str:
+        """
+        example: ``${project_name_snake}_p1``, ``${project_name_snake}_arm64_p1``
+        """
+        return f"{self.get_lambda_layer_name(architecture)}_p{partition}"
+
+    def get_s3dir_lambda_layer_partitions(
+        self: "Env",
+        architecture: str = LambdaArchitectureEnum.x86_64,
+        aws_region: T.Optional[str] = None,
+    ) -> S3Path:
+        """
+        example: ``${s3dir_artifacts}/lambda/layer-partitions/``,
+        ``${s3dir_artifacts}/lambda/layer-partitions-arm64/``,
+        ``${s3dir_artifacts}/lambda/layer-partitions-us-west-2/``
+        """
+        suffix = get_lambda_layer_suffix(architecture, aws_region)
+        if not suffix:
+            return self.s3dir_lambda.joinpath("layer-partitions").to_dir()
+        return self.s3dir_lambda.joinpath(f"layer-partitions-{suffix}").to_dir()
+
+    def get_s3dir_lambda_layer_partition(
+        self: "Env",
+        partition: int,
+        architecture: str = LambdaArchitectureEnum.x86_64,
+        aws_region: T.Optional[str] = None,
+    ) -> S3Path:
+        """
+        example: ``${s3dir_artifacts}/lambda/layer-partitions/p1/``
+        """
+        return self.get_s3dir_lambda_layer_partitions(
+            architecture, aws_region
+        ).joinpath(f"p{partition}").to_dir()
+
+    def get_s3path_lambda_layer_partitions_manifest(
+        self: "Env",
+        architecture: str = LambdaArchitectureEnum.x86_64,
+        aws_region: T.Optional[str] = None,
+    ) -> S3Path:
+        """
+        The layer version ARN list of the latest partitioned layer deployment.
+
+        example: ``${s3dir_artifacts}/lambda/layer-partitions/manifest.json``
+        """
+        return self.get_s3dir_lambda_layer_partitions(
+            architecture, aws_region
+        ).joinpath("manifest.json")
+
     def get_s3path_lambda_layer_zip(
         self: "Env",
         version: int,
+        architecture: str = LambdaArchitectureEnum.x86_64,
+        aws_region: T.Optional[str] = None,
     ) -> S3Path:
         """
-        example: ``${s3dir_artifacts}/lambda/source/${layer_version}/layer.zip``
+        example: ``${s3dir_artifacts}/lambda/layer/${layer_version}/layer.zip``
         """
-        return self.s3dir_lambda_layer.joinpath(
+        return self.get_s3dir_lambda_layer(architecture, aws_region).joinpath(
             str(version).zfill(6),
             "layer.zip",
         )
@@ -90,11 +258,13 @@ class LambdaDeployMixin:
     def get_s3path_lambda_layer_requirements_txt(
         self: "Env",
         version: int,
+        architecture: str = LambdaArchitectureEnum.x86_64,
+        aws_region: T.Optional[str] = None,
     ) -> S3Path:
         """
-        example: ``${s3dir_artifacts}/lambda/source/${layer_version}/requirements.txt``
+        example: ``${s3dir_artifacts}/lambda/layer/${layer_version}/requirements.txt``
         """
-        return self.s3dir_lambda_layer.joinpath(
+        return self.get_s3dir_lambda_layer(architecture, aws_region).joinpath(
             str(version).zfill(6),
             "requirements.txt",
         )
@@ -125,6 +295,24 @@ class LambdaDeployMixin:
         """
         return self.s3dir_deployed.joinpath(f"{stage}.json")
 
+    def get_s3path_deployed_function_hashes_json(self: "Env", stage: str) -> S3Path:
+        """
+        The code closure hash of each deployed Lambda function.
+
+        example: ``${s3dir_artifacts}/lambda/deployed/dev.function-hashes.json``
+        """
+        return self.s3dir_deployed.joinpath(f"{stage}.function-hashes.json")
+
+    def get_s3path_deployed_file_digests_json(self: "Env", stage: str) -> S3Path:
+        """
+        The per-file sha256 digests of the deployed lambda source code, so
+        any machine (for example, the CI job) can tell which files changed
+        since the last deployment.
+
+        example: ``${s3dir_artifacts}/lambda/deployed/dev.file-digests.json``
+        """
+        return self.s3dir_deployed.joinpath(f"{stage}.file-digests.json")
+
     def get_s3path_deployed_json_backup(self: "Env", stage: str) -> S3Path:
         """
         example: ``${s3dir_artifacts}/lambda/deployed/dev-${datetime}.json``
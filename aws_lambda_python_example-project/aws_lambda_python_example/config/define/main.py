@@ -32,6 +32,13 @@ class EnvEnum(BaseEnvEnum):
     prod = "prod"
 
 
+ENV_VAR_DEPLOY_TARGET_ENV_NAME = "DEPLOY_TARGET_ENV_NAME"
+"""
+If set, the automation scripts and the application code on local and CI use
+this environment, it is used by the multi target deployment orchestrator.
+"""
+
+
 # You may have a long list of config field definition
 # put them in different module and use Mixin class
 from .app import AppMixin
@@ -62,8 +69,12 @@ class Config(BaseConfig):
         # from your local laptop to run application code, tests, ...
         # return EnvEnum.dev.value
         if IS_LOCAL:
-            return EnvEnum.dev.value
+            return os.environ.get(ENV_VAR_DEPLOY_TARGET_ENV_NAME, EnvEnum.dev.value)
         elif IS_CI:
+            # the multi target deployment orchestrator passes the env to
+            # each target process, the cache file is shared by the targets
+            if ENV_VAR_DEPLOY_TARGET_ENV_NAME in os.environ:
+                return os.environ[ENV_VAR_DEPLOY_TARGET_ENV_NAME]
             # the automation script for CI will detect the env it
             # should deal with and write to this cache file.
             # so you just need to read from it in your application code.
@@ -5,11 +5,17 @@ import json
 from config_patterns.jsonutils import json_loads
 
 from ..logger import logger
-from ..paths import path_config_json, path_config_secret_json
+from ..paths import (
+    path_config_json,
+    path_config_secret_json,
+    path_config_snapshot_json,
+)
 from ..runtime import IS_LOCAL, IS_CI, IS_LAMBDA
 from ..boto_ses import bsm
 
 from .define import EnvEnum, Env, Config
+from .cache import load_parameter_data
+from .snapshot import read_snapshot, create_config_from_snapshot
 
 if IS_LOCAL:
     # ensure that the config-secret.json file exists
@@ -61,13 +67,54 @@ elif IS_CI:
 elif IS_LAMBDA:
     # read the parameter name from environment variable
     parameter_name = os.environ["PARAMETER_NAME"]
-    # read config from parameter store
-    config = Config.read(
-        env_class=Env,
-        env_enum_class=EnvEnum,
-        bsm=bsm,
-        parameter_name=parameter_name,
-        parameter_with_encryption=True,
-    )
+    # use the deploy time baked config snapshot if it is for this env,
+    # the secrets are read from parameter store on the first access
+    _snapshot = read_snapshot(path_config_snapshot_json.abspath)
+    if (_snapshot is not None) and (_snapshot["env_name"] == os.environ["ENV_NAME"]):
+
+        def _load_secret_data() -> dict:
+            return load_parameter_data(bsm.ssm_client, parameter_name)["secret_data"]
+
+        config = create_config_from_snapshot(
+            snapshot=_snapshot,
+            config_class=Config,
+            env_class=Env,
+            env_enum_class=EnvEnum,
+            load_secret_data=_load_secret_data,
+        )
+    else:
+        _snapshot = None
+        # read config from parameter store, the decoded config is cached in
+        # memory for the warm invocations, see the ``config/cache.py`` module
+        _parameter_data = load_parameter_data(bsm.ssm_client, parameter_name)
+        config = Config(
+            data=_parameter_data["data"],
+            secret_data=_parameter_data["secret_data"],
+            Env=Env,
+            EnvEnum=EnvEnum,
+        )
 else:
     raise NotImplementedError
+
+
+def get_config() -> Config:
+    """
+    Get the up-to-date config, the Lambda handlers should use it instead of
+    the module level ``config``, which is loaded once per execution
+    environment. In AWS Lambda, the config is re-created only if the
+    parameter is changed, it is checked once per cache TTL. In other
+    runtime, it returns the ``config`` as it is, so as the config created
+    from the snapshot.
+    """
+    global config, _parameter_data
+    if IS_LAMBDA and (_snapshot is None):
+        parameter_data = load_parameter_data(bsm.ssm_client, parameter_name)
+        if parameter_data is not _parameter_data:
+            _parameter_data = parameter_data
+            config = Config(
+                data=parameter_data["data"],
+                secret_data=parameter_data["secret_data"],
+                Env=Env,
+                EnvEnum=EnvEnum,
+            )
+    return config
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+import typing as T
+import attr
+import cottonformation as cf
+from cottonformation.res import dynamodb
+
+if T.TYPE_CHECKING:
+    from .main import Stack
+
+
+@attr.s
+class DynamoDBMixin:
+    def mk_rg2_dynamodb(self: "Stack"):
+        """
+        The DynamoDB tables of the project.
+
+        Ref:
+
+        - Expiring items by using DynamoDB TTL: https://docs.aws.amazon.com/amazondynamodb/latest/developerguide/TTL.html
+        """
+        # declare a resource group
+        self.rg2_dynamodb = cf.ResourceGroup("rg2_dynamodb")
+
+        # the idempotency keys of the s3sync events, see
+        # ``aws_lambda_python_example.idempotency``
+        self.dynamodb_table_idempotency = dynamodb.Table(
+            "DynamoDBTableIdempotency",
+            rp_KeySchema=[
+                dynamodb.PropTableKeySchema(
+                    rp_AttributeName="pk",
+                    rp_KeyType="HASH",
+                ),
+            ],
+            p_AttributeDefinitions=[
+                dynamodb.PropTableAttributeDefinition(
+                    rp_AttributeName="pk",
+                    rp_AttributeType="S",
+                ),
+            ],
+            p_BillingMode="PAY_PER_REQUEST",
+            p_TableName=self.env.dynamodb_table_name_idempotency,
+            p_TimeToLiveSpecification=dynamodb.PropTableTimeToLiveSpecification(
+                rp_AttributeName="expire_at",
+                rp_Enabled=True,
+            ),
+        )
+        self.rg2_dynamodb.add(self.dynamodb_table_idempotency)
@@ -50,10 +50,16 @@ class IamMixin:
             ],
         }
 
+        # s3sync reads the target object metadata to skip the identical
+        # objects, without s3:ListBucket, a missing object returns 403
+        # instead of 404
         self.stat_s3_bucket_write = {
             "Effect": "Allow",
             "Action": [
+                "s3:ListBucket",
+                "s3:GetObject",
                 "s3:PutObject",
+                "s3:AbortMultipartUpload",
                 "s3:DeleteObject",
                 "s3:PutObjectTagging",
                 "s3:DeleteObjectTagging",
@@ -64,6 +70,48 @@ class IamMixin:
             ],
         }
 
+        # s3sync claims the event in the idempotency table, see
+        # ``aws_lambda_python_example.idempotency``, pynamodb describes the
+        # table before the first item operation
+        self.stat_dynamodb_idempotency = {
+            "Effect": "Allow",
+            "Action": [
+                "dynamodb:DescribeTable",
+                "dynamodb:GetItem",
+                "dynamodb:PutItem",
+                "dynamodb:UpdateItem",
+                "dynamodb:DeleteItem",
+            ],
+            "Resource": cf.Sub(
+                string="arn:aws:dynamodb:${aws_region}:${aws_account_id}:table/${table_name}",
+                data=dict(
+                    aws_region=cf.AWS_REGION,
+                    aws_account_id=cf.AWS_ACCOUNT_ID,
+                    table_name=self.env.dynamodb_table_name_idempotency,
+                ),
+            ),
+        }
+
+        # the s3sync_batch function polls the s3sync queue, see
+        # ``aws_lambda_python_example.iac.define.sqs``
+        self.stat_sqs_s3sync = {
+            "Effect": "Allow",
+            "Action": [
+                "sqs:ReceiveMessage",
+                "sqs:DeleteMessage",
+                "sqs:GetQueueAttributes",
+                "sqs:ChangeMessageVisibility",
+            ],
+            "Resource": cf.Sub(
+                string="arn:aws:sqs:${aws_region}:${aws_account_id}:${queue_name}",
+                data=dict(
+                    aws_region=cf.AWS_REGION,
+                    aws_account_id=cf.AWS_ACCOUNT_ID,
+                    queue_name=self.env.sqs_queue_name_s3sync,
+                ),
+            ),
+        }
+
         # declare iam role
         self.iam_role_for_lambda = iam.Role(
             "IamRoleForLambda",
@@ -103,6 +151,8 @@ class IamMixin:
                     self.stat_parameter_store,
                     self.stat_s3_bucket_read,
                     self.stat_s3_bucket_write,
+                    self.stat_dynamodb_idempotency,
+                    self.stat_sqs_s3sync,
                 ]
             ),
             p_Roles=[
@@ -13,12 +13,16 @@ import cottonformation as cf
 from ...config.define.main import Env
 
 from .iam import IamMixin
+from .dynamodb import DynamoDBMixin
+from .sqs import SqsMixin
 
 
 @attr.s
 class Stack(
     cf.Stack,
     IamMixin,
+    DynamoDBMixin,
+    SqsMixin,
 ):
     """
     A Python class wrapper around the real CloudFormation stack, to provide
@@ -49,4 +53,6 @@ class Stack(
 
     def post_hook(self):
         self.mk_rg1_iam()
+        self.mk_rg2_dynamodb()
+        self.mk_rg3_sqs()
 
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+import typing as T
+import attr
+import cottonformation as cf
+from cottonformation.res import sqs, events
+
+if T.TYPE_CHECKING:
+    from .main import Stack
+
+
+@attr.s
+class SqsMixin:
+    def mk_rg3_sqs(self: "Stack"):
+        """
+        The SQS queue that buffers the S3 events for the batched s3sync
+        Lambda function, see
+        ``aws_lambda_python_example.lbd.s3sync.batch_lambda_handler``.
+
+        The EventBridge rule only receives the S3 events if the
+        "Amazon EventBridge" event notification of the source bucket is on.
+
+        Ref:
+
+        - Using Lambda with Amazon SQS: https://docs.aws.amazon.com/lambda/latest/dg/with-sqs.html
+        - Using EventBridge with Amazon S3: https://docs.aws.amazon.com/AmazonS3/latest/userguide/EventBridge.html
+        """
+        # declare a resource group
+        self.rg3_sqs = cf.ResourceGroup("rg3_sqs")
+
+        # the visibility timeout is 6 times of the s3sync_batch function timeout,
+        # as recommended by AWS
+        self.sqs_queue_s3sync = sqs.Queue(
+            "SqsQueueS3Sync",
+            p_QueueName=self.env.sqs_queue_name_s3sync,
+            p_VisibilityTimeout=360,
+        )
+        self.rg3_sqs.add(self.sqs_queue_s3sync)
+
+        self.event_rule_s3sync = events.Rule(
+            "EventRuleS3Sync",
+            p_Name=self.env.event_rule_name_s3sync,
+            p_EventPattern={
+                "source": ["aws.s3"],
+                "detail-type": ["Object Created"],
+                "detail": {
+                    "bucket": {"name": [self.env.s3dir_source.bucket]},
+                    "object": {"key": [{"prefix": self.env.s3dir_source.key}]},
+                },
+            },
+            p_Targets=[
+                events.PropRuleTarget(
+                    rp_Arn=self.sqs_queue_s3sync.rv_Arn,
+                    rp_Id="SqsQueueS3Sync",
+                ),
+            ],
+            ra_DependsOn=self.sqs_queue_s3sync,
+        )
+        self.rg3_sqs.add(self.event_rule_s3sync)
+
+        self.sqs_queue_policy_s3sync = sqs.QueuePolicy(
+            "SqsQueuePolicyS3Sync",
+            rp_PolicyDocument=self.encode_policy_document(
+                [
+                    {
+                        "Effect": "Allow",
+                        "Principal": {"Service": "events.amazonaws.com"},
+                        "Action": "sqs:SendMessage",
+                        "Resource": self.sqs_queue_s3sync.rv_Arn,
+                        "Condition": {
+                            "ArnEquals": {
+                                "aws:SourceArn": self.event_rule_s3sync.rv_Arn,
+                            }
+                        },
+                    },
+                ]
+            ),
+            rp_Queues=[
+                self.sqs_queue_s3sync.ref(),
+            ],
+            ra_DependsOn=[
+                self.sqs_queue_s3sync,
+                self.event_rule_s3sync,
+            ],
+        )
+        self.rg3_sqs.add(self.sqs_queue_policy_s3sync)
@@ -0,0 +1,538 @@
+# -*- coding: utf-8 -*-
+
+"""
+Reconcile a target S3 folder with a source S3 folder, copy the objects that
+are missing or stale in the target. It backfills the objects that were
+created before the S3 event trigger existed, or whose events were missed.
+
+How it works:
+
+- the key space is split into shards by the key ranges, see
+    :func:`get_shard_boundaries`. The shards are reconciled concurrently.
+- in a shard, the source and the target are listed concurrently, page by
+    page, a background thread prefetches the next pages of each listing.
+- ``ListObjectsV2`` returns the keys in the sorted order, so the two
+    listings are merged like a merge sort, and compared by key, size and
+    ETag, see :func:`iter_merged` and :func:`get_diff_status`. Only a few
+    pages of each listing are in memory at any time, no matter how many
+    objects there are.
+- the missing and stale objects are copied by a shared thread pool with
+    :func:`~aws_lambda_python_example.s3_copy.copy_object`. The objects of
+    the same size but different ETag, for example a multipart copy, are
+    compared by :func:`~aws_lambda_python_example.s3_copy.is_identical`
+    before copy.
+- after every batch of copies, the last reconciled key of the shard is
+    saved to a checkpoint file, an interrupted run resumes from there.
+
+The objects only in the target are counted, but not deleted.
+"""
+
+import typing as T
+import os
+import json
+import queue
+import threading
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from .s3_copy import (
+    head_object,
+    is_identical,
+    copy_object,
+    DEFAULT_MULTIPART_THRESHOLD,
+)
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_s3 import S3Client
+
+DEFAULT_N_SHARDS = 16
+DEFAULT_MAX_WORKERS = 32
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CHECKPOINT_INTERVAL = 10000
+DEFAULT_PREFETCH_PAGES = 2
+
+
+class DiffStatusEnum:
+    same = "same"
+    missing = "missing"  # only in the source
+    stale = "stale"  # the size or the ETag is different
+    extra = "extra"  # only in the target
+
+
+class SyncStatusEnum:
+    copied = "copied"
+    skipped = "skipped"
+    failed = "failed"
+
+
+@dataclasses.dataclass
+class ObjectInfo:
+    """
+    :param key: the key relative to the listed prefix.
+    """
+
+    key: str = dataclasses.field()
+    size: int = dataclasses.field()
+    etag: str = dataclasses.field()
+
+
+def iter_pages(
+    s3_client: "S3Client",
+    bucket: str,
+    prefix: str,
+    start_after: T.Optional[str] = None,
+    end: T.Optional[str] = None,
+) -> T.Iterable[T.List[ObjectInfo]]:
+    """
+    List the objects under the prefix in the key range ``(start_after, end]``,
+    page by page, the keys are relative to the prefix.
+
+    :param start_after: exclusive lower bound, None to start from the first key.
+    :param end: inclusive upper bound, None to list to the last key.
+    """
+    kwargs = dict(Bucket=bucket, Prefix=prefix)
+    if start_after is not None:
+        kwargs["StartAfter"] = prefix + start_after
+    n_prefix = len(prefix)
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for response in paginator.paginate(**kwargs):
+        page = list()
+        for content in response.get("Contents", []):
+            key = content["Key"][n_prefix:]
+            if end is not None and key > end:
+                if page:
+                    yield page
+                return
+            page.append(ObjectInfo(key=key, size=content["Size"], etag=content["ETag"]))
+        if page:
+            yield page
+
+
+def prefetch(
+    pages: T.Iterable[T.List[ObjectInfo]],
+    max_pages: int = DEFAULT_PREFETCH_PAGES,
+) -> T.Iterable[ObjectInfo]:
+    """
+    Iterate the pages in a background thread, at most ``max_pages`` pages
+    are buffered, yield the objects one by one.
+    """
+    q = queue.Queue(maxsize=max_pages)
+    stop = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            for page in pages:
+                while not stop.is_set():
+                    try:
+                        q.put(page, timeout=1)
+                        break
+                    except queue.Full:
+                        pass
+                if stop.is_set():
+                    return
+            q.put(done)
+        except Exception as e:
+            q.put(e)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield from item
+    finally:
+        stop.set()
+
+
+def iter_merged(
+    src_objects: T.Iterable[ObjectInfo],
+    dst_objects: T.Iterable[ObjectInfo],
+) -> T.Iterable[T.Tuple[str, T.Optional[ObjectInfo], T.Optional[ObjectInfo]]]:
+    """
+    Merge two sorted object streams by key.
+
+    :return: ``(key, source object, target object)``, the object is None if
+        the key is not in that stream.
+    """
+    src_iter = iter(src_objects)
+    dst_iter = iter(dst_objects)
+    src = next(src_iter, None)
+    dst = next(dst_iter, None)
+    while src is not None or dst is not None:
+        if dst is None or (src is not None and src.key < dst.key):
+            yield src.key, src, None
+            src = next(src_iter, None)
+        elif src is None or dst.key < src.key:
+            yield dst.key, None, dst
+            dst = next(dst_iter, None)
+        else:
+            yield src.key, src, dst
+            src = next(src_iter, None)
+            dst = next(dst_iter, None)
+
+
+def get_diff_status(
+    src: T.Optional[ObjectInfo],
+    dst: T.Optional[ObjectInfo],
+) -> str:
+    """
+    :return: one of :class:`DiffStatusEnum`.
+    """
+    if src is None:
+        return DiffStatusEnum.extra
+    if dst is None:
+        return DiffStatusEnum.missing
+    if src.size != dst.size or src.etag != dst.etag:
+        return DiffStatusEnum.stale
+    return DiffStatusEnum.same
+
+
+def get_shard_boundaries(
+    s3_client: "S3Client",
+    bucket: str,
+    prefix: str,
+    n_shards: int = DEFAULT_N_SHARDS,
+) -> T.List[str]:
+    """
+    Split the key space by the first level "folders" under the prefix, into
+    up to ``n_shards`` ranges with about the same number of folders.
+
+    The boundaries ``[b1, b2, ...]`` define the shards ``(None, b1]``,
+    ``(b1, b2]``, ..., ``(bn, None]``, every key is in exactly one shard.
+    If the prefix has no sub folder, there is only one shard, pass your own
+    boundaries to :func:`reconcile`, for example ``["1", "2", ..., "f"]``
+    for the hex keys.
+
+    :return: the sorted boundary keys, relative to the prefix.
+    """
+    folders = list()
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for response in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter="/"):
+        for common_prefix in response.get("CommonPrefixes", []):
+            folders.append(common_prefix["Prefix"][len(prefix):])
+    n_shards = min(n_shards, len(folders))
+    if n_shards <= 1:
+        return list()
+    return [folders[i * len(folders) // n_shards] for i in range(1, n_shards)]
+
+
+def get_shard_ranges(
+    boundaries: T.List[str],
+) -> T.List[T.Tuple[T.Optional[str], T.Optional[str]]]:
+    """
+    :return: list of ``(start_after, end)`` of the shards.
+    """
+    bounds = [None] + list(boundaries) + [None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+class Checkpoint:
+    """
+    The progress of a reconciliation in a local JSON file. It is only valid
+    for the same source, target and shard boundaries.
+
+    Example::
+
+        {
+            "source": "s3://my-bucket/source/",
+            "target": "s3://my-bucket/target/",
+            "boundaries": ["b/", "d/"],
+            "shards": {"0": {"start_after": "a/1.txt", "done": false}}
+        }
+    """
+
+    def __init__(self, path: str, source: str, target: str):
+        self.path = path
+        self.source = source
+        self.target = target
+        self.boundaries: T.Optional[T.List[str]] = None
+        self.shards: T.Dict[str, dict] = dict()
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        """
+        :return: True if a valid checkpoint of the same source and target
+            is loaded.
+        """
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+        if (data.get("source"), data.get("target")) != (self.source, self.target):
+            return False
+        self.boundaries = data["boundaries"]
+        self.shards = data["shards"]
+        return True
+
+    def _dump(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        path_tmp = f"{self.path}.tmp"
+        with open(path_tmp, "w") as f:
+            json.dump(
+                {
+                    "source": self.source,
+                    "target": self.target,
+                    "boundaries": self.boundaries,
+                    "shards": self.shards,
+                },
+                f,
+            )
+        os.replace(path_tmp, self.path)
+
+    def get(self, shard_id: int) -> dict:
+        return self.shards.get(str(shard_id), {"start_after": None, "done": False})
+
+    def update(self, shard_id: int, start_after: T.Optional[str], done: bool = False):
+        with self._lock:
+            self.shards[str(shard_id)] = {"start_after": start_after, "done": done}
+            self._dump()
+
+    def start(self, boundaries: T.List[str]):
+        with self._lock:
+            self.boundaries = list(boundaries)
+            self.shards = dict()
+            self._dump()
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+@dataclasses.dataclass
+class ReconcileResult:
+    n_same: int = dataclasses.field(default=0)
+    n_missing: int = dataclasses.field(default=0)
+    n_stale: int = dataclasses.field(default=0)
+    n_extra: int = dataclasses.field(default=0)
+    n_copied: int = dataclasses.field(default=0)
+    n_skipped: int = dataclasses.field(default=0)
+    n_failed: int = dataclasses.field(default=0)
+    failed_shards: T.List[int] = dataclasses.field(default_factory=list)
+    errors: T.List[str] = dataclasses.field(default_factory=list)
+
+    def add(self, other: "ReconcileResult"):
+        for field in dataclasses.fields(self):
+            value = getattr(self, field.name) + getattr(other, field.name)
+            setattr(self, field.name, value)
+
+
+def sync_object(
+    s3_client: "S3Client",
+    src_bucket: str,
+    src_key: str,
+    dst_bucket: str,
+    dst_key: str,
+    check_identical: bool,
+    multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD,
+) -> str:
+    """
+    Copy one object.
+
+    :param check_identical: compare with the target object first, skip the
+        copy if identical.
+
+    :return: one of :class:`SyncStatusEnum`.
+    """
+    src_head = head_object(s3_client, src_bucket, src_key)
+    if src_head is None:  # deleted after listing
+        return SyncStatusEnum.skipped
+    if check_identical:
+        dst_head = head_object(s3_client, dst_bucket, dst_key)
+        if is_identical(src_head, dst_head):
+            return SyncStatusEnum.skipped
+    copy_object(
+        s3_client=s3_client,
+        src_bucket=src_bucket,
+        src_key=src_key,
+        dst_bucket=dst_bucket,
+        dst_key=dst_key,
+        multipart_threshold=multipart_threshold,
+        head_object_response=src_head,
+    )
+    return SyncStatusEnum.copied
+
+
+def _sync_object_safely(**kwargs) -> T.Tuple[str, T.Optional[str]]:
+    """
+    :return: ``(status, error)``.
+    """
+    try:
+        return sync_object(**kwargs), None
+    except Exception as e:
+        return SyncStatusEnum.failed, f"{kwargs['src_key']}: {e!r}"
+
+
+def reconcile_shard(
+    s3_client: "S3Client",
+    src_bucket: str,
+    src_prefix: str,
+    dst_bucket: str,
+    dst_prefix: str,
+    shard_id: int,
+    start_after: T.Optional[str],
+    end: T.Optional[str],
+    executor: ThreadPoolExecutor,
+    checkpoint: T.Optional[Checkpoint] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL,
+    dry_run: bool = False,
+) -> ReconcileResult:
+    """
+    Reconcile the key range ``(start_after, end]``, the copies are run in
+    the ``executor``. The checkpoint is saved after every ``batch_size``
+    copies, or every ``checkpoint_interval`` listed keys. If any copy in a
+    batch fails, the shard stops, the checkpoint stays at the previous
+    batch, so the resumed run retries the failed keys.
+    """
+    result = ReconcileResult()
+    src_objects = prefetch(iter_pages(s3_client, src_bucket, src_prefix, start_after, end))
+    dst_objects = prefetch(iter_pages(s3_client, dst_bucket, dst_prefix, start_after, end))
+    futures: T.List[Future] = list()
+    n_listed = 0
+
+    def flush(key: T.Optional[str], done: bool = False) -> bool:
+        statuses = list()
+        for future in futures:
+            status, error = future.result()
+            statuses.append(status)
+            if error is not None:
+                result.errors.append(error)
+        futures.clear()
+        result.n_copied += statuses.count(SyncStatusEnum.copied)
+        result.n_skipped += statuses.count(SyncStatusEnum.skipped)
+        n_failed = statuses.count(SyncStatusEnum.failed)
+        result.n_failed += n_failed
+        if n_failed:
+            result.failed_shards.append(shard_id)
+            return False
+        if checkpoint is not None:
+            checkpoint.update(shard_id, key, done=done)
+        return True
+
+    key = start_after
+    for key, src, dst in iter_merged(src_objects, dst_objects):
+        n_listed += 1
+        status = get_diff_status(src, dst)
+        if status == DiffStatusEnum.same:
+            result.n_same += 1
+        elif status == DiffStatusEnum.extra:
+            result.n_extra += 1
+        else:
+            if status == DiffStatusEnum.missing:
+                result.n_missing += 1
+            else:
+                result.n_stale += 1
+            if not dry_run:
+                futures.append(
+                    executor.submit(
+                        _sync_object_safely,
+                        s3_client=s3_client,
+                        src_bucket=src_bucket,
+                        src_key=src_prefix + key,
+                        dst_bucket=dst_bucket,
+                        dst_key=dst_prefix + key,
+                        # the multipart copy of the source has a different
+                        # ETag, compare the metadata before copy
+                        check_identical=dst is not None and src.size == dst.size,
+                    )
+                )
+        if len(futures) >= batch_size or n_listed >= checkpoint_interval:
+            n_listed = 0
+            if not flush(key):
+                return result
+    flush(key, done=True)
+    return result
+
+
+def reconcile(
+    s3_client: "S3Client",
+    src_bucket: str,
+    src_prefix: str,
+    dst_bucket: str,
+    dst_prefix: str,
+    path_checkpoint: T.Optional[str] = None,
+    boundaries: T.Optional[T.List[str]] = None,
+    n_shards: int = DEFAULT_N_SHARDS,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL,
+    dry_run: bool = False,
+) -> ReconcileResult:
+    """
+    Copy the missing and stale objects from the source prefix to the target
+    prefix, see the module docstring.
+
+    :param path_checkpoint: the checkpoint file, if it has the progress of
+        the same source and target, the run resumes from it, the shard
+        boundaries in the checkpoint are used. It is removed when all shards
+        are done. None to disable the checkpoint.
+    :param boundaries: the shard boundaries, default is from
+        :func:`get_shard_boundaries`.
+    :param max_workers: the max number of concurrent copies, the s3 client
+        should have at least this many ``max_pool_connections`` plus two for
+        each shard.
+    :param dry_run: only compare, don't copy, the checkpoint is not used.
+    """
+    checkpoint = None
+    if path_checkpoint is not None and not dry_run:
+        checkpoint = Checkpoint(
+            path=path_checkpoint,
+            source=f"s3://{src_bucket}/{src_prefix}",
+            target=f"s3://{dst_bucket}/{dst_prefix}",
+        )
+        if checkpoint.load():
+            boundaries = checkpoint.boundaries
+        else:
+            if boundaries is None:
+                boundaries = get_shard_boundaries(s3_client, src_bucket, src_prefix, n_shards)
+            checkpoint.start(boundaries)
+    elif boundaries is None:
+        boundaries = get_shard_boundaries(s3_client, src_bucket, src_prefix, n_shards)
+
+    shards = list()
+    for shard_id, (start_after, end) in enumerate(get_shard_ranges(boundaries)):
+        if checkpoint is not None:
+            progress = checkpoint.get(shard_id)
+            if progress["done"]:
+                continue
+            if progress["start_after"] is not None:
+                start_after = progress["start_after"]
+        shards.append((shard_id, start_after, end))
+
+    result = ReconcileResult()
+    if not shards:
+        return result
+    with ThreadPoolExecutor(max_workers=max_workers) as copy_executor:
+        n_workers = min(len(shards), max(n_shards, 1))
+        with ThreadPoolExecutor(max_workers=n_workers) as shard_executor:
+            shard_results = shard_executor.map(
+                lambda shard: reconcile_shard(
+                    s3_client=s3_client,
+                    src_bucket=src_bucket,
+                    src_prefix=src_prefix,
+                    dst_bucket=dst_bucket,
+                    dst_prefix=dst_prefix,
+                    shard_id=shard[0],
+                    start_after=shard[1],
+                    end=shard[2],
+                    executor=copy_executor,
+                    checkpoint=checkpoint,
+                    batch_size=batch_size,
+                    checkpoint_interval=checkpoint_interval,
+                    dry_run=dry_run,
+                ),
+                shards,
+            )
+            for shard_result in shard_results:
+                result.add(shard_result)
+    if checkpoint is not None and not result.failed_shards:
+        checkpoint.remove()
+    return result
@@ -10,6 +10,7 @@ from .venv import (
 )
 from .deps import (
     poetry_export,
+    prefetch_wheelhouse,
     pip_install,
     pip_install_dev,
     pip_install_test,
@@ -31,6 +32,7 @@ def install_phase():
     with logger.nested():
         virtualenv_venv_create()
         poetry_export()
+        prefetch_wheelhouse()
         pip_install()
         pip_install_dev()
         pip_install_test()
@@ -45,8 +47,9 @@ def install_phase():
 )
 def pre_build_phase():
     from .runtime import print_runtime_info
-    from .env import print_env_info
+    from .env import print_env_info, CURRENT_ENV
     from .git import print_git_info
+    from .cold_start import profile_cold_start
 
     print_runtime_info()
     print_env_info()
@@ -54,6 +57,7 @@ def pre_build_phase():
 
     with logger.nested():
         run_cov_test()
+        profile_cold_start(env_name=CURRENT_ENV)
 
 
 @logger.block(
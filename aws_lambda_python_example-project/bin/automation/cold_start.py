@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+
+"""
+Cold start import time profiler for the Lambda app.
+
+It imports ``lambda_app/app.py`` in a new Python process with
+``python -X importtime``, in a simulated Lambda runtime:
+
+- ``AWS_LAMBDA_FUNCTION_NAME`` is set, so the code takes the Lambda code path.
+- the AWS API calls are stubbed, the ``GetParameter`` call that loads the
+    config returns the local ``config/config.json`` without secrets, any
+    other AWS API call at import time fails the profiling.
+
+The ``-X importtime`` output is turned into a tree of the cumulative import
+time per module, and checked against the import time budget.
+
+Ref:
+
+- -X importtime: https://docs.python.org/3/using/cmdline.html#cmdoption-X
+"""
+
+import typing as T
+import os
+import json
+import subprocess
+import dataclasses
+
+from .paths import (
+    bin_python,
+    path_app_py,
+    path_config_json,
+)
+from .logger import logger
+from .emoji import Emoji
+
+MARKER = "--- start importing app.py ---"
+
+# it runs before importing app.py, it patches the botocore client as soon
+# as it is imported by the app, so the stub doesn't add to the import time
+_BOOTSTRAP = f"""
+import sys
+import importlib.abc
+import importlib.util
+from datetime import datetime
+
+parameter_value, dir_lambda_app = sys.argv[1], sys.argv[2]
+
+
+def _make_api_call(self, operation_name, api_params):
+    if operation_name == "GetParameter":
+        return {{
+            "Parameter": {{
+                "Name": api_params["Name"],
+                "Type": "SecureString",
+                "Value": parameter_value,
+                "Version": 1,
+                "LastModifiedDate": datetime.utcnow(),
+                "DataType": "text",
+                "ARN": "",
+            }}
+        }}
+    raise RuntimeError(f"unexpected AWS API call at import time: {{operation_name}}")
+
+
+class _PatchBotocoreClient(importlib.abc.MetaPathFinder):
+    def find_spec(self, fullname, path, target=None):
+        if fullname != "botocore.client":
+            return None
+        sys.meta_path.remove(self)
+        spec = importlib.util.find_spec(fullname)
+        exec_module = spec.loader.exec_module
+
+        def patched_exec_module(module):
+            exec_module(module)
+            module.BaseClient._make_api_call = _make_api_call
+
+        spec.loader.exec_module = patched_exec_module
+        return spec
+
+
+sys.meta_path.insert(0, _PatchBotocoreClient())
+sys.path.insert(0, dir_lambda_app)
+sys.stderr.write({MARKER!r} + "\\n")
+sys.stderr.flush()
+import app
+"""
+
+
+class ImportBudgetExceededError(Exception):
+    pass
+
+
+@dataclasses.dataclass
+class ImportNode:
+    """
+    One imported module in the ``-X importtime`` output.
+
+    :param self_us: the time to import the module itself, in microseconds.
+    :param cumulative_us: including the modules it imports, in microseconds.
+    """
+
+    name: str = dataclasses.field()
+    self_us: int = dataclasses.field()
+    cumulative_us: int = dataclasses.field()
+    children: T.List["ImportNode"] = dataclasses.field(default_factory=list)
+
+    def iter_nodes(self) -> T.Iterable["ImportNode"]:
+        yield self
+        for child in self.children:
+            yield from child.iter_nodes()
+
+
+@dataclasses.dataclass
+class ImportBudget:
+    """
+    :param total_ms: the max time to import ``app.py``, in milliseconds.
+    :param per_module_ms: module name to the max cumulative import time
+        mapping, in milliseconds.
+    """
+
+    total_ms: float = dataclasses.field()
+    per_module_ms: T.Dict[str, float] = dataclasses.field(default_factory=dict)
+
+
+DEFAULT_IMPORT_BUDGET = ImportBudget(
+    total_ms=1500,
+    per_module_ms={
+        "chalice": 400,
+        "s3pathlib": 300,
+        "pynamodb_mate": 400,
+        "config_patterns": 300,
+        "attr": 100,
+    },
+)
+"""
+The default cold start import time budget, tune it for your project.
+"""
+
+
+def parse_importtime(text: str) -> T.List[ImportNode]:
+    """
+    Parse the ``-X importtime`` stderr output after the :data:`MARKER`
+    line. The output is in post order, a module is printed after all the
+    modules it imports, the nesting level is the indent of the name.
+
+    :return: the top level imported modules.
+    """
+    if MARKER in text:
+        text = text.split(MARKER, 1)[1]
+    pending: T.Dict[int, T.List[ImportNode]] = dict()
+    for line in text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # the header line
+        raw_name = parts[2][1:]  # one space after the "|"
+        name = raw_name.lstrip()
+        depth = (len(raw_name) - len(name)) // 2
+        node = ImportNode(
+            name=name,
+            self_us=int(parts[0]),
+            cumulative_us=int(parts[1]),
+            children=pending.pop(depth + 1, []),
+        )
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+
+def get_total_us(roots: T.List[ImportNode]) -> int:
+    return sum(node.cumulative_us for node in roots)
+
+
+def find_node(roots: T.List[ImportNode], name: str) -> T.Optional[ImportNode]:
+    for root in roots:
+        for node in root.iter_nodes():
+            if node.name == name:
+                return node
+    return None
+
+
+def _get_parameter_value() -> str:
+    """
+    The non-sensitive config in the parameter store format, without secrets.
+    """
+    data = json.loads(path_config_json.read_text())
+    secret_data = {
+        "shared": {},
+        "envs": {env_name: {} for env_name in data["envs"]},
+    }
+    return json.dumps({"data": data, "secret_data": secret_data})
+
+
+def profile_import(
+    env_name: str,
+    repeat: int = 3,
+) -> T.List[ImportNode]:
+    """
+    Import ``app.py`` in a simulated Lambda runtime with ``-X importtime``.
+
+    :param env_name: the value of the ``ENV_NAME`` environment variable.
+    :param repeat: run it multiple times and return the fastest run, the
+        first run may include the bytecode compilation.
+
+    :return: the top level imported modules of the fastest run.
+    """
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if not (key.startswith("AWS_") or key.startswith("PYTEST_"))
+    }
+    env.update(
+        {
+            "AWS_LAMBDA_FUNCTION_NAME": "cold-start-profiler",
+            "AWS_REGION": "us-east-1",
+            "AWS_DEFAULT_REGION": "us-east-1",
+            "AWS_ACCESS_KEY_ID": "testing",
+            "AWS_SECRET_ACCESS_KEY": "testing",
+            "ENV_NAME": env_name,
+            "PARAMETER_NAME": "cold-start-profiler",
+        }
+    )
+    args = [
+        f"{bin_python}",
+        "-X",
+        "importtime",
+        "-c",
+        _BOOTSTRAP,
+        _get_parameter_value(),
+        f"{path_app_py.parent}",
+    ]
+    best: T.Optional[T.List[ImportNode]] = None
+    for _ in range(repeat):
+        res = subprocess.run(args, env=env, capture_output=True)
+        stderr = res.stderr.decode("utf-8")
+        if res.returncode != 0:
+            logger.error(stderr.split(MARKER, 1)[-1][-3000:])
+            raise SystemError("failed to import app.py in the simulated Lambda runtime")
+        roots = parse_importtime(stderr)
+        if best is None or get_total_us(roots) < get_total_us(best):
+            best = roots
+    return best
+
+
+def format_tree(
+    roots: T.List[ImportNode],
+    min_us: int = 10_000,
+    max_depth: int = 3,
+) -> T.List[str]:
+    """
+    Format the modules as a tree, ranked by the cumulative import time.
+
+    :param min_us: hide the modules faster than this.
+    :param max_depth: hide the modules nested deeper than this.
+    """
+    lines = list()
+
+    def walk(nodes: T.List[ImportNode], depth: int):
+        for node in sorted(nodes, key=lambda x: x.cumulative_us, reverse=True):
+            if node.cumulative_us < min_us:
+                continue
+            lines.append(
+                f"{'  ' * depth}{node.name}: {node.cumulative_us / 1000:.1f} ms "
+                f"(self {node.self_us / 1000:.1f} ms)"
+            )
+            if depth + 1 < max_depth:
+                walk(node.children, depth + 1)
+
+    walk(roots, 0)
+    return lines
+
+
+def check_budget(
+    roots: T.List[ImportNode],
+    budget: ImportBudget,
+) -> T.List[str]:
+    """
+    :return: the list of budget violation messages, empty if within budget.
+    """
+    violations = list()
+    total_ms = get_total_us(roots) / 1000
+    if total_ms > budget.total_ms:
+        violations.append(
+            f"total: {total_ms:.1f} ms > budget {budget.total_ms} ms"
+        )
+    for name, budget_ms in budget.per_module_ms.items():
+        node = find_node(roots, name)
+        if node is None:
+            continue
+        ms = node.cumulative_us / 1000
+        if ms > budget_ms:
+            violations.append(f"{name}: {ms:.1f} ms > budget {budget_ms} ms")
+    return violations
+
+
+@logger.block(
+    msg="Profile Cold Start Import Time",
+    start_emoji=f"{Emoji.test} {Emoji.awslambda}",
+    end_emoji=Emoji.test,
+    pipe=Emoji.awslambda,
+)
+def profile_cold_start(
+    env_name: str,
+    budget: ImportBudget = DEFAULT_IMPORT_BUDGET,
+    repeat: int = 3,
+):
+    """
+    :raises ImportBudgetExceededError: if the import time is over budget.
+    """
+    roots = profile_import(env_name, repeat=repeat)
+    logger.info(f"import app.py took {get_total_us(roots) / 1000:.1f} ms")
+    for line in format_tree(roots):
+        logger.info(line, indent=1)
+    violations = check_budget(roots, budget)
+    if violations:
+        for violation in violations:
+            logger.error(f"{Emoji.red_circle} {violation}", indent=1)
+        raise ImportBudgetExceededError(
+            f"cold start import time is over budget: {'; '.join(violations)}"
+        )
+    logger.info(f"{Emoji.succeeded} within the import time budget")
@@ -8,12 +8,14 @@ We use `Python poetry <https://python-poetry.org/>`_ to ensure determinative dep
 """
 
 import typing as T
+import os
 import json
 import subprocess
 from pathlib import Path
 
 from .paths import (
     dir_project_root,
+    bin_python,
     bin_pip,
     path_requirements_main,
     path_requirements_dev,
@@ -22,12 +24,21 @@ from .paths import (
     path_requirements_automation,
     path_poetry_lock,
     path_poetry_lock_hash_json,
+    dir_wheelhouse,
     temp_current_dir,
 )
 from .logger import logger
 from .emoji import Emoji
-from .helpers import sha256_of_bytes
+from .helpers import sha256_of_bytes, get_platform_tag, get_interpreter_version
 from .runtime import IS_CI
+from .wheelhouse import Wheelhouse, ENV_VAR_WHEELHOUSE_S3URI
+
+USE_WHEELHOUSE = True
+"""
+If True, prefetch the wheels to the shared wheelhouse concurrently, and
+install the ``requirements-***.txt`` offline from the wheelhouse.
+See :mod:`automation.wheelhouse` for details.
+"""
 
 
 @logger.block(
@@ -303,6 +314,67 @@ def _quite_pip_install_in_ci(args: T.List[str]):
         args.append("--quiet")
 
 
+def _get_wheelhouse() -> Wheelhouse:
+    """
+    The wheelhouse for the virtualenv Python, it is mirrored to the S3 folder
+    in the ``WHEELHOUSE_S3URI`` environment variable if it is set.
+    """
+    return Wheelhouse(
+        dir_root=dir_wheelhouse,
+        python_version=get_interpreter_version(bin_python),
+        platform=get_platform_tag(),
+        s3uri_root=os.environ.get(ENV_VAR_WHEELHOUSE_S3URI) or None,
+    )
+
+
+def _prefetch_wheelhouse(paths: T.List[Path]) -> Wheelhouse:
+    logger.info("prefetch wheels to the wheelhouse ...")
+    wheelhouse = _get_wheelhouse()
+    wheelhouse.prefetch(bin_pip=bin_pip, paths_requirements=paths)
+    return wheelhouse
+
+
+def _pip_install_requirements(
+    path: Path,
+    wheelhouse: T.Optional[Wheelhouse] = None,
+):
+    """
+    Run ``pip install -r requirements-***.txt``. If ``USE_WHEELHOUSE`` is True,
+    it installs offline from the wheelhouse.
+
+    :param wheelhouse: the already prefetched wheelhouse, if None, prefetch it.
+    """
+    args = [f"{bin_pip}", "install", "-r", f"{path}"]
+    if USE_WHEELHOUSE:
+        if wheelhouse is None:
+            wheelhouse = _prefetch_wheelhouse([path])
+        args.extend(wheelhouse.get_pip_install_args())
+    _quite_pip_install_in_ci(args)
+    subprocess.run(args, check=True)
+
+
+@logger.block(
+    msg="Prefetch wheels to the wheelhouse",
+    start_emoji=Emoji.install,
+    end_emoji=Emoji.install,
+    pipe=Emoji.install,
+)
+def prefetch_wheelhouse():
+    """
+    Prefetch the wheels of the main, dev, test and doc dependencies
+    concurrently, see :mod:`automation.wheelhouse` for details.
+    """
+    _try_poetry_export()
+    _prefetch_wheelhouse(
+        [
+            path_requirements_main,
+            path_requirements_dev,
+            path_requirements_test,
+            path_requirements_doc,
+        ]
+    )
+
+
 @logger.block(
     msg="Install main dependencies and Package itself",
     start_emoji=Emoji.install,
@@ -327,9 +399,7 @@ def pip_install():
     _quite_pip_install_in_ci(args)
     subprocess.run(args, check=True)
 
-    args = [f"{bin_pip}", "install", "-r", f"{path_requirements_main}"]
-    _quite_pip_install_in_ci(args)
-    subprocess.run(args, check=True)
+    _pip_install_requirements(path_requirements_main)
 
 
 @logger.block(
@@ -348,12 +418,7 @@ def pip_install_dev():
     """
     _try_poetry_export()
 
-    args = [f"{bin_pip}", "install", "-r", f"{path_requirements_dev}"]
-    _quite_pip_install_in_ci(args)
-    subprocess.run(
-        args,
-        check=True,
-    )
+    _pip_install_requirements(path_requirements_dev)
 
 
 @logger.block(
@@ -372,12 +437,7 @@ def pip_install_test():
     """
     _try_poetry_export()
 
-    args = [f"{bin_pip}", "install", "-r", f"{path_requirements_test}"]
-    _quite_pip_install_in_ci(args)
-    subprocess.run(
-        args,
-        check=True,
-    )
+    _pip_install_requirements(path_requirements_test)
 
 
 @logger.block(
@@ -396,12 +456,7 @@ def pip_install_doc():
     """
     _try_poetry_export()
 
-    args = [f"{bin_pip}", "install", "-r", f"{path_requirements_doc}"]
-    _quite_pip_install_in_ci(args)
-    subprocess.run(
-        args,
-        check=True,
-    )
+    _pip_install_requirements(path_requirements_doc)
 
 
 @logger.block(
@@ -451,16 +506,21 @@ def pip_install_all():
         check=True,
     )
 
-    for path in [
+    paths = [
         path_requirements_main,
         path_requirements_dev,
         path_requirements_test,
         path_requirements_doc,
-        path_requirements_automation,
-    ]:
-        args = [f"{bin_pip}", "install", "-r", f"{path}"]
-        _quite_pip_install_in_ci(args)
-        subprocess.run(
-            args,
-            check=True,
-        )
+    ]
+    # prefetch all wheels at once, so they are downloaded concurrently
+    wheelhouse = _prefetch_wheelhouse(paths) if USE_WHEELHOUSE else None
+    for path in paths:
+        _pip_install_requirements(path, wheelhouse=wheelhouse)
+
+    # the automation dependencies are not pinned, install them from the index
+    args = [f"{bin_pip}", "install", "-r", f"{path_requirements_automation}"]
+    _quite_pip_install_in_ci(args)
+    subprocess.run(
+        args,
+        check=True,
+    )
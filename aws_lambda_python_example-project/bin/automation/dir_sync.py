@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+"""
+One way local folder sync, like ``rsync -a --delete``.
+
+A file is copied only if the destination doesn't have it, or the size or
+the modification time is different. ``shutil.copy2`` preserves the
+modification time, so an unchanged file is skipped in the next run. The
+destination files that are not in the source are removed.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import os
+import shutil
+import fnmatch
+import dataclasses
+from pathlib import Path
+
+
+DEFAULT_EXCLUDE = ["__pycache__", "*.pyc", "*.pyo", ".DS_Store"]
+
+
+@dataclasses.dataclass
+class SyncResult:
+    copied: T.List[str] = dataclasses.field(default_factory=list)
+    unchanged: T.List[str] = dataclasses.field(default_factory=list)
+    removed: T.List[str] = dataclasses.field(default_factory=list)
+
+
+def _is_excluded(name: str, exclude: T.List[str]) -> bool:
+    return any(fnmatch.fnmatch(name, pattern) for pattern in exclude)
+
+
+def _is_same(stat_src: os.stat_result, stat_dst: os.stat_result) -> bool:
+    return (
+        stat_src.st_size == stat_dst.st_size
+        and stat_src.st_mtime_ns == stat_dst.st_mtime_ns
+    )
+
+
+def _copy(path_src: Path, path_dst: Path, hardlink: bool):
+    if path_dst.exists():
+        path_dst.unlink()
+    if hardlink:
+        try:
+            os.link(path_src, path_dst)
+            return
+        except OSError:  # different file system, fall back to copy
+            pass
+    shutil.copy2(path_src, path_dst)
+
+
+def sync_dir(
+    dir_src: Path,
+    dir_dst: Path,
+    exclude: T.Optional[T.List[str]] = None,
+    hardlink: bool = False,
+    keep: T.Optional[T.List[str]] = None,
+) -> SyncResult:
+    """
+    Make ``dir_dst`` an exact copy of ``dir_src``.
+
+    :param exclude: the file and folder name patterns to skip, the excluded
+        files in the destination are removed too.
+    :param hardlink: hardlink the files instead of copying them, it is
+        faster but the destination shares the file with the source.
+    :param keep: the top level names in the destination that are never
+        removed, for example a symlink that only the destination has.
+
+    :return: the relative paths of the copied, unchanged and removed files.
+    """
+    if exclude is None:
+        exclude = DEFAULT_EXCLUDE
+    if keep is None:
+        keep = list()
+    result = SyncResult()
+    dir_dst.mkdir(parents=True, exist_ok=True)
+    for dirpath, dirnames, filenames in os.walk(dir_src):
+        dirnames[:] = [name for name in dirnames if not _is_excluded(name, exclude)]
+        dir_from = Path(dirpath)
+        dir_to = dir_dst / dir_from.relative_to(dir_src)
+        dir_to.mkdir(exist_ok=True)
+        for filename in filenames:
+            if _is_excluded(filename, exclude):
+                continue
+            path_src = dir_from / filename
+            path_dst = dir_to / filename
+            relpath = path_src.relative_to(dir_src).as_posix()
+            try:
+                is_same = _is_same(path_src.stat(), path_dst.stat())
+            except FileNotFoundError:
+                is_same = False
+            if is_same:
+                result.unchanged.append(relpath)
+            else:
+                _copy(path_src, path_dst, hardlink)
+                result.copied.append(relpath)
+
+    # remove the files that are not in the source
+    for dirpath, dirnames, filenames in os.walk(dir_dst, topdown=True):
+        dir_to = Path(dirpath)
+        if dir_to == dir_dst:
+            dirnames[:] = [name for name in dirnames if name not in keep]
+            filenames = [name for name in filenames if name not in keep]
+        dir_from = dir_src / dir_to.relative_to(dir_dst)
+        for filename in filenames:
+            if (not (dir_from / filename).is_file()) or _is_excluded(
+                filename, exclude
+            ):
+                (dir_to / filename).unlink()
+                result.removed.append((dir_to / filename).relative_to(dir_dst).as_posix())
+        removed_dirnames = [
+            dirname
+            for dirname in dirnames
+            if not (dir_from / dirname).is_dir() or _is_excluded(dirname, exclude)
+        ]
+        for dirname in removed_dirnames:
+            shutil.rmtree(dir_to / dirname, ignore_errors=True)
+        dirnames[:] = [name for name in dirnames if name not in removed_dirnames]
+    return result
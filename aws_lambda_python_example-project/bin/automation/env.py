@@ -11,7 +11,10 @@ This module automatically detect what environment we should use.
 import os
 import json
 
-from aws_lambda_python_example.config.define import EnvEnum
+from aws_lambda_python_example.config.define import (
+    EnvEnum,
+    ENV_VAR_DEPLOY_TARGET_ENV_NAME,
+)
 
 from .git import (
     GIT_BRANCH_NAME,
@@ -35,6 +38,12 @@ def _find_env() -> str:
     """
     Find which environment we should deploy to.
     """
+    # the multi target deployment orchestrator explicitly set the env
+    if ENV_VAR_DEPLOY_TARGET_ENV_NAME in os.environ:
+        env_name = os.environ[ENV_VAR_DEPLOY_TARGET_ENV_NAME]
+        if env_name not in EnvEnum._value2member_map_:
+            raise ValueError(f"Invalid environment name {env_name!r}!")
+        return env_name
     if IS_CI:
         if (
             IS_FEATURE_BRANCH
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+"""
+A persistent file hash index, similar to the git index.
+
+Every file is recorded with its ``size``, ``mtime`` and ``inode``. If none of
+them changed since the last run, the recorded sha256 digest is reused,
+only the changed files are read and hashed again. The per-file digests
+are combined into a Merkle root, which represents the whole file set.
+
+The index also keeps a snapshot of the file digests for each deployed
+hash, so we can tell which files changed since the last deployment.
+
+The content of the index file looks like::
+
+    {
+        "timestamp_ns": 1678000000000000000,
+        "entries": {
+            "aws_lambda_python_example/app.py": {
+                "size": 1024,
+                "mtime_ns": 1678000000000000000,
+                "inode": 123456,
+                "sha256": "..."
+            },
+            ...
+        },
+        "snapshots": {
+            "merkle-root-of-the-deployed-files": {
+                "aws_lambda_python_example/app.py": "...",
+                ...
+            }
+        }
+    }
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import os
+import json
+import time
+import dataclasses
+from pathlib import Path
+
+from .helpers import sha256_of_bytes, sha256_of_file
+
+
+def get_merkle_root(digests: T.Dict[str, str]) -> str:
+    """
+    Combine the per-file digests into one hash. The leaves are sorted by
+    the relative path, and include the path, so renaming a file changes
+    the root too.
+
+    :param digests: relative path to sha256 digest mapping.
+    """
+    nodes = [
+        sha256_of_bytes(f"{relpath}\0{digest}".encode("utf-8"))
+        for relpath, digest in sorted(digests.items())
+    ]
+    if not nodes:
+        return sha256_of_bytes(b"")
+    while len(nodes) > 1:
+        if len(nodes) % 2:
+            nodes.append(nodes[-1])
+        nodes = [
+            sha256_of_bytes((left + right).encode("utf-8"))
+            for left, right in zip(nodes[::2], nodes[1::2])
+        ]
+    return nodes[0]
+
+
+@dataclasses.dataclass
+class FileChanges:
+    added: T.List[str] = dataclasses.field(default_factory=list)
+    removed: T.List[str] = dataclasses.field(default_factory=list)
+    modified: T.List[str] = dataclasses.field(default_factory=list)
+
+    @classmethod
+    def diff(cls, before: T.Dict[str, str], after: T.Dict[str, str]) -> "FileChanges":
+        return cls(
+            added=sorted(set(after) - set(before)),
+            removed=sorted(set(before) - set(after)),
+            modified=sorted(
+                relpath
+                for relpath in set(before) & set(after)
+                if before[relpath] != after[relpath]
+            ),
+        )
+
+    @property
+    def n_changes(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.modified)
+
+
+@dataclasses.dataclass
+class HashIndex:
+    """
+    :param path: the local index JSON file.
+    :param timestamp_ns: when the index was written. A file modified in the
+        same clock tick as the index write may not have a different
+        mtime after another change, so it is always rehashed, like the
+        "racy git" rule.
+    :param entries: relative path to stat info and sha256 digest mapping.
+    :param snapshots: hash to the file digests it was computed from mapping.
+    """
+
+    path: Path = dataclasses.field()
+    timestamp_ns: int = dataclasses.field(default=0)
+    entries: T.Dict[str, T.Dict[str, T.Any]] = dataclasses.field(
+        default_factory=dict
+    )
+    snapshots: T.Dict[str, T.Dict[str, str]] = dataclasses.field(
+        default_factory=dict
+    )
+
+    @classmethod
+    def read(cls, path: Path) -> "HashIndex":
+        """
+        Read the index file, return an empty index if it doesn't exist
+        or it is corrupted.
+        """
+        try:
+            data = json.loads(path.read_text())
+            return cls(
+                path=path,
+                timestamp_ns=data["timestamp_ns"],
+                entries=data["entries"],
+                snapshots=data.get("snapshots", dict()),
+            )
+        except (FileNotFoundError, ValueError, KeyError):
+            return cls(path=path)
+
+    def write(self):
+        self.timestamp_ns = time.time_ns()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        path_tmp = self.path.parent / f"{self.path.name}.tmp"
+        path_tmp.write_text(
+            json.dumps(
+                {
+                    "timestamp_ns": self.timestamp_ns,
+                    "entries": self.entries,
+                    "snapshots": self.snapshots,
+                },
+            )
+        )
+        path_tmp.replace(self.path)
+
+    def update(
+        self,
+        dir_root: Path,
+        paths: T.Iterable[Path],
+    ) -> T.Tuple[T.Dict[str, str], T.List[str]]:
+        """
+        Get the sha256 digest of the given files, only rehash the files that
+        the stat info changed.
+
+        :param dir_root: the relative paths in the index are relative to it.
+        :param paths: the absolute paths of the files.
+
+        :return: the relative path to digest mapping of the given files, and
+            the list of files that were rehashed.
+        """
+        digests = dict()
+        rehashed = list()
+        for path in paths:
+            relpath = path.relative_to(dir_root).as_posix()
+            stat = os.stat(path)
+            entry = self.entries.get(relpath)
+            if (
+                entry is None
+                or entry["size"] != stat.st_size
+                or entry["mtime_ns"] != stat.st_mtime_ns
+                or entry["inode"] != stat.st_ino
+                or stat.st_mtime_ns >= self.timestamp_ns
+            ):
+                entry = dict(
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                    inode=stat.st_ino,
+                    sha256=sha256_of_file(path),
+                )
+                self.entries[relpath] = entry
+                rehashed.append(relpath)
+            digests[relpath] = entry["sha256"]
+        return digests, rehashed
+
+    def add_snapshot(self, digests: T.Dict[str, str], max_snapshots: int = 10) -> str:
+        """
+        Remember the file digests of a hash, so we can diff against it later.
+
+        :return: the Merkle root of the digests.
+        """
+        root = get_merkle_root(digests)
+        self.snapshots.pop(root, None)
+        self.snapshots[root] = digests
+        while len(self.snapshots) > max_snapshots:  # drop the oldest one
+            self.snapshots.pop(next(iter(self.snapshots)))
+        return root
+
+    def get_changes(
+        self,
+        root: str,
+        digests: T.Dict[str, str],
+    ) -> T.Optional[FileChanges]:
+        """
+        :return: the changes from the snapshot of ``root`` to the current
+            digests, None if the snapshot is not in the index.
+        """
+        if root not in self.snapshots:
+            return None
+        return FileChanges.diff(self.snapshots[root], digests)
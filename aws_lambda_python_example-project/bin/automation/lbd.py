@@ -12,17 +12,22 @@ AWS Lambda Function related automation script.
 
 import typing as T
 import os
-import glob
+import json
 import shutil
+import fnmatch
 import subprocess
+import urllib.request
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from s3pathlib import S3Path
 
 from aws_codecommit import better_boto
 
 from aws_lambda_python_example import __version__
 from aws_lambda_python_example.config.init import config
-from aws_lambda_python_example.boto_ses import bsm
+from aws_lambda_python_example.config.snapshot import create_snapshot, write_snapshot
+from aws_lambda_python_example.config.define import LambdaArchitectureEnum
+from aws_lambda_python_example.boto_ses import bsm, DEFAULT_AWS_REGION
 
 from .paths import (
     bin_python,
@@ -30,11 +35,13 @@ from .paths import (
     bin_chalice,
     dir_project_root,
     dir_python_lib,
-    dir_build_lambda,
-    dir_build_lambda_python,
-    path_build_lambda_layer_zip,
+    dir_build_lambda_layer_staging,
+    path_lambda_source_hash_index,
+    dir_lambda_layer_cache,
+    dir_wheelhouse,
     dir_lambda_app,
     dir_lambda_app_vendor,
+    path_lambda_app_config_snapshot_json,
     dir_lambda_app_deployed,
     path_app_py,
     path_chalice_config,
@@ -57,8 +64,32 @@ from .git import (
 from .env import CURRENT_ENV
 from .logger import logger
 from .emoji import Emoji
-from .helpers import sha256_of_bytes
+from .helpers import sha256_of_bytes, sha256_of_file, get_platform_tag, get_interpreter_version
+from .wheelhouse import Wheelhouse
+from .s3_transfer import upload_file, copy_object, run_concurrently
+from .hash_index import HashIndex, FileChanges, get_merkle_root
+from .import_graph import parse_app, get_module_closure
+from .dir_sync import sync_dir
+from .lbd_layer_platform import LambdaTargetPlatform
+from .zip_writer import write_dir_zip, zip_to_bytes
+from .lbd_layer_prune import LayerPruneConfig, prune_layer_with_report
+from .lbd_layer_compile import BytecodeModeEnum, compile_layer
+from .lbd_layer_index import LayerIndex, get_requirements_fingerprint
 from .deps import _try_poetry_export
+from .pip_requirements import parse_requirements
+from .lbd_layer_cache import (
+    LayerBuildCache,
+    build_layer_with_cache,
+)
+from .lbd_layer import LambdaLayer, get_layer_aws_region, get_default_lambda_layer
+from .lbd_layer_partition import (
+    get_poetry_lock_history,
+    get_churn,
+    partition_requirements,
+    get_lambda_layer_partition,
+    write_manifest,
+    read_manifest,
+)
 from .lbd_rule import (
     do_we_build_lambda_layer as _do_we_build_lambda_layer,
     do_we_publish_lambda_layer,
@@ -70,18 +101,46 @@ from .lbd_rule import (
 # ------------------------------------------------------------------------------
 # Lambda layer related
 # ------------------------------------------------------------------------------
-def get_latest_lambda_layer_version() -> T.Optional[int]:
+N_LAYER_PARTITIONS = 1
+"""
+Split the dependencies into how many Lambda layers. 1 means everything goes
+into one layer, see :mod:`automation.lbd_layer_partition` for details.
+"""
+
+LAYER_BYTECODE_MODE = BytecodeModeEnum.source
+"""
+Ship pre-compiled pyc in the Lambda layer, one of
+:class:`automation.lbd_layer_compile.BytecodeModeEnum`. The layer is only
+rebuilt when the dependencies change, so a new value takes effect on the
+next layer build.
+"""
+
+LAYER_OPTIMIZATION_LEVEL = 0
+"""
+The bytecode optimization level of the Lambda layer, 0, 1 or 2. Only
+:attr:`~automation.lbd_layer_compile.BytecodeModeEnum.pyc_only` can use
+a level other than 0.
+"""
+
+
+def get_latest_lambda_layer_version(
+    layer_name: T.Optional[str] = None,
+) -> T.Optional[int]:
     """
     Call AWS Lambda Layer API, get the latest deployed layer version.
 
     If returns None, it means no layer deployed yet.
 
+    :param layer_name: default is ``config.env.lambda_layer_name``.
+
     Ref:
 
     - https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/lambda.html#Lambda.Client.list_layer_versions
     """
+    if layer_name is None:
+        layer_name = config.env.lambda_layer_name
     res = bsm.lambda_client.list_layer_versions(
-        LayerName=config.env.lambda_layer_name,
+        LayerName=layer_name,
     )
     if len(res.get("LayerVersions", [])):
         return res["LayerVersions"][0]["Version"]
@@ -89,31 +148,115 @@ def get_latest_lambda_layer_version() -> T.Optional[int]:
         return None
 
 
-def is_current_layer_the_same_as_latest_one() -> bool:
+def _is_current_layer_the_same_as_latest_one_without_index(
+    layer: LambdaLayer,
+) -> bool:
     """
     Compare the local version of the requirements and the S3 backup of the
     latest layer requirements.
+
+    This is only used when the layer fingerprint index doesn't exist yet,
+    for example, the latest layer was published before we have the index.
     """
     # check if there is a lambda layer exists
-    latest_layer_version = get_latest_lambda_layer_version()
+    latest_layer_version = get_latest_lambda_layer_version(layer.layer_name)
     if latest_layer_version is None:
         return False
 
     # get the s3 backup of the latest layer requirements
-    s3path_lambda_layer_requirements_txt = (
-        config.env.get_s3path_lambda_layer_requirements_txt(
-            version=latest_layer_version
-        )
+    s3path_lambda_layer_requirements_txt = layer.get_s3path_requirements_txt(
+        version=latest_layer_version
     )
+    if s3path_lambda_layer_requirements_txt.exists() is False:
+        return False
 
     # compare
     return (
-        path_requirements_main.read_text()
+        layer.path_requirements.read_text()
         == s3path_lambda_layer_requirements_txt.read_text()
     )
 
 
-def do_we_build_lambda_layer() -> bool:
+def is_current_layer_the_same_as_latest_one(
+    layer: T.Optional[LambdaLayer] = None,
+) -> bool:
+    """
+    Compare the fingerprint of the local version of the requirements and the
+    fingerprint of the latest layer in the layer fingerprint index.
+
+    :param layer: default is the single layer built from ``requirements-main.txt``.
+    """
+    if layer is None:
+        layer = get_default_lambda_layer()
+    index = LayerIndex.read(layer.s3path_index)
+    if index.latest is None:
+        return _is_current_layer_the_same_as_latest_one_without_index(layer)
+    return index.latest == get_requirements_fingerprint(layer.path_requirements)
+
+
+def get_latest_lambda_layer_arn(
+    layer: T.Optional[LambdaLayer] = None,
+) -> T.Optional[str]:
+    """
+    :return: the latest layer version ARN in the fingerprint index,
+        None if the index doesn't exist yet.
+    """
+    if layer is None:
+        layer = get_default_lambda_layer()
+    index = LayerIndex.read(layer.s3path_index)
+    if index.latest is None:
+        return None
+    return index.get(index.latest)["layer_version_arn"]
+
+
+def reuse_lambda_layer(
+    layer: T.Optional[LambdaLayer] = None,
+) -> T.Optional[str]:
+    """
+    If an older layer version was built from identical dependencies, and it
+    still exists, mark it as the latest one in the index instead of
+    publishing a duplicate.
+
+    :param layer: default is the single layer built from ``requirements-main.txt``.
+
+    :return: the reused lambda layer version ARN, None if nothing to reuse.
+    """
+    if layer is None:
+        layer = get_default_lambda_layer()
+    fingerprint = get_requirements_fingerprint(layer.path_requirements)
+    s3path_lambda_layer_index = layer.s3path_index
+    index = LayerIndex.read(s3path_lambda_layer_index)
+    record = index.get(fingerprint)
+    if record is None:
+        return None
+    try:
+        bsm.lambda_client.get_layer_version(
+            LayerName=layer.layer_name,
+            VersionNumber=record["layer_version"],
+        )
+    except bsm.lambda_client.exceptions.ResourceNotFoundException:
+        logger.info(
+            f"layer version {record['layer_version']} has identical "
+            f"dependencies but it is deleted, can't reuse it."
+        )
+        return None
+    index.add(
+        fingerprint=fingerprint,
+        layer_version=record["layer_version"],
+        layer_version_arn=record["layer_version_arn"],
+    )
+    index.write(s3path_lambda_layer_index)
+    logger.info(
+        f"{Emoji.green_circle} reuse layer version {record['layer_version']}, "
+        f"it has identical dependencies, don't publish a duplicate."
+    )
+    logger.info(f"layer arn: {record['layer_version_arn']}", indent=1)
+    return record["layer_version_arn"]
+
+
+def do_we_build_lambda_layer(
+    layer: T.Optional[LambdaLayer] = None,
+) -> bool:
     if (
         _do_we_build_lambda_layer(
             is_ci_runtime=IS_CI,
@@ -124,7 +267,7 @@ def do_we_build_lambda_layer() -> bool:
     ):
         return False
 
-    if is_current_layer_the_same_as_latest_one():
+    if is_current_layer_the_same_as_latest_one(layer):
         logger.info(
             f"{Emoji.red_circle} don't publish layer, "
             f"the current requirements-main.txt is the same as the one "
@@ -141,41 +284,153 @@ def do_we_build_lambda_layer() -> bool:
     end_emoji=Emoji.build,
     pipe=Emoji.awslambda,
 )
-def build_lambda_layer_artifacts():
+def build_lambda_layer_artifacts(
+    layer: T.Optional[LambdaLayer] = None,
+    use_cache: bool = True,
+    use_wheelhouse: bool = True,
+    target_platform: T.Optional[LambdaTargetPlatform] = None,
+    prune: bool = True,
+    prune_config: T.Optional[LayerPruneConfig] = None,
+    bytecode_mode: str = LAYER_BYTECODE_MODE,
+    optimization_level: int = LAYER_OPTIMIZATION_LEVEL,
+):
     """
-    This function should only run in CI environment. If you build layer
-    on Mac, some C library may not work in AWS Lambda, which is an
-    Amazon Linux based container.
+    By default, this function should only run in CI environment. If you
+    build layer on Mac, some C library may not work in AWS Lambda, which is an
+    Amazon Linux based container. Use ``target_platform`` to build a valid
+    layer anywhere.
+
+    :param layer: which layer to build, default is the single layer built
+        from ``requirements-main.txt``.
+    :param use_cache: if True, restore the unchanged packages from the
+        per-distribution build cache and only install the changed ones.
+        See :mod:`automation.lbd_layer_cache` for details.
+    :param use_wheelhouse: if True, prefetch the wheels to the shared
+        wheelhouse concurrently and install offline from it.
+        See :mod:`automation.wheelhouse` for details.
+    :param target_platform: if set, only install the ``manylinux`` wheels
+        for the Lambda runtime platform, instead of the packages for the
+        build environment. See :mod:`automation.lbd_layer_platform` for details.
+        The ``arm64`` layer always uses the target platform.
+    :param prune: if True, remove files that are not needed at runtime
+        before zipping the layer, and print a per-package size report.
+    :param prune_config: customize what to remove, see
+        :class:`automation.lbd_layer_prune.LayerPruneConfig`.
+    :param bytecode_mode: ship pre-compiled pyc for the Lambda runtime Python,
+        see :data:`LAYER_BYTECODE_MODE`.
+    :param optimization_level: see :data:`LAYER_OPTIMIZATION_LEVEL`.
     """
-    _try_poetry_export()
+    if layer is None:
+        _try_poetry_export()
+        layer = get_default_lambda_layer()
+    logger.info(f"build layer {layer.layer_name!r} for {layer.architecture}")
+    if target_platform is None:
+        if layer.architecture != LambdaArchitectureEnum.x86_64:
+            target_platform = LambdaTargetPlatform(
+                python_version=pyproject.python_version,
+                architecture=layer.architecture,
+            )
+    elif target_platform.architecture != layer.architecture:
+        raise ValueError(
+            f"can't build the {layer.architecture} layer "
+            f"for the {target_platform.architecture} platform!"
+        )
 
     # remove existing artifacts and temp folder
-    path_build_lambda_layer_zip.unlink(missing_ok=True)
-    shutil.rmtree(f"{dir_build_lambda_python}", ignore_errors=True)
+    layer.path_layer_zip.unlink(missing_ok=True)
+    shutil.rmtree(f"{layer.dir_python}", ignore_errors=True)
 
     # initialize the build/lambda folder
-    dir_build_lambda.mkdir(parents=True, exist_ok=True)
+    layer.dir_build.mkdir(parents=True, exist_ok=True)
 
-    # do "pip install -r requirements-main.txt -t ./build/lambda/python"
-    logger.info("do 'pip install -r requirements-main.txt' ...")
-    args = [
-        bin_pip,
-        "install",
-        "-r",
-        f"{path_requirements_main}",
-        "-t",
-        f"{dir_build_lambda_python}",
-    ]
-    # if IS_CI:
-    args.append("--quiet")
-    subprocess.run(
-        args,
-        check=True,
-    )
+    if target_platform is None:
+        python_version = get_interpreter_version(bin_python)
+        platform = get_platform_tag()
+        platform_pip_args = list()
+    else:
+        logger.info(
+            f"resolve wheels for python{target_platform.python_version} "
+            f"on {target_platform.platform_tag}"
+        )
+        python_version = target_platform.python_version
+        platform = target_platform.platform_tag
+        platform_pip_args = target_platform.get_pip_args()
+
+    pip_args = list(platform_pip_args)
+    if use_wheelhouse:
+        logger.info("prefetch wheels to the wheelhouse ...")
+        wheelhouse = Wheelhouse(
+            dir_root=dir_wheelhouse,
+            python_version=python_version,
+            platform=platform,
+            s3uri_root=config.env.s3dir_wheelhouse.uri,
+            platform_pip_args=platform_pip_args or None,
+        )
+        with bsm.awscli():
+            wheelhouse.prefetch(
+                bin_pip=bin_pip,
+                paths_requirements=[layer.path_requirements],
+            )
+        pip_args.extend(wheelhouse.get_pip_install_args())
+
+    if use_cache:
+        logger.info("restore packages from build cache, install the changed ones ...")
+        cache = LayerBuildCache(
+            dir_local=dir_lambda_layer_cache,
+            python_version=pyproject.python_version,
+            platform=platform,
+            s3dir_remote=config.env.s3dir_lambda_layer_cache,
+        )
+        logger.info(f"local cache at {cache.dir_local}", indent=1)
+        logger.info(f"S3 cache at {cache.s3dir_remote.console_url}", indent=1)
+        build_layer_with_cache(
+            bin_pip=bin_pip,
+            path_requirements=layer.path_requirements,
+            dir_target=layer.dir_python,
+            dir_staging=dir_build_lambda_layer_staging,
+            cache=cache,
+            pip_args=pip_args,
+        )
+    else:
+        # do "pip install -r requirements-main.txt -t ./build/lambda/python --no-deps"
+        # the exported requirements have all the pinned dependencies, a
+        # partition must not pull its unpinned dependencies into its layer
+        logger.info(f"do 'pip install -r {layer.path_requirements.name}' ...")
+        args = [
+            bin_pip,
+            "install",
+            "-r",
+            f"{layer.path_requirements}",
+            "-t",
+            f"{layer.dir_python}",
+            "--no-deps",
+        ]
+        args.extend(pip_args)
+        # if IS_CI:
+        args.append("--quiet")
+        subprocess.run(
+            args,
+            check=True,
+        )
+
+    # remove the files that are not needed at runtime
+    if prune:
+        logger.info("prune the layer ...")
+        prune_layer_with_report(layer.dir_python, config=prune_config)
+
+    # pre-compile the bytecode for the Lambda runtime Python
+    if bytecode_mode != BytecodeModeEnum.source:
+        compile_layer(
+            bin_python=bin_python,
+            dir_root=layer.dir_python,
+            python_version=pyproject.python_version,
+            mode=bytecode_mode,
+            optimization_level=optimization_level,
+        )
 
     # zip the layer file
-    cwd = os.getcwd()
-    os.chdir(dir_build_lambda)
+    # we use an in-process zip writer that compresses files in parallel,
+    # and produces the same zip file for the same content
     ignore_package_list = [
         "boto3",
         "botocore",
@@ -187,26 +442,20 @@ def build_lambda_layer_artifacts():
         "_pytest",
         "pytest",
     ]
-    args = (
-        [
-            "zip",
-            f"{path_build_lambda_layer_zip}",
-            "-r",
-            "-9",
-            "-q",
-        ]
-        + glob.glob("*")
-        + [
-            "-x",
-        ]
+    exclude_patterns = [f"python/{package}*" for package in ignore_package_list]
+    logger.info(f"zip the layer to {layer.path_layer_zip} ...")
+    write_dir_zip(
+        dir_root=layer.dir_python,
+        path_zip=layer.path_layer_zip,
+        prefix="python/",
+        exclude=lambda arcname: any(
+            fnmatch.fnmatch(arcname, pattern) for pattern in exclude_patterns
+        ),
+    )
+    logger.info(
+        f"layer.zip sha256 = {sha256_of_file(layer.path_layer_zip)}",
+        indent=1,
     )
-    for package in ignore_package_list:
-        args.append(f"python/{package}*")
-    try:
-        subprocess.run(args, check=True)
-    except Exception as e:
-        os.chdir(cwd)  # ensure to change current dir back and then raise error
-        raise e
 
     logger.info("done!", indent=2)
 
@@ -217,16 +466,23 @@ def build_lambda_layer_artifacts():
     end_emoji=Emoji.deploy,
     pipe=Emoji.awslambda,
 )
-def upload_lambda_layer_artifacts():
+def upload_lambda_layer_artifacts(
+    layer: T.Optional[LambdaLayer] = None,
+):
     """
     Upload recently built lambda layer artifact to S3 temp folder first.
     If we successfully published a new layer from temp, then copy it to the
     target location.
+
+    The layer.zip is uploaded with concurrent multipart parts and a SHA256
+    checksum, and at the same time as the requirements.txt file.
+
+    :param layer: default is the single layer built from ``requirements-main.txt``.
     """
-    s3dir_tmp_lambda_layer_zip = config.env.s3dir_tmp_lambda_layer_zip
-    s3dir_tmp_lambda_layer_requirements_txt = (
-        config.env.s3dir_tmp_lambda_layer_requirements_txt
-    )
+    if layer is None:
+        layer = get_default_lambda_layer()
+    s3dir_tmp_lambda_layer_zip = layer.s3path_tmp_layer_zip
+    s3dir_tmp_lambda_layer_requirements_txt = layer.s3path_tmp_requirements_txt
     logger.info(f"upload layer.zip to {s3dir_tmp_lambda_layer_zip.uri}")
     logger.info(f"preview at {s3dir_tmp_lambda_layer_zip.console_url}", indent=1)
     logger.info(
@@ -234,14 +490,42 @@ def upload_lambda_layer_artifacts():
         indent=1,
     )
 
-    s3dir_tmp_lambda_layer_zip.upload_file(
-        f"{path_build_lambda_layer_zip}",
-        overwrite=True,
-    )
-    s3dir_tmp_lambda_layer_requirements_txt.upload_file(
-        f"{path_requirements_main}",
-        overwrite=True,
+    # the layer.zip is deterministic, skip the upload if the temp location
+    # already has exactly the same content
+    uploads = list()
+    layer_zip_sha256 = sha256_of_file(layer.path_layer_zip)
+    if (
+        s3dir_tmp_lambda_layer_zip.exists()
+        and s3dir_tmp_lambda_layer_zip.metadata.get("layer_zip_sha256")
+        == layer_zip_sha256
+    ):
+        logger.info(
+            f"{Emoji.red_circle} layer.zip is not changed, skip upload", indent=1
+        )
+    else:
+        uploads.append(
+            lambda: upload_file(
+                s3_client=bsm.s3_client,
+                path=layer.path_layer_zip,
+                s3path=s3dir_tmp_lambda_layer_zip,
+                metadata={"layer_zip_sha256": layer_zip_sha256},
+                content_type="application/zip",
+            )
+        )
+    uploads.append(
+        lambda: upload_file(
+            s3_client=bsm.s3_client,
+            path=layer.path_requirements,
+            s3path=s3dir_tmp_lambda_layer_requirements_txt,
+            metadata={
+                "requirements_fingerprint": get_requirements_fingerprint(
+                    layer.path_requirements
+                )
+            },
+            content_type="text/plain",
+        )
     )
+    run_concurrently(uploads)
     logger.info("done!", indent=1)
 
 
@@ -251,58 +535,98 @@ def upload_lambda_layer_artifacts():
     end_emoji=Emoji.package,
     pipe=Emoji.awslambda,
 )
-def publish_lambda_layer() -> T.Optional[str]:
+def publish_lambda_layer(
+    layer: T.Optional[LambdaLayer] = None,
+) -> T.Optional[str]:
     """
     Publish a new lambda layer version from AWS S3.
 
+    :param layer: default is the single layer built from ``requirements-main.txt``.
+
     :return: The published lambda layer version ARN
     """
+    if layer is None:
+        layer = get_default_lambda_layer()
     layer_console_url = (
         f"https://{bsm.aws_region}.console.aws.amazon.com/lambda"
         f"/home?region={bsm.aws_region}#"
-        f"/layers?fo=and&o0=%3A&v0={config.env.lambda_layer_name}"
+        f"/layers?fo=and&o0=%3A&v0={layer.layer_name}"
     )
 
     # publish new layer from temp s3 location first
-    s3dir_tmp_lambda_layer_zip = config.env.s3dir_tmp_lambda_layer_zip
-    s3dir_tmp_lambda_layer_requirements_txt = (
-        config.env.s3dir_tmp_lambda_layer_requirements_txt
-    )
+    s3dir_tmp_lambda_layer_zip = layer.s3path_tmp_layer_zip
+    s3dir_tmp_lambda_layer_requirements_txt = layer.s3path_tmp_requirements_txt
 
     # publish new layer version from temp s3 location
-    logger.info(f"preview deployed layer at {layer_console_url}")
-    response = bsm.lambda_client.publish_layer_version(
-        LayerName=config.env.lambda_layer_name,
-        Content=dict(
+    if get_layer_aws_region() is None:
+        content = dict(
             S3Bucket=s3dir_tmp_lambda_layer_zip.bucket,
             S3Key=s3dir_tmp_lambda_layer_zip.key,
-        ),
+        )
+    else:
+        # the layer content on S3 has to be in the same region as the layer,
+        # the artifacts bucket is in the default region, upload it directly
+        zip_file = layer.path_layer_zip.read_bytes()
+        if len(zip_file) > MAX_DIRECT_UPLOAD_ZIP_SIZE:
+            raise ValueError(
+                f"{layer.path_layer_zip} is larger than 50 MB, can't publish "
+                f"it to {bsm.aws_region!r} directly!"
+            )
+        content = dict(ZipFile=zip_file)
+    logger.info(f"preview deployed layer at {layer_console_url}")
+    response = bsm.lambda_client.publish_layer_version(
+        LayerName=layer.layer_name,
+        Content=content,
         CompatibleRuntimes=[
             f"python{pyproject.python_version}",
         ],
+        CompatibleArchitectures=[
+            layer.architecture,
+        ],
     )
     layer_version_arn = response["LayerVersionArn"]
     layer_version = int(layer_version_arn.split(":")[-1])
 
     # if success, we copy artifacts from temp to the right location
-    s3path_lambda_layer_zip = config.env.get_s3path_lambda_layer_zip(
+    s3path_lambda_layer_zip = layer.get_s3path_layer_zip(version=layer_version)
+    s3path_lambda_layer_requirements_txt = layer.get_s3path_requirements_txt(
         version=layer_version
     )
-    s3path_lambda_layer_requirements_txt = (
-        config.env.get_s3path_lambda_layer_requirements_txt(version=layer_version)
-    )
     logger.info(f"preview layer.zip at {s3path_lambda_layer_zip.console_url}")
     logger.info(
         f"preview requirements.txt at {s3path_lambda_layer_requirements_txt.console_url}",
     )
-    s3dir_tmp_lambda_layer_zip.copy_to(
-        s3path_lambda_layer_zip,
-        overwrite=False,  # we don't overwrite existing layer artifacts
+    # the two copies run concurrently, large layer.zip is copied with
+    # concurrent multipart copy
+    fingerprint = get_requirements_fingerprint(layer.path_requirements)
+    run_concurrently(
+        [
+            lambda: copy_object(
+                s3_client=bsm.s3_client,
+                s3path_src=s3dir_tmp_lambda_layer_zip,
+                s3path_dst=s3path_lambda_layer_zip,
+                metadata={"requirements_fingerprint": fingerprint},
+                overwrite=False,  # we don't overwrite existing layer artifacts
+            ),
+            lambda: copy_object(
+                s3_client=bsm.s3_client,
+                s3path_src=s3dir_tmp_lambda_layer_requirements_txt,
+                s3path_dst=s3path_lambda_layer_requirements_txt,
+                metadata={"requirements_fingerprint": fingerprint},
+                overwrite=False,
+            ),
+        ]
     )
-    s3dir_tmp_lambda_layer_requirements_txt.copy_to(
-        s3path_lambda_layer_requirements_txt,
-        overwrite=False,
+
+    # record the new layer version in the fingerprint index
+    s3path_lambda_layer_index = layer.s3path_index
+    index = LayerIndex.read(s3path_lambda_layer_index)
+    index.add(
+        fingerprint=fingerprint,
+        layer_version=layer_version,
+        layer_version_arn=layer_version_arn,
     )
+    index.write(s3path_lambda_layer_index)
     logger.info("done!")
 
     # in CI, post the published Lambda Layer console url to the PR comment if possible
@@ -313,6 +637,7 @@ def publish_lambda_layer() -> T.Optional[str]:
                 [
                     f"{Emoji.succeeded} {Emoji.package} **Published a new Lambda Layer version**",
                     f"",
+                    f"- **layer name**: {layer.layer_name}",
                     f"- **layer version**: {layer_version}",
                     f"- **layer arn**: ``{layer_version_arn}``",
                     f"- review [Lambda Layer]({layer_console_url})",
@@ -328,29 +653,77 @@ def publish_lambda_layer() -> T.Optional[str]:
     return layer_version_arn
 
 
+def deploy_single_lambda_layer(
+    architecture: str = LambdaArchitectureEnum.x86_64,
+    bytecode_mode: str = LAYER_BYTECODE_MODE,
+    optimization_level: int = LAYER_OPTIMIZATION_LEVEL,
+):
+    """
+    Build and publish the single layer that includes everything in
+    ``requirements-main.txt``.
+    """
+    layer = get_default_lambda_layer(architecture)
+    if do_we_build_lambda_layer(layer) is False:
+        return
+
+    is_publish = do_we_publish_lambda_layer(
+        is_ci_runtime=IS_CI,
+        branch_name=GIT_BRANCH_NAME,
+        is_layer_branch=IS_LAYER_BRANCH,
+    )
+    if is_publish and (reuse_lambda_layer(layer) is not None):
+        logger.info(f"{Emoji.succeeded} Deploy Lambda layer succeeded!")
+        return
+
+    build_lambda_layer_artifacts(
+        layer=layer,
+        bytecode_mode=bytecode_mode,
+        optimization_level=optimization_level,
+    )
+
+    if is_publish:
+        upload_lambda_layer_artifacts(layer=layer)
+        publish_lambda_layer(layer=layer)
+        logger.info(f"{Emoji.succeeded} Deploy Lambda layer succeeded!")
+
+
 @logger.block(
     msg="Deploy a New Lambda Layer",
     start_emoji=f"{Emoji.package} {Emoji.awslambda}",
     end_emoji=Emoji.package,
     pipe=Emoji.awslambda,
 )
-def deploy_lambda_layer():
-    try:
-        if do_we_build_lambda_layer():
-            build_lambda_layer_artifacts()
-        else:
-            return
+def deploy_lambda_layer(
+    n_partitions: int = N_LAYER_PARTITIONS,
+    bytecode_mode: str = LAYER_BYTECODE_MODE,
+    optimization_level: int = LAYER_OPTIMIZATION_LEVEL,
+):
+    """
+    Deploy the layer for every architecture used by the Lambda functions,
+    see ``config.env.lambda_function_architectures``.
 
-        if do_we_publish_lambda_layer(
-            is_ci_runtime=IS_CI,
-            branch_name=GIT_BRANCH_NAME,
-            is_layer_branch=IS_LAYER_BRANCH,
-        ):
-            upload_lambda_layer_artifacts()
-            publish_lambda_layer()
-            logger.info(f"{Emoji.succeeded} Deploy Lambda layer succeeded!")
-        else:
-            return
+    :param n_partitions: split the dependencies into how many layers.
+    :param bytecode_mode: see :data:`LAYER_BYTECODE_MODE`.
+    :param optimization_level: see :data:`LAYER_OPTIMIZATION_LEVEL`.
+    """
+    try:
+        _try_poetry_export()
+        for architecture in config.env.lambda_architectures:
+            logger.info(f"deploy Lambda layer for {architecture}")
+            with logger.nested():
+                if n_partitions > 1:
+                    deploy_partitioned_lambda_layers(
+                        n_partitions,
+                        architecture,
+                        bytecode_mode=bytecode_mode,
+                        optimization_level=optimization_level,
+                    )
+                else:
+                    deploy_single_lambda_layer(
+                        architecture,
+                        bytecode_mode=bytecode_mode,
+                        optimization_level=optimization_level,
+                    )
     except Exception as e:
         logger.error(f"{Emoji.failed} Deploy Lambda layer failed!")
         # in CI, post the error message to the PR comment if possible
@@ -370,35 +743,457 @@ def deploy_lambda_layer():
         raise e
 
 
+def deploy_partitioned_lambda_layers(
+    n_partitions: int,
+    architecture: str = LambdaArchitectureEnum.x86_64,
+    bytecode_mode: str = LAYER_BYTECODE_MODE,
+    optimization_level: int = LAYER_OPTIMIZATION_LEVEL,
+) -> T.List[str]:
+    """
+    Split the dependencies into ``n_partitions`` layers by dependency churn,
+    build and publish only the partitions that changed.
+
+    :return: the layer version ARN list of all partitions, the most stable first.
+    """
+    if (
+        _do_we_build_lambda_layer(
+            is_ci_runtime=IS_CI,
+            branch_name=GIT_BRANCH_NAME,
+            is_layer_branch=IS_LAYER_BRANCH,
+        )
+        is False
+    ):
+        return []
+    is_publish = do_we_publish_lambda_layer(
+        is_ci_runtime=IS_CI,
+        branch_name=GIT_BRANCH_NAME,
+        is_layer_branch=IS_LAYER_BRANCH,
+    )
+
+    _try_poetry_export()
+    churn = get_churn(get_poetry_lock_history())
+    partitions = partition_requirements(
+        requirements=parse_requirements(path_requirements_main),
+        churn=churn,
+        n_partitions=n_partitions,
+    )
+    layer_arns = list()
+    for partition, requirements in enumerate(partitions, start=1):
+        if len(requirements) == 0:
+            continue
+        layer = get_lambda_layer_partition(partition, requirements, architecture)
+        logger.info(
+            f"partition {partition}: {len(requirements)} packages, "
+            f"layer {layer.layer_name!r}"
+        )
+        if is_current_layer_the_same_as_latest_one(layer):
+            layer_version_arn = get_latest_lambda_layer_arn(layer)
+            if layer_version_arn is not None:
+                logger.info(
+                    f"{Emoji.red_circle} dependencies are not changed, "
+                    f"keep using {layer_version_arn}",
+                    indent=1,
+                )
+                layer_arns.append(layer_version_arn)
+                continue
+            # the requirements file matches, but the fingerprint index has no
+            # layer version, for example, the layer was published before the
+            # index existed. The partition has to be in the manifest, so
+            # rebuild and publish it
+            logger.info(
+                "dependencies are not changed, but the layer version ARN "
+                "is unknown, rebuild it",
+                indent=1,
+            )
+        if is_publish:
+            layer_version_arn = reuse_lambda_layer(layer)
+            if layer_version_arn is not None:
+                layer_arns.append(layer_version_arn)
+                continue
+
+        build_lambda_layer_artifacts(
+            layer=layer,
+            bytecode_mode=bytecode_mode,
+            optimization_level=optimization_level,
+        )
+        if is_publish:
+            upload_lambda_layer_artifacts(layer=layer)
+            layer_arns.append(publish_lambda_layer(layer=layer))
+
+    if is_publish:
+        write_manifest(layer_arns, architecture)
+        logger.info(f"{Emoji.succeeded} Deploy {len(layer_arns)} Lambda layers succeeded!")
+    return layer_arns
+
+
+def get_lambda_layer_arns(
+    n_partitions: int = N_LAYER_PARTITIONS,
+    architecture: str = LambdaArchitectureEnum.x86_64,
+) -> T.List[str]:
+    """
+    :return: the latest layer version ARN list to attach to the Lambda
+        functions of the given architecture.
+    """
+    if n_partitions > 1:
+        return read_manifest(architecture)
+    layer_version_arn = get_latest_lambda_layer_arn(
+        get_default_lambda_layer(architecture)
+    )
+    if layer_version_arn is None:
+        return []
+    return [layer_version_arn]
+
+
 # ------------------------------------------------------------------------------
 # Lambda Function related
 # ------------------------------------------------------------------------------
-def run_update_chalice_config_script():
+USE_DIRECT_VENDOR_STAGING = True
+"""
+If True, sync the source code to the ``lambda_app/vendor`` folder directly,
+and build and upload the source artifacts in the background. Otherwise,
+extract the ``poetry build`` sdist to the ``lambda_app/vendor`` folder first.
+"""
+
+USE_CONFIG_SNAPSHOT = True
+"""
+If True, bake the non-sensitive config of the target env into the
+deployment package, the Lambda function creates the config from it without
+any API call, and reads the secrets from the parameter store on the first
+access, see :mod:`aws_lambda_python_example.config.snapshot`.
+"""
+
+USE_CODE_ONLY_UPDATE = True
+"""
+If True, when only the application code changed, update the code of the
+affected Lambda functions directly instead of running ``chalice deploy``,
+see :func:`get_code_only_update_plan`.
+"""
+
+MAX_DIRECT_UPLOAD_ZIP_SIZE = 50 * 1024 * 1024
+"""
+The ``update_function_code`` API only accepts a zip file up to 50 MB.
+"""
+
+
+def run_update_chalice_config_script(
+    n_partitions: int = N_LAYER_PARTITIONS,
+):
     """
     cmd: ``./.venv/bin/python lambda_app/update_chalice_config.py``
+
+    The latest layer version ARN list of each architecture is passed to the
+    script via the ``LAMBDA_LAYER_ARNS_${ARCHITECTURE}`` environment variable,
+    comma separated, for example ``LAMBDA_LAYER_ARNS_X86_64``.
+
+    :param n_partitions: the same value used by :func:`deploy_lambda_layer`.
     """
     args = [
         f"{bin_python}",
         f"{path_update_chalice_config_script}",
     ]
-    subprocess.run(args, check=True)
+    env = os.environ.copy()
+    for architecture in config.env.lambda_architectures:
+        layer_arns = get_lambda_layer_arns(
+            n_partitions=n_partitions,
+            architecture=architecture,
+        )
+        for layer_arn in layer_arns:
+            if layer_arn.split(":")[3] != bsm.aws_region:
+                raise ValueError(
+                    f"layer {layer_arn!r} is not in {bsm.aws_region!r}, "
+                    f"a function can only use the layer in the same region!"
+                )
+        if layer_arns:
+            env[f"LAMBDA_LAYER_ARNS_{architecture.upper()}"] = ",".join(layer_arns)
+    subprocess.run(args, env=env, check=True)
+
+
+def update_lambda_function_architectures(env_name: str):
+    """
+    AWS Chalice doesn't support the Lambda function architecture yet. After
+    ``chalice deploy``, redeploy the code of the functions that are not on
+    the architecture defined in ``config.env.lambda_function_architectures``,
+    with the right architecture.
+    """
+    for func_name, architecture in config.env.lambda_function_architectures.items():
+        func_fullname = f"{config.env.chalice_app_name}-{env_name}-{func_name}"
+        try:
+            response = bsm.lambda_client.get_function(FunctionName=func_fullname)
+        except bsm.lambda_client.exceptions.ResourceNotFoundException:
+            continue
+        if response["Configuration"].get("Architectures", ["x86_64"]) == [
+            architecture
+        ]:
+            continue
+        logger.info(f"switch {func_fullname!r} to {architecture}", indent=1)
+        with urllib.request.urlopen(response["Code"]["Location"]) as f:
+            zip_file = f.read()
+        bsm.lambda_client.update_function_code(
+            FunctionName=func_fullname,
+            ZipFile=zip_file,
+            Architectures=[architecture],
+        )
+        bsm.lambda_client.get_waiter("function_updated").wait(
+            FunctionName=func_fullname,
+        )
+
+
+def enable_report_batch_item_failures(env_name: str):
+    """
+    AWS Chalice doesn't support the partial batch response of the SQS event
+    source yet. After ``chalice deploy``, turn on ``ReportBatchItemFailures``
+    of the SQS event source mapping of the batched functions, otherwise
+    the ``batchItemFailures`` in the response is ignored, and the failed
+    messages are deleted from the queue.
+    """
+    for func_name in [config.env.func_name_s3sync_batch]:
+        func_fullname = f"{config.env.chalice_app_name}-{env_name}-{func_name}"
+        response = bsm.lambda_client.list_event_source_mappings(
+            FunctionName=func_fullname,
+        )
+        for mapping in response.get("EventSourceMappings", []):
+            if "ReportBatchItemFailures" in mapping.get("FunctionResponseTypes", []):
+                continue
+            logger.info(
+                f"turn on ReportBatchItemFailures of {func_fullname!r}", indent=1
+            )
+            bsm.lambda_client.update_event_source_mapping(
+                UUID=mapping["UUID"],
+                FunctionResponseTypes=["ReportBatchItemFailures"],
+            )
+
+
+def _get_deployed_stage(env_name: str) -> str:
+    """
+    The name of the deployed JSON files on S3. The deployment in a non default
+    region has its own files, so the deployments of the same env in
+    different regions don't overwrite each other.
+    """
+    if bsm.aws_region == DEFAULT_AWS_REGION:
+        return env_name
+    return f"{env_name}.{bsm.aws_region}"
+
+
+def get_config_snapshot_digest(env_name: str = CURRENT_ENV) -> str:
+    """
+    The sha256 digest of the config snapshot baked into the deployment
+    package, see :func:`bake_config_snapshot`.
+
+    In CI, the config is loaded from the parameter store instead of the
+    local ``config.json`` file, so we hash the loaded config, a change only
+    made in the parameter store changes the lambda function hash too.
+    """
+    snapshot = create_snapshot(config, env_name)
+    return sha256_of_bytes(json.dumps(snapshot, sort_keys=True).encode("utf-8"))
+
+
+def _get_lambda_function_digests(index: HashIndex) -> T.Dict[str, str]:
+    """
+    :return: the sha256 digests of the lambda related source code files,
+        only the files changed since the last run are rehashed.
+    """
+    paths = sorted(dir_python_lib.glob("**/*.py"), key=lambda x: str(x))
+    paths.append(path_app_py)
+    paths.append(path_chalice_config)
+    digests, _ = index.update(dir_project_root, paths)
+    if USE_CONFIG_SNAPSHOT:  # the config is baked into the deployment package
+        relpath = path_lambda_app_config_snapshot_json.relative_to(dir_project_root)
+        digests[relpath.as_posix()] = get_config_snapshot_digest()
+    return digests
 
 
 def get_lambda_function_hash() -> str:
     """
     Scan lambda related source code, calculate the lambda code hash.
 
-    :return: a sha256 hash value represent the local lambda source code
+    It uses a persistent stat cache, see :mod:`automation.hash_index`.
+
+    :return: a sha256 hash value represent the local lambda source code,
+        it is the Merkle root of the per-file digests.
     """
-    # python library
-    hashes = list()
-    for path in sorted(dir_python_lib.glob("**/*.py"), key=lambda x: str(x)):
-        hashes.append(sha256_of_bytes(path.read_bytes()))
-    # the app.py
-    hashes.append(sha256_of_bytes(path_app_py.read_bytes()))
-    # the config.json
-    hashes.append(sha256_of_bytes(path_chalice_config.read_bytes()))
-    return sha256_of_bytes("".join(hashes).encode("utf-8"))
+    index = HashIndex.read(path_lambda_source_hash_index)
+    digests = _get_lambda_function_digests(index)
+    index.write()
+    return get_merkle_root(digests)
+
+
+def get_deployed_file_digests(
+    env_name: str,
+    lambda_function_hash: str,
+) -> T.Optional[T.Dict[str, str]]:
+    """
+    :return: the per-file digests of the deployed lambda source code from
+        S3, None if it is never recorded or it is not the snapshot of the
+        given lambda function hash.
+    """
+    s3path = config.env.get_s3path_deployed_file_digests_json(
+        _get_deployed_stage(env_name)
+    )
+    if s3path.exists() is False:
+        return None
+    data = json.loads(s3path.read_text())
+    if data.get("lambda_function_hash") != lambda_function_hash:
+        return None
+    return data["digests"]
+
+
+def upload_deployed_file_digests(
+    env_name: str,
+    lambda_function_hash: str,
+    digests: T.Dict[str, str],
+) -> S3Path:
+    s3path = config.env.get_s3path_deployed_file_digests_json(
+        _get_deployed_stage(env_name)
+    )
+    s3path.write_text(
+        json.dumps(
+            {"lambda_function_hash": lambda_function_hash, "digests": digests},
+            indent=4,
+        ),
+        content_type="application/json",
+    )
+    return s3path
+
+
+def snapshot_lambda_function_hash(env_name: str) -> str:
+    """
+    Remember the per-file digests of the current lambda source code, call
+    it after a successful deployment, so the next deployment can tell which
+    files changed. The snapshot is stored in the local index and on S3,
+    the local index doesn't survive between CI jobs.
+
+    :return: the lambda function hash.
+    """
+    index = HashIndex.read(path_lambda_source_hash_index)
+    digests = _get_lambda_function_digests(index)
+    lambda_function_hash = index.add_snapshot(digests)
+    index.write()
+    upload_deployed_file_digests(env_name, lambda_function_hash, digests)
+    return lambda_function_hash
+
+
+def get_lambda_function_changes(
+    env_name: str,
+    deployed_lambda_function_hash: str,
+) -> T.Optional[FileChanges]:
+    """
+    :return: the changed files since the deployed lambda function hash,
+        None if neither the local index nor S3 has the snapshot of that hash.
+    """
+    index = HashIndex.read(path_lambda_source_hash_index)
+    digests = _get_lambda_function_digests(index)
+    index.write()
+    changes = index.get_changes(deployed_lambda_function_hash, digests)
+    if changes is not None:
+        return changes
+    deployed_digests = get_deployed_file_digests(
+        env_name, deployed_lambda_function_hash
+    )
+    if deployed_digests is None:
+        return None
+    return FileChanges.diff(deployed_digests, digests)
+
+
+def get_lambda_function_closures() -> T.Dict[str, T.List[Path]]:
+    """
+    Find the source files that each Lambda function depends on, by the
+    static import graph from its handler in ``app.py``, see
+    :mod:`automation.import_graph`.
+
+    :return: Lambda function short name to source files mapping.
+    """
+    handlers, shared_modules = parse_app(path_app_py)
+    closures = dict()
+    for handler in handlers:
+        if handler.name is None:
+            name = getattr(config.env, handler.name_attr)
+        else:
+            name = handler.name
+        modules = get_module_closure(
+            dir_project_root,
+            pyproject.package_name,
+            shared_modules | handler.modules,
+        )
+        paths = sorted(modules.values(), key=lambda x: str(x))
+        paths.append(path_app_py)
+        paths.append(path_chalice_config)
+        if USE_CONFIG_SNAPSHOT:
+            paths.append(path_lambda_app_config_snapshot_json)
+        closures[name] = paths
+    return closures
+
+
+def get_lambda_function_hashes() -> T.Dict[str, str]:
+    """
+    :return: Lambda function short name to code closure hash mapping, the hash
+        is the Merkle root of the source files in the code closure.
+    """
+    index = HashIndex.read(path_lambda_source_hash_index)
+    digests = _get_lambda_function_digests(index)
+    index.write()
+    lambda_function_hashes = dict()
+    for name, paths in get_lambda_function_closures().items():
+        relpaths = [path.relative_to(dir_project_root).as_posix() for path in paths]
+        lambda_function_hashes[name] = get_merkle_root(
+            {relpath: digests[relpath] for relpath in relpaths}
+        )
+    return lambda_function_hashes
+
+
+def get_deployed_lambda_function_hashes(env_name: str) -> T.Optional[T.Dict[str, str]]:
+    """
+    :return: the code closure hash of each deployed Lambda function, None
+        if it is never recorded.
+    """
+    s3path = config.env.get_s3path_deployed_function_hashes_json(
+        _get_deployed_stage(env_name)
+    )
+    if s3path.exists():
+        return json.loads(s3path.read_text())
+    else:
+        return None
+
+
+def upload_deployed_function_hashes(
+    env_name: str,
+    lambda_function_hashes: T.Dict[str, str],
+) -> S3Path:
+    s3path = config.env.get_s3path_deployed_function_hashes_json(
+        _get_deployed_stage(env_name)
+    )
+    s3path.write_text(
+        json.dumps(lambda_function_hashes, indent=4),
+        content_type="application/json",
+    )
+    return s3path
+
+
+def get_changed_lambda_functions(
+    env_name: str,
+    lambda_function_hashes: T.Dict[str, str],
+) -> T.List[str]:
+    """
+    :return: the Lambda functions that the code closure changed since the
+        last deployment, all of them if the deployed hashes are unknown.
+    """
+    deployed = get_deployed_lambda_function_hashes(env_name)
+    if deployed is None:
+        return list(lambda_function_hashes)
+    return [
+        name
+        for name, lambda_function_hash in lambda_function_hashes.items()
+        if deployed.get(name) != lambda_function_hash
+    ]
+
+
+def get_deployed_lambda_function_hash(env_name: str) -> T.Optional[str]:
+    s3path_deployed_json = config.env.get_s3path_deployed_json(
+        _get_deployed_stage(env_name)
+    )
+    if s3path_deployed_json.exists():
+        return s3path_deployed_json.metadata.get("lambda_function_hash")
+    else:
+        return None
 
 
 def is_current_lambda_the_same_as_deployed_one(lambda_function_hash: str) -> bool:
@@ -408,28 +1203,50 @@ def is_current_lambda_the_same_as_deployed_one(lambda_function_hash: str) -> boo
 
     :param lambda_function_hash: a sha256 hash value represent the local lambda source code
     """
-    s3path_deployed_json = config.env.get_s3path_deployed_json(CURRENT_ENV)
-    if s3path_deployed_json.exists():
-        return (
-            lambda_function_hash
-            == s3path_deployed_json.metadata["lambda_function_hash"]
-        )
-    else:
-        return False
+    return lambda_function_hash == get_deployed_lambda_function_hash(CURRENT_ENV)
 
 
 def do_we_deploy_lambda_based_on_hash(lambda_function_hash: str) -> bool:
     """
     :param lambda_function_hash: a sha256 hash value represent the local lambda source code
     """
-    if is_current_lambda_the_same_as_deployed_one(lambda_function_hash):
+    deployed_lambda_function_hash = get_deployed_lambda_function_hash(CURRENT_ENV)
+    if lambda_function_hash == deployed_lambda_function_hash:
         logger.info(
             f"{Emoji.red_circle} don't deploy lambda app, "
             f"the local lambda source code is the same as the deployed one.",
         )
         return False
-    else:
-        return True
+
+    if deployed_lambda_function_hash is not None:
+        changes = get_lambda_function_changes(
+            CURRENT_ENV, deployed_lambda_function_hash
+        )
+        if changes is not None:
+            logger.info(
+                f"{changes.n_changes} files changed since the last deployment"
+            )
+            for label, relpaths in [
+                ("added", changes.added),
+                ("removed", changes.removed),
+                ("modified", changes.modified),
+            ]:
+                for relpath in relpaths:
+                    logger.info(f"{label}: {relpath}", indent=1)
+
+    # a change outside any function's code closure doesn't need a deployment
+    lambda_function_hashes = get_lambda_function_hashes()
+    changed_functions = get_changed_lambda_functions(
+        CURRENT_ENV, lambda_function_hashes
+    )
+    if not changed_functions:
+        logger.info(
+            f"{Emoji.red_circle} don't deploy lambda app, "
+            f"the code closure of all lambda functions are the same as the deployed one.",
+        )
+        return False
+    logger.info(f"affected lambda functions: {', '.join(changed_functions)}")
+    return True
 
 
 @logger.block(
@@ -463,6 +1280,116 @@ def build_lambda_source_artifacts():
     logger.info("done", indent=1)
 
 
+def upload_lambda_source_artifacts() -> S3Path:
+    s3dir_lambda_source = config.env.get_s3dir_lambda_source(__version__)
+    logger.info(f"upload source artifacts to {s3dir_lambda_source.uri}")
+    logger.info(f"preview at: {s3dir_lambda_source.console_url}", indent=1)
+    s3dir_lambda_source.upload_dir(
+        local_dir=f"{dir_dist}",
+        overwrite=True,
+    )
+    return s3dir_lambda_source
+
+
+def extract_lambda_source_artifacts():
+    """
+    Extract the ``poetry build`` sdist, and move the source code to the
+    ``lambda_app/vendor`` folder.
+    """
+    path_tar: T.Optional[Path] = None
+    for p in dir_dist.iterdir():
+        if p.name.endswith(".tar.gz"):
+            path_tar = p
+    if path_tar is None:
+        raise FileNotFoundError
+
+    # extract .tar.gz file
+    logger.info("move source artifacts to vendor folder")
+    extracted_folder_name = path_tar.name.replace(".tar.gz", "")
+    dir_extracted_folder = dir_lambda_app / extracted_folder_name
+    shutil.rmtree(dir_extracted_folder, ignore_errors=True)
+    subprocess.run(
+        [
+            "tar",
+            "-xzf",
+            f"{path_tar}",
+            "-C",
+            f"{dir_lambda_app}",
+        ],
+        check=True,
+    )
+
+    # move source code to vendor
+    shutil.rmtree(f"{dir_lambda_app_vendor}", ignore_errors=True)
+    dir_lambda_app_vendor.mkdir(parents=True, exist_ok=True)
+    before_dir = dir_extracted_folder / pyproject.package_name
+    after_dir = dir_lambda_app_vendor / pyproject.package_name
+    shutil.move(f"{before_dir}", f"{after_dir}")
+
+    logger.info("done", indent=1)
+
+
+def stage_lambda_source_artifacts(hardlink: bool = False):
+    """
+    Sync the source code to the ``lambda_app/vendor`` folder directly, it
+    skips the ``poetry build``, extract and move round trip, and only
+    copies the changed files.
+
+    :param hardlink: hardlink the files instead of copying them.
+    """
+    dir_vendor_package = dir_lambda_app_vendor / pyproject.package_name
+    logger.info(f"sync source code to {dir_vendor_package}")
+    result = sync_dir(dir_python_lib, dir_vendor_package, hardlink=hardlink)
+    logger.info(
+        f"{len(result.copied)} copied, {len(result.removed)} removed, "
+        f"{len(result.unchanged)} unchanged",
+        indent=1,
+    )
+
+
+def bake_config_snapshot(env_name: str, enabled: bool = USE_CONFIG_SNAPSHOT):
+    """
+    Write the config snapshot of the target env to the ``lambda_app/vendor``
+    folder, or remove the old one if it is disabled.
+
+    :param enabled: see :data:`USE_CONFIG_SNAPSHOT`.
+    """
+    if enabled:
+        logger.info(f"bake config snapshot of {env_name!r} env")
+        snapshot = create_snapshot(config, env_name)
+        dir_lambda_app_vendor.mkdir(parents=True, exist_ok=True)
+        write_snapshot(f"{path_lambda_app_config_snapshot_json}", snapshot)
+        logger.info(
+            f"secret fields loaded at runtime: {', '.join(snapshot['secret_keys'])}",
+            indent=1,
+        )
+    elif path_lambda_app_config_snapshot_json.exists():
+        path_lambda_app_config_snapshot_json.unlink()
+
+
+def _build_and_upload_lambda_source_artifacts() -> S3Path:
+    """
+    The silent version of :func:`build_lambda_source_artifacts` and
+    :func:`upload_lambda_source_artifacts`, it runs in a background thread
+    during the deployment, so it doesn't change the current directory
+    or write logs.
+    """
+    shutil.rmtree(f"{dir_dist}", ignore_errors=True)
+    _try_poetry_export()
+    subprocess.run(
+        ["poetry", "build"],
+        cwd=f"{dir_project_root}",
+        check=True,
+        capture_output=True,
+    )
+    s3dir_lambda_source = config.env.get_s3dir_lambda_source(__version__)
+    s3dir_lambda_source.upload_dir(
+        local_dir=f"{dir_dist}",
+        overwrite=True,
+    )
+    return s3dir_lambda_source
+
+
 def download_deployed_json(env_name: str) -> bool:
     """
     AWS Chalice use JSON file to store the deployed resource information.
@@ -472,7 +1399,9 @@ def download_deployed_json(env_name: str) -> bool:
     """
     logger.info(f"download existing deployed {env_name}.json file")
     path_deployed_json = dir_lambda_app_deployed / f"{env_name}.json"
-    s3path_deployed_json = config.env.s3dir_deployed / f"{env_name}.json"
+    s3path_deployed_json = config.env.get_s3path_deployed_json(
+        _get_deployed_stage(env_name)
+    )
 
     # pull the existing deployed json file from s3
     if s3path_deployed_json.exists():
@@ -506,9 +1435,11 @@ def upload_deployed_json(
     """
     logger.info(f"upload the deployed {env_name}.json file")
     path_deployed_json = dir_lambda_app_deployed / f"{env_name}.json"
-    s3path_deployed_json = config.env.get_s3path_deployed_json(env_name)
+    s3path_deployed_json = config.env.get_s3path_deployed_json(
+        _get_deployed_stage(env_name)
+    )
     s3path_deployed_json_backup = config.env.get_s3path_deployed_json_backup(
-        CURRENT_ENV
+        _get_deployed_stage(env_name)
     )
 
     if path_deployed_json.exists():
@@ -551,49 +1482,12 @@ def run_chalice_deploy(
     lambda_function_hash: str,
 ):
     """
-    Deploy lambda app using chalice.
+    Deploy lambda app using chalice. The source code has to be in the
+    ``lambda_app/vendor`` folder already.
 
     :param lambda_function_hash: a sha256 hash value represent the local lambda source code
     """
-    path_tar: T.Optional[Path] = None
-    for p in dir_dist.iterdir():
-        if p.name.endswith(".tar.gz"):
-            path_tar = p
-    if path_tar is None:
-        raise FileNotFoundError
-
     s3dir_lambda_source = config.env.get_s3dir_lambda_source(__version__)
-    logger.info(f"upload source artifacts to {s3dir_lambda_source.uri}")
-    logger.info(f"preview at: {s3dir_lambda_source.console_url}", indent=1)
-    s3dir_lambda_source.upload_dir(
-        local_dir=f"{dir_dist}",
-        overwrite=True,
-    )
-
-    # extract .tar.gz file
-    logger.info("move source artifacts to vendor folder")
-    extracted_folder_name = path_tar.name.replace(".tar.gz", "")
-    dir_extracted_folder = dir_lambda_app / extracted_folder_name
-    shutil.rmtree(dir_extracted_folder, ignore_errors=True)
-    subprocess.run(
-        [
-            "tar",
-            "-xzf",
-            f"{path_tar}",
-            "-C",
-            f"{dir_lambda_app}",
-        ],
-        check=True,
-    )
-
-    # move source code to vendor
-    shutil.rmtree(f"{dir_lambda_app_vendor}", ignore_errors=True)
-    dir_lambda_app_vendor.mkdir(parents=True, exist_ok=True)
-    before_dir = dir_extracted_folder / pyproject.package_name
-    after_dir = dir_lambda_app_vendor / pyproject.package_name
-    shutil.move(f"{before_dir}", f"{after_dir}")
-
-    logger.info("done", indent=1)
 
     # download existing deployed json file, if possible
     download_deployed_json(env_name)
@@ -627,11 +1521,17 @@ def run_chalice_deploy(
     )
     logger.info(f"preview all deployed function at {lambda_func_prefix_console_url}")
 
+    # set the function architecture
+    update_lambda_function_architectures(env_name)
+    enable_report_batch_item_failures(env_name)
+
     # update the deployed JSON file
     s3path_deployed_json = upload_deployed_json(
         env_name,
         lambda_function_hash=lambda_function_hash,
     )
+    snapshot_lambda_function_hash(env_name)
+    upload_deployed_function_hashes(env_name, get_lambda_function_hashes())
 
     # in CI, post the deployed Lambda Function console url to the PR comment if possible
     if IS_CI:
@@ -654,6 +1554,160 @@ def run_chalice_deploy(
             )
 
 
+def get_code_only_update_plan(env_name: str) -> T.Optional[T.Dict[str, str]]:
+    """
+    Check if the deployment only changes the application code. It is true
+    when we know the files changed since the last deployment, the ``app.py``
+    and the ``.chalice/config.json`` (which has the layers) didn't change,
+    and the deployed functions are the same as the functions in ``app.py``.
+
+    :return: the Lambda function short name to ARN mapping of the functions
+        that the code closure changed, None if we need a full
+        ``chalice deploy``.
+    """
+    deployed_lambda_function_hash = get_deployed_lambda_function_hash(env_name)
+    if deployed_lambda_function_hash in [None, "deleted"]:
+        logger.info("the lambda app is not deployed yet", indent=1)
+        return None
+
+    changes = get_lambda_function_changes(env_name, deployed_lambda_function_hash)
+    if changes is None:
+        logger.info("don't know the files changed since the last deployment", indent=1)
+        return None
+    changed = set(changes.added + changes.removed + changes.modified)
+    for path in [path_app_py, path_chalice_config]:
+        relpath = path.relative_to(dir_project_root).as_posix()
+        if relpath in changed:
+            logger.info(f"{relpath} changed", indent=1)
+            return None
+
+    s3path_deployed_json = config.env.get_s3path_deployed_json(
+        _get_deployed_stage(env_name)
+    )
+    deployed_lambda_arns = {
+        resource["name"]: resource["lambda_arn"]
+        for resource in json.loads(s3path_deployed_json.read_text())["resources"]
+        if resource["resource_type"] == "lambda_function"
+    }
+    lambda_function_hashes = get_lambda_function_hashes()
+    if set(deployed_lambda_arns) != set(lambda_function_hashes):
+        logger.info("the lambda functions changed", indent=1)
+        return None
+
+    return {
+        name: deployed_lambda_arns[name]
+        for name in get_changed_lambda_functions(env_name, lambda_function_hashes)
+    }
+
+
+def build_lambda_deployment_package() -> bytes:
+    """
+    Build the same deployment package as ``chalice deploy`` in memory, the
+    chalice runtime files ``chalice/__init__.py`` and ``chalice/app.py``
+    from the installed chalice, the ``app.py`` and the ``vendor`` folder
+    content at the root. The dependencies are in the Lambda layers.
+    """
+    # chalice's packager always adds these two files, see
+    # ``chalice.deploy.packager.BaseLambdaDeploymentPackager._iter_app_filenames``
+    import chalice
+    import chalice.app
+
+    members = [
+        (Path(chalice.app.__file__), "chalice/app.py"),
+        (Path(chalice.__file__), "chalice/__init__.py"),
+        (path_app_py, "app.py"),
+    ]
+    for dir_root, prefix in [
+        (dir_lambda_app_vendor, ""),
+        (dir_lambda_app / "chalicelib", "chalicelib/"),
+    ]:
+        for dirpath, dirnames, filenames in os.walk(dir_root):
+            dirnames[:] = [name for name in dirnames if name != "__pycache__"]
+            for filename in filenames:
+                if filename.endswith(".pyc"):
+                    continue
+                path = Path(dirpath, filename)
+                members.append((path, prefix + path.relative_to(dir_root).as_posix()))
+    return zip_to_bytes(members)
+
+
+@logger.block(
+    msg="Run Code Only Update",
+    start_emoji=f"{Emoji.deploy} {Emoji.awslambda}",
+    end_emoji=Emoji.deploy,
+    pipe=Emoji.awslambda,
+)
+def run_code_only_update(
+    env_name: str,
+    lambda_function_hash: str,
+    lambda_arns: T.Dict[str, str],
+    zip_file: bytes,
+):
+    """
+    Update the code of the given Lambda functions concurrently, with one
+    deployment package, then wait for all updates to finish.
+
+    :param lambda_function_hash: a sha256 hash value represent the local lambda source code
+    :param lambda_arns: the Lambda function short name to ARN mapping.
+    :param zip_file: the deployment package, see :func:`build_lambda_deployment_package`.
+    """
+    logger.info(f"deployment package size = {len(zip_file)} bytes")
+
+    def update(name: str, lambda_arn: str):
+        architecture = config.env.lambda_function_architectures.get(
+            name, LambdaArchitectureEnum.x86_64
+        )
+        bsm.lambda_client.update_function_code(
+            FunctionName=lambda_arn,
+            ZipFile=zip_file,
+            Architectures=[architecture],
+        )
+        bsm.lambda_client.get_waiter("function_updated").wait(
+            FunctionName=lambda_arn,
+        )
+
+    logger.info(f"update function code: {', '.join(lambda_arns) or 'nothing'}")
+    run_concurrently(
+        [
+            lambda name=name, lambda_arn=lambda_arn: update(name, lambda_arn)
+            for name, lambda_arn in lambda_arns.items()
+        ]
+    )
+    logger.info("done", indent=1)
+
+    # update the deployed JSON file
+    download_deployed_json(env_name)
+    upload_deployed_json(
+        env_name,
+        lambda_function_hash=lambda_function_hash,
+    )
+    snapshot_lambda_function_hash(env_name)
+    upload_deployed_function_hashes(env_name, get_lambda_function_hashes())
+
+
+def _run_deploy(
+    env_name: str,
+    lambda_function_hash: str,
+    code_only: bool,
+):
+    """
+    Use the code only update if possible, otherwise run ``chalice deploy``.
+    """
+    if code_only:
+        logger.info("check if we can do code only update")
+        lambda_arns = get_code_only_update_plan(env_name)
+        if lambda_arns is not None:
+            zip_file = build_lambda_deployment_package()
+            if len(zip_file) <= MAX_DIRECT_UPLOAD_ZIP_SIZE:
+                run_code_only_update(
+                    env_name, lambda_function_hash, lambda_arns, zip_file
+                )
+                return
+            logger.info("the deployment package is too large", indent=1)
+        logger.info("fall back to 'chalice deploy'", indent=1)
+    run_chalice_deploy(env_name, lambda_function_hash)
+
+
 @logger.block(
     msg="Deploy Lambda App with Chalice",
     start_emoji=f"{Emoji.deploy} {Emoji.awslambda}",
@@ -663,7 +1717,18 @@ def run_chalice_deploy(
 def deploy_lambda_app(
     env_name: str = CURRENT_ENV,
     check: bool = True,
+    direct_staging: bool = USE_DIRECT_VENDOR_STAGING,
+    code_only: bool = USE_CODE_ONLY_UPDATE,
+    config_snapshot: bool = USE_CONFIG_SNAPSHOT,
+    n_partitions: int = N_LAYER_PARTITIONS,
 ):
+    """
+    :param direct_staging: see :data:`USE_DIRECT_VENDOR_STAGING`.
+    :param code_only: see :data:`USE_CODE_ONLY_UPDATE`.
+    :param config_snapshot: see :data:`USE_CONFIG_SNAPSHOT`.
+    :param n_partitions: the number of layer partitions, the same value
+        used by :func:`deploy_lambda_layer`, see :data:`N_LAYER_PARTITIONS`.
+    """
     try:
         if check:
             if (
@@ -678,14 +1743,32 @@ def deploy_lambda_app(
                 is False
             ):
                 return
-        run_update_chalice_config_script()
+        run_update_chalice_config_script(n_partitions=n_partitions)
         lambda_function_hash = get_lambda_function_hash()
         if check:
             if do_we_deploy_lambda_based_on_hash(lambda_function_hash) is False:
                 return
         with logger.nested():
-            build_lambda_source_artifacts()
-            run_chalice_deploy(env_name, lambda_function_hash)
+            if direct_staging:
+                stage_lambda_source_artifacts()
+                bake_config_snapshot(env_name, enabled=config_snapshot)
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    future = executor.submit(
+                        _build_and_upload_lambda_source_artifacts
+                    )
+                    _run_deploy(env_name, lambda_function_hash, code_only)
+                    logger.info("wait for the source artifacts upload ...")
+                    s3dir_lambda_source = future.result()
+                logger.info(
+                    f"uploaded source artifacts to {s3dir_lambda_source.uri}",
+                    indent=1,
+                )
+            else:
+                build_lambda_source_artifacts()
+                upload_lambda_source_artifacts()
+                extract_lambda_source_artifacts()
+                bake_config_snapshot(env_name, enabled=config_snapshot)
+                _run_deploy(env_name, lambda_function_hash, code_only)
         logger.info(f"{Emoji.succeeded} Deploy Lambda app succeeded!")
     except Exception as e:
         logger.error(f"{Emoji.failed} Deploy Lambda app failed!")
@@ -756,6 +1839,12 @@ def run_chalice_delete(env_name: str):
     s3path_deployed_json = upload_deployed_json(
         env_name, lambda_function_hash="deleted"
     )
+    config.env.get_s3path_deployed_function_hashes_json(
+        _get_deployed_stage(env_name)
+    ).delete_if_exists()
+    config.env.get_s3path_deployed_file_digests_json(
+        _get_deployed_stage(env_name)
+    ).delete_if_exists()
 
     if IS_CI:
         comment_id = os.environ.get("CI_DATA_COMMENT_ID", "")
@@ -785,6 +1874,7 @@ def run_chalice_delete(env_name: str):
 def delete_lambda_app(
     env_name: str = CURRENT_ENV,
     check: bool = True,
+    n_partitions: int = N_LAYER_PARTITIONS,
 ):
     try:
         if check:
@@ -798,7 +1888,7 @@ def delete_lambda_app(
                 is False
             ):
                 return
-        run_update_chalice_config_script()
+        run_update_chalice_config_script(n_partitions=n_partitions)
         with logger.nested():
             run_chalice_delete(env_name)
         logger.info(f"{Emoji.succeeded} Delete Lambda app succeeded!")
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+"""
+Lambda layer requirements fingerprint index.
+
+Every published layer version is tagged with a normalized fingerprint of
+its ``requirements.txt``. A small JSON index object on S3 maps fingerprint
+to layer version, so that:
+
+- checking "is the current requirements the same as the latest layer"
+    is one small S3 read.
+- if the current requirements is identical to an older layer version,
+    we reuse it instead of publishing a duplicate.
+
+The content of the index object looks like::
+
+    {
+        "latest": "fingerprint-of-the-latest-layer",
+        "fingerprints": {
+            "fingerprint-of-the-latest-layer": {
+                "layer_version": 3,
+                "layer_version_arn": "arn:aws:lambda:us-east-1:111122223333:layer:my_layer:3"
+            },
+            ...
+        }
+    }
+"""
+
+import typing as T
+import json
+import dataclasses
+from pathlib import Path
+
+from s3pathlib import S3Path
+
+from .helpers import sha256_of_bytes
+from .pip_requirements import parse_requirements
+
+
+def get_requirements_fingerprint(path_requirements: Path) -> str:
+    """
+    The sha256 of the sorted ``name==version`` pins. It ignores comments,
+    line order, line continuation and ``--hash=...`` options, so the same
+    dependencies always have the same fingerprint.
+    """
+    pins = sorted(
+        f"{requirement.name}=={requirement.version}"
+        for requirement in parse_requirements(path_requirements)
+    )
+    return sha256_of_bytes("\n".join(pins).encode("utf-8"))
+
+
+@dataclasses.dataclass
+class LayerIndex:
+    """
+    The in-memory representation of the layer fingerprint index object.
+    """
+
+    latest: T.Optional[str] = dataclasses.field(default=None)
+    fingerprints: T.Dict[str, T.Dict[str, T.Any]] = dataclasses.field(
+        default_factory=dict
+    )
+
+    @classmethod
+    def read(cls, s3path: S3Path) -> "LayerIndex":
+        """
+        Read the index from S3, return an empty index if it doesn't exist yet.
+        """
+        if s3path.exists() is False:
+            return cls()
+        data = json.loads(s3path.read_text())
+        return cls(
+            latest=data.get("latest"),
+            fingerprints=data.get("fingerprints", dict()),
+        )
+
+    def write(self, s3path: S3Path):
+        s3path.write_text(
+            json.dumps(
+                {
+                    "latest": self.latest,
+                    "fingerprints": self.fingerprints,
+                },
+                indent=4,
+            ),
+            content_type="application/json",
+        )
+
+    def get(self, fingerprint: str) -> T.Optional[T.Dict[str, T.Any]]:
+        return self.fingerprints.get(fingerprint)
+
+    def add(
+        self,
+        fingerprint: str,
+        layer_version: int,
+        layer_version_arn: str,
+    ):
+        """
+        Record a published layer version, and mark it as the latest.
+        """
+        self.fingerprints[fingerprint] = dict(
+            layer_version=layer_version,
+            layer_version_arn=layer_version_arn,
+        )
+        self.latest = fingerprint
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+"""
+Split the dependencies into multiple Lambda layers by dependency churn.
+
+If everything in ``requirements-main.txt`` goes into one layer, bumping one
+small library rebuilds and republishes the whole layer. Instead, we look at
+the history of ``poetry.lock`` in git, count how many times each package
+version changed, and put the packages into up to N layers:
+
+- partition 1: the packages that never changed in the history window,
+    usually the heavy, stable native packages.
+- partition 2: the packages that changed once.
+- ...
+- partition N: the packages that changed N - 1 times or more, usually the
+    fast-moving pure Python packages.
+
+Each partition is built, fingerprinted and published as an independent layer,
+so a version bump only republishes the partition it belongs to.
+
+.. note::
+
+    AWS Lambda allows at most 5 layers per function.
+"""
+
+import typing as T
+import json
+import subprocess
+from pathlib import Path
+
+import tomli
+
+from aws_lambda_python_example.config.init import config
+from aws_lambda_python_example.config.define import LambdaArchitectureEnum
+
+from .paths import path_poetry_lock
+from .lbd_layer import LambdaLayer, get_layer_aws_region, get_dir_build_lambda
+from .pip_requirements import Requirement, normalize_name
+
+MAX_LAYERS_PER_FUNCTION = 5
+
+
+def parse_poetry_lock(content: str) -> T.Dict[str, str]:
+    """
+    :return: normalized package name to version mapping.
+    """
+    data = tomli.loads(content)
+    return {
+        normalize_name(package["name"]): package["version"]
+        for package in data.get("package", [])
+    }
+
+
+def get_poetry_lock_history(
+    path: Path = path_poetry_lock,
+    max_commits: int = 20,
+) -> T.List[T.Dict[str, str]]:
+    """
+    Get the package versions in the current ``poetry.lock`` file and in the
+    last ``max_commits`` git commits that changed it, newest first.
+    """
+    history = [parse_poetry_lock(path.read_text())]
+    res = subprocess.run(
+        ["git", "log", f"-n{max_commits}", "--format=%H", "--", path.name],
+        cwd=f"{path.parent}",
+        capture_output=True,
+    )
+    if res.returncode != 0:  # not a git repo
+        return history
+    for commit in res.stdout.decode("utf-8").split():
+        res = subprocess.run(
+            ["git", "show", f"{commit}:./{path.name}"],
+            cwd=f"{path.parent}",
+            capture_output=True,
+        )
+        if res.returncode == 0:
+            history.append(parse_poetry_lock(res.stdout.decode("utf-8")))
+    return history
+
+
+def get_churn(history: T.List[T.Dict[str, str]]) -> T.Dict[str, int]:
+    """
+    Count how many times each package version changed between two
+    consecutive ``poetry.lock`` snapshots.
+    """
+    churn = {name: 0 for name in history[0]} if history else dict()
+    for newer, older in zip(history, history[1:]):
+        for name, version in newer.items():
+            if name in older and older[name] != version:
+                churn[name] = churn.get(name, 0) + 1
+    return churn
+
+
+def partition_requirements(
+    requirements: T.List[Requirement],
+    churn: T.Dict[str, int],
+    n_partitions: int,
+) -> T.List[T.List[Requirement]]:
+    """
+    Put the requirements into ``n_partitions`` groups, the most stable first.
+    """
+    if not (1 <= n_partitions <= MAX_LAYERS_PER_FUNCTION):
+        raise ValueError(
+            f"n_partitions has to be between 1 and {MAX_LAYERS_PER_FUNCTION}!"
+        )
+    partitions = [list() for _ in range(n_partitions)]
+    for requirement in requirements:
+        ith = min(churn.get(requirement.name, 0), n_partitions - 1)
+        partitions[ith].append(requirement)
+    return partitions
+
+
+def get_lambda_layer_partition(
+    partition: int,
+    requirements: T.List[Requirement],
+    architecture: str = LambdaArchitectureEnum.x86_64,
+) -> LambdaLayer:
+    """
+    Create the :class:`~automation.lbd_layer.LambdaLayer` of a partition and
+    write its ``requirements.txt`` file.
+
+    :param partition: the 1-based partition number.
+    """
+    dir_build = get_dir_build_lambda(architecture) / "partitions" / f"p{partition}"
+    dir_build.mkdir(parents=True, exist_ok=True)
+    path_requirements = dir_build / "requirements.txt"
+    path_requirements.write_text(
+        "\n".join(requirement.line for requirement in requirements) + "\n"
+    )
+    s3dir_partition = config.env.get_s3dir_lambda_layer_partition(
+        partition, architecture, get_layer_aws_region()
+    )
+    return LambdaLayer(
+        layer_name=config.env.get_lambda_layer_partition_name(partition, architecture),
+        path_requirements=path_requirements,
+        dir_build=dir_build,
+        s3dir_tmp=s3dir_partition.joinpath("tmp").to_dir(),
+        s3dir_versions=s3dir_partition,
+        s3path_index=s3dir_partition.joinpath("index.json"),
+        architecture=architecture,
+    )
+
+
+def write_manifest(
+    layer_arns: T.List[str],
+    architecture: str = LambdaArchitectureEnum.x86_64,
+):
+    """
+    Record the layer version ARN list of the latest partitioned layer deployment,
+    :func:`automation.lbd.run_update_chalice_config_script` reads it to
+    attach the layers to the Lambda functions.
+    """
+    s3path = config.env.get_s3path_lambda_layer_partitions_manifest(
+        architecture, get_layer_aws_region()
+    )
+    s3path.write_text(
+        json.dumps({"layers": layer_arns}, indent=4),
+        content_type="application/json",
+    )
+
+
+def read_manifest(
+    architecture: str = LambdaArchitectureEnum.x86_64,
+) -> T.List[str]:
+    """
+    :return: the layer version ARN list, empty list if the manifest doesn't
+        exist yet.
+    """
+    s3path = config.env.get_s3path_lambda_layer_partitions_manifest(
+        architecture, get_layer_aws_region()
+    )
+    if s3path.exists() is False:
+        return []
+    return json.loads(s3path.read_text())["layers"]
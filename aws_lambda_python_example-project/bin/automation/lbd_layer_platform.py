@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+"""
+Resolve the wheels for the AWS Lambda runtime platform, instead of the
+platform of the build environment.
+
+By default, ``pip install`` picks the wheels for the machine it runs on. If
+you build the layer on a Mac, the native libraries won't work in AWS Lambda,
+which is an Amazon Linux based container. With a target platform, pip only
+accepts the ``manylinux`` wheels that the Lambda runtime can load, using
+the ``--platform``, ``--implementation``, ``--python-version`` and
+``--only-binary=:all:`` options. So you can build a valid layer anywhere.
+
+A package that doesn't have a matching wheel (sdist only) can't be built
+this way, the build fails before installing anything.
+
+Ref:
+
+- pip download: https://pip.pypa.io/en/stable/cli/pip_download/
+- Lambda runtimes: https://docs.aws.amazon.com/lambda/latest/dg/lambda-runtimes.html
+"""
+
+import typing as T
+import dataclasses
+
+
+@dataclasses.dataclass
+class LambdaTargetPlatform:
+    """
+    :param python_version: the Lambda runtime Python version, for example ``3.8``.
+    :param architecture: the Lambda function architecture, ``x86_64`` or ``arm64``.
+    :param glibc_version: the ``(major, minor)`` glibc version of the Lambda
+        runtime Amazon Linux. Amazon Linux 2 ships glibc 2.26.
+    """
+
+    python_version: str = dataclasses.field()
+    architecture: str = dataclasses.field(default="x86_64")
+    glibc_version: T.Tuple[int, int] = dataclasses.field(default=(2, 26))
+
+    @property
+    def machine(self) -> str:
+        """
+        The machine name used in the wheel platform tag.
+        """
+        return {"x86_64": "x86_64", "arm64": "aarch64"}[self.architecture]
+
+    @property
+    def platform_tag(self) -> str:
+        """
+        The most specific platform tag, for example ``manylinux_2_26_x86_64``.
+        It is used as the build cache and wheelhouse key.
+        """
+        major, minor = self.glibc_version
+        return f"manylinux_{major}_{minor}_{self.machine}"
+
+    @property
+    def platform_tags(self) -> T.List[str]:
+        """
+        All ``manylinux`` platform tags the Lambda runtime can load. pip
+        expands the legacy ``manylinux2014`` tag to ``manylinux2010``
+        and ``manylinux1`` by itself.
+        """
+        major, minor = self.glibc_version
+        tags = [
+            f"manylinux_{major}_{minor_}_{self.machine}"
+            for minor_ in range(minor, 16, -1)
+        ]
+        tags.append(f"manylinux2014_{self.machine}")
+        return tags
+
+    def get_pip_args(self) -> T.List[str]:
+        """
+        The ``pip install`` / ``pip download`` arguments to only accept the
+        wheels for this platform.
+        """
+        args = list()
+        for tag in self.platform_tags:
+            args.extend(["--platform", tag])
+        args.extend(
+            [
+                "--implementation",
+                "cp",
+                "--python-version",
+                self.python_version,
+                "--only-binary=:all:",
+            ]
+        )
+        return args
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""
+Parse the pinned ``requirements-***.txt`` files exported by ``poetry export``.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import re
+import dataclasses
+from pathlib import Path
+
+
+@dataclasses.dataclass
+class Requirement:
+    """
+    A pinned requirement entry in the exported ``requirements-***.txt`` file.
+
+    :param name: the normalized distribution name, see
+        https://peps.python.org/pep-0503/#normalized-names
+    :param version: the pinned version
+    :param line: the full requirement entry, including environment markers and
+        ``--hash=...`` options, so we can install it with exactly the same
+        constraints as the original requirements file.
+    """
+
+    name: str = dataclasses.field()
+    version: str = dataclasses.field()
+    line: str = dataclasses.field()
+
+    @property
+    def basename(self) -> str:
+        return f"{self.name}-{self.version}.zip"
+
+
+_normalize_name_pattern = re.compile(r"[-_.]+")
+_pinned_requirement_pattern = re.compile(
+    r"^(?P<name>[A-Za-z0-9][A-Za-z0-9._\-]*)(\[[^\]]*\])?\s*==\s*(?P<version>[^\s;\\]+)"
+)
+
+
+def normalize_name(name: str) -> str:
+    return _normalize_name_pattern.sub("-", name).lower()
+
+
+def parse_requirements(path: Path) -> T.List[Requirement]:
+    """
+    Parse the ``requirements.txt`` file exported by ``poetry export``. It looks like::
+
+        attrs==21.4.0 ; python_version >= "3.8" and python_version < "3.9" \\
+            --hash=sha256:2d27e3784d7a565d36ab851fe94887c5eccd6a463168875832a1be79c82828b4 \\
+            --hash=sha256:626ba8234211db98e869df76230a137c4c40a12d72445c45d5f5b716f076e2fd
+
+    Only pinned (``==``) requirements are cacheable, anything else raises an error.
+    """
+    lines = list()
+    buffer = list()
+    for line in path.read_text().splitlines():
+        line = line.strip()
+        if line.endswith("\\"):
+            buffer.append(line[:-1].strip())
+            continue
+        buffer.append(line)
+        lines.append(" ".join(token for token in buffer if token))
+        buffer = list()
+    if buffer:
+        lines.append(" ".join(token for token in buffer if token))
+
+    requirements = list()
+    for line in lines:
+        if (not line) or line.startswith("#") or line.startswith("-"):
+            continue
+        match = _pinned_requirement_pattern.match(line)
+        if match is None:
+            raise ValueError(
+                f"requirement {line!r} is not pinned, "
+                f"only pinned requirements are supported!"
+            )
+        requirements.append(
+            Requirement(
+                name=normalize_name(match.group("name")),
+                version=match.group("version"),
+                line=line,
+            )
+        )
+    return requirements
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+
+"""
+A parallel, deterministic zip writer.
+
+The system ``zip`` CLI compresses members one by one, and it stores the file
+modification time and permission bits, so building the same content twice
+gives two different zip files. This writer:
+
+- compresses the members on a thread pool (``zlib`` releases the GIL),
+- writes the entries in sorted order,
+- uses a fixed timestamp (1980-01-01 00:00:00) and normalized permissions
+    (``0o755`` for executable files, ``0o644`` for the rest).
+
+So the same input always produces byte-for-byte identical output.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import io
+import os
+import stat
+import zlib
+import struct
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# the earliest timestamp that zip format supports, 1980-01-01 00:00:00
+_DOS_TIME = 0
+_DOS_DATE = (0 << 9) | (1 << 5) | 1
+
+_METHOD_STORED = 0
+_METHOD_DEFLATED = 8
+
+_FLAG_UTF8 = 0x800
+_VERSION = 20
+_VERSION_ZIP64 = 45
+_VERSION_MADE_BY = (3 << 8) | _VERSION  # 3 = unix
+
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP64_COUNT_LIMIT = 0xFFFF
+
+
+def _compress(
+    path: Path,
+    compresslevel: int,
+) -> T.Tuple[bytes, int, int, int, int]:
+    """
+    Read and compress one file.
+
+    :return: (payload, method, crc32, uncompressed size, unix mode)
+    """
+    data = path.read_bytes()
+    crc = zlib.crc32(data)
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    if os.stat(path).st_mode & stat.S_IXUSR:
+        mode = stat.S_IFREG | 0o755
+    else:
+        mode = stat.S_IFREG | 0o644
+    if len(compressed) < len(data):
+        return compressed, _METHOD_DEFLATED, crc, len(data), mode
+    else:
+        return data, _METHOD_STORED, crc, len(data), mode
+
+
+def write_zip_to_fileobj(
+    f: T.BinaryIO,
+    members: T.Iterable[T.Tuple[Path, str]],
+    compresslevel: int = 9,
+    max_workers: T.Optional[int] = None,
+) -> int:
+    """
+    Write a deterministic zip archive to a binary file object.
+
+    :param f: the output binary file object.
+    :param members: list of ``(path on local file system, archive name)`` pairs.
+        Archive names use ``/`` as separator. Directories are not stored,
+        they are implied by the file archive names.
+    :param compresslevel: the deflate compression level, 0 - 9.
+    :param max_workers: number of threads to compress the members.
+
+    :return: number of entries written.
+    """
+    members = sorted(members, key=lambda x: x[1])
+    central_directory = list()
+    offset = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # executor.map yields in submission order, so the entry order
+        # doesn't depend on which thread finishes first
+        results = pool.map(
+            lambda member: _compress(member[0], compresslevel),
+            members,
+        )
+        for (_, arcname), (payload, method, crc, size, mode) in zip(members, results):
+            name = arcname.encode("utf-8")
+            if offset > _ZIP64_LIMIT or size > _ZIP64_LIMIT:
+                raise ValueError("the zip file is too large, more than 4 GiB!")
+            local_header = struct.pack(
+                "<IHHHHHIIIHH",
+                0x04034B50,
+                _VERSION,
+                _FLAG_UTF8,
+                method,
+                _DOS_TIME,
+                _DOS_DATE,
+                crc,
+                len(payload),
+                size,
+                len(name),
+                0,
+            )
+            f.write(local_header)
+            f.write(name)
+            f.write(payload)
+            central_directory.append(
+                struct.pack(
+                    "<IHHHHHHIIIHHHHHII",
+                    0x02014B50,
+                    _VERSION_MADE_BY,
+                    _VERSION,
+                    _FLAG_UTF8,
+                    method,
+                    _DOS_TIME,
+                    _DOS_DATE,
+                    crc,
+                    len(payload),
+                    size,
+                    len(name),
+                    0,
+                    0,
+                    0,
+                    0,
+                    mode << 16,
+                    offset,
+                )
+                + name
+            )
+            offset += len(local_header) + len(name) + len(payload)
+
+        cd_offset = offset
+        cd_data = b"".join(central_directory)
+        f.write(cd_data)
+        count = len(central_directory)
+
+        if count > _ZIP64_COUNT_LIMIT or cd_offset > _ZIP64_LIMIT:
+            zip64_eocd_offset = cd_offset + len(cd_data)
+            f.write(
+                struct.pack(
+                    "<IQHHIIQQQQ",
+                    0x06064B50,
+                    44,
+                    _VERSION_MADE_BY,
+                    _VERSION_ZIP64,
+                    0,
+                    0,
+                    count,
+                    count,
+                    len(cd_data),
+                    cd_offset,
+                )
+            )
+            f.write(struct.pack("<IIQI", 0x07064B50, 0, zip64_eocd_offset, 1))
+        f.write(
+            struct.pack(
+                "<IHHHHIIH",
+                0x06054B50,
+                0,
+                0,
+                min(count, _ZIP64_COUNT_LIMIT),
+                min(count, _ZIP64_COUNT_LIMIT),
+                len(cd_data),
+                min(cd_offset, _ZIP64_LIMIT),
+                0,
+            )
+        )
+    return count
+
+
+def write_zip(
+    path_zip: Path,
+    members: T.Iterable[T.Tuple[Path, str]],
+    compresslevel: int = 9,
+    max_workers: T.Optional[int] = None,
+) -> int:
+    """
+    Create a deterministic zip file, see :func:`write_zip_to_fileobj`.
+
+    :param path_zip: the output zip file path.
+
+    :return: number of entries written.
+    """
+    path_tmp = path_zip.parent / f"{path_zip.name}.tmp"
+    with path_tmp.open("wb") as f:
+        count = write_zip_to_fileobj(
+            f,
+            members=members,
+            compresslevel=compresslevel,
+            max_workers=max_workers,
+        )
+    path_tmp.replace(path_zip)
+    return count
+
+
+def zip_to_bytes(
+    members: T.Iterable[T.Tuple[Path, str]],
+    compresslevel: int = 9,
+    max_workers: T.Optional[int] = None,
+) -> bytes:
+    """
+    Create a deterministic zip archive in memory, see :func:`write_zip_to_fileobj`.
+    """
+    buffer = io.BytesIO()
+    write_zip_to_fileobj(
+        buffer,
+        members=members,
+        compresslevel=compresslevel,
+        max_workers=max_workers,
+    )
+    return buffer.getvalue()
+
+
+def write_dir_zip(
+    dir_root: Path,
+    path_zip: Path,
+    prefix: str = "",
+    exclude: T.Optional[T.Callable[[str], bool]] = None,
+    compresslevel: int = 9,
+    max_workers: T.Optional[int] = None,
+) -> int:
+    """
+    Zip all files in a directory recursively.
+
+    :param dir_root: the directory to zip.
+    :param path_zip: the output zip file path.
+    :param prefix: the archive name prefix, for example ``python/``.
+    :param exclude: a function that takes an archive name and returns True
+        if the file should be excluded.
+
+    :return: number of entries written.
+    """
+    members = list()
+    for dirpath, dirnames, filenames in os.walk(dir_root):
+        for filename in filenames:
+            path = Path(dirpath, filename)
+            arcname = prefix + path.relative_to(dir_root).as_posix()
+            if exclude is not None and exclude(arcname):
+                continue
+            members.append((path, arcname))
+    return write_zip(
+        path_zip=path_zip,
+        members=members,
+        compresslevel=compresslevel,
+        max_workers=max_workers,
+    )
@@ -0,0 +1,6 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from automation.deps import prefetch_wheelhouse
+
+prefetch_wheelhouse()
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+"""
+Usage::
+
+    python bin/s05_6_multi_target_deploy.py dev:us-east-1 dev:us-west-2 --max-workers 2
+"""
+
+import sys
+import argparse
+
+from automation.multi_deploy import DeployTarget, deploy_targets
+
+parser = argparse.ArgumentParser()
+parser.add_argument("targets", nargs="+", help="${env_name}:${aws_region}")
+parser.add_argument("--max-workers", type=int, default=4)
+args = parser.parse_args()
+
+results = deploy_targets(
+    targets=[DeployTarget.parse(s) for s in args.targets],
+    max_workers=args.max_workers,
+)
+if not all(result.succeeded for result in results):
+    sys.exit(1)
@@ -14,17 +14,35 @@ about Lambda Function.
     to access sensitive data from lambda function, please use parameter store.
 """
 
+import typing as T
+import os
 import json
 from aws_lambda_python_example._version import __version__
 from aws_lambda_python_example.paths import path_chalice_config
 from aws_lambda_python_example.config.init import config
-from aws_lambda_python_example.config.define import EnvEnum
+from aws_lambda_python_example.config.define import EnvEnum, LambdaArchitectureEnum
 from aws_lambda_python_example.iac.output import StackDoesntExist, Output
 
 stages = dict()
 
 current_env = config.get_current_env()
 
+
+def get_layers(architecture: str) -> T.Optional[T.List[str]]:
+    """
+    The deployment script passes the latest layer version ARN list of each
+    architecture, see ``automation.lbd.run_update_chalice_config_script``.
+    """
+    value = os.environ.get(f"LAMBDA_LAYER_ARNS_{architecture.upper()}")
+    if value:
+        return value.split(",")
+    return None
+
+
+layers = get_layers(LambdaArchitectureEnum.x86_64) or [
+    "arn:aws:lambda:us-east-1:111122223333:layer:aws_lambda_python_example:2",
+]
+
 lambda_functions = {
     config.env.func_name_hello: {
         "lambda_memory_size": 128,
@@ -34,16 +52,32 @@ lambda_functions = {
         "lambda_memory_size": 128,
         "lambda_timeout": 30,
     },
+    # copies up to 10 objects concurrently, the s3sync SQS queue visibility
+    # timeout has to be at least the function timeout
+    config.env.func_name_s3sync_batch: {
+        "lambda_memory_size": 256,
+        "lambda_timeout": 60,
+    },
 }
 
+# the functions that don't run on x86_64 use the layer of their architecture,
+# the x86_64 layer has incompatible native wheels, so never fall back to it
+for func_name, architecture in config.env.lambda_function_architectures.items():
+    if architecture != LambdaArchitectureEnum.x86_64:
+        func_layers = get_layers(architecture)
+        if func_layers is None:
+            raise ValueError(
+                f"no {architecture} Lambda layer for the {func_name!r} function, "
+                f"please deploy the layer first!"
+            )
+        lambda_functions[func_name]["layers"] = func_layers
+
 try:
     output = Output.get(EnvEnum.dev)
     stages[EnvEnum.dev] = {
         "iam_role_arn": output.iam_role_lambda_arn,
         "manage_iam_role": False,
-        "layers": [
-            "arn:aws:lambda:us-east-1:111122223333:layer:aws_lambda_python_example:2",
-        ],
+        "layers": layers,
         "environment_variables": {
             "PARAMETER_NAME": config.dev.parameter_name,
             "PROJECT_NAME": config.dev.project_name,
@@ -66,9 +100,7 @@ try:
     stages[EnvEnum.int] = {
         "iam_role_arn": output.iam_role_lambda_arn,
         "manage_iam_role": False,
-        "layers": [
-            "arn:aws:lambda:us-east-1:111122223333:layer:aws_lambda_python_example:2",
-        ],
+        "layers": layers,
         "environment_variables": {
             "PARAMETER_NAME": config.int.parameter_name,
             "PROJECT_NAME": config.int.project_name,
@@ -91,9 +123,7 @@ try:
     stages[EnvEnum.prod] = {
         "iam_role_arn": output.iam_role_lambda_arn,
         "manage_iam_role": False,
-        "layers": [
-            "arn:aws:lambda:us-east-1:111122223333:layer:aws_lambda_python_example:2",
-        ],
+        "layers": layers,
         "environment_variables": {
             "PARAMETER_NAME": config.prod.parameter_name,
             "PROJECT_NAME": config.prod.project_name,
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+"""
+The ``automation`` package is in the ``bin`` folder, it is not installed.
+"""
+
+import sys
+
+from aws_lambda_python_example.paths import dir_project_root
+
+sys.path.insert(0, f"{dir_project_root.joinpath('bin')}")
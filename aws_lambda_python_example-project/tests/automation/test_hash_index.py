@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+
+from automation.hash_index import get_merkle_root, FileChanges, HashIndex
+
+
+def test_get_merkle_root():
+    digests = {"a.py": "1", "b.py": "2", "c.py": "3"}
+    root = get_merkle_root(digests)
+    assert get_merkle_root(dict(reversed(list(digests.items())))) == root
+    assert get_merkle_root({"a.py": "1", "b.py": "2", "c.py": "4"}) != root
+    # renaming a file changes the root too
+    assert get_merkle_root({"a.py": "1", "b.py": "2", "d.py": "3"}) != root
+    assert get_merkle_root(dict()) != root
+
+
+def test_file_changes():
+    changes = FileChanges.diff(
+        before={"a.py": "1", "b.py": "2", "c.py": "3"},
+        after={"a.py": "1", "b.py": "4", "d.py": "5"},
+    )
+    assert changes.added == ["d.py"]
+    assert changes.removed == ["c.py"]
+    assert changes.modified == ["b.py"]
+    assert changes.n_changes == 3
+
+
+def test_hash_index(tmp_path: Path):
+    dir_root = tmp_path / "project"
+    dir_root.mkdir()
+    path_a = dir_root / "a.py"
+    path_b = dir_root / "b.py"
+    path_a.write_text("a = 1")
+    path_b.write_text("b = 1")
+    path_index = tmp_path / "index.json"
+
+    index = HashIndex.read(path_index)
+    assert index.entries == dict()
+    digests, rehashed = index.update(dir_root, [path_a, path_b])
+    assert rehashed == ["a.py", "b.py"]
+    root = index.add_snapshot(digests)
+    assert root == get_merkle_root(digests)
+    index.write()
+
+    # only the changed file is rehashed
+    index = HashIndex.read(path_index)
+    path_b.write_text("b = 2")
+    new_digests, rehashed = index.update(dir_root, [path_a, path_b])
+    assert rehashed == ["b.py"]
+    assert new_digests["a.py"] == digests["a.py"]
+    changes = index.get_changes(root, new_digests)
+    assert changes.modified == ["b.py"]
+    assert index.get_changes("unknown", new_digests) is None
+
+    # only the latest snapshots are kept
+    for i in range(3):
+        index.add_snapshot({"a.py": str(i)}, max_snapshots=2)
+    assert len(index.snapshots) == 2
+    assert root not in index.snapshots
+
+    # a corrupted index file is an empty index
+    path_index.write_text("not json")
+    assert HashIndex.read(path_index).entries == dict()
+
+
+if __name__ == "__main__":
+    from aws_lambda_python_example.tests import run_cov_test
+
+    run_cov_test(__file__, "automation.hash_index")
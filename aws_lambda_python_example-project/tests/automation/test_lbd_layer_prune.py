@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+
+from automation.lbd_layer_prune import LayerPruneConfig, prune_layer
+
+
+def test_prune_layer(tmp_path: Path):
+    files = [
+        "tests/__init__.py",
+        "six.py",
+        "six-1.16.0.dist-info/METADATA",
+        "six-1.16.0.dist-info/RECORD",
+        "six-1.16.0.dist-info/LICENSE",
+        "six-1.16.0.dist-info/licenses/COPYING.txt",
+        "pandas/__init__.py",
+        "pandas/__init__.pyi",
+        "pandas/__pycache__/__init__.cpython-311.pyc",
+        "pandas/tests/test_frame.py",
+        "pandas/io/formats/doc/__init__.py",
+        "botocore/docs/__init__.py",
+    ]
+    for file in files:
+        path = tmp_path.joinpath(file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+
+    prune_layer(tmp_path, LayerPruneConfig(strip_shared_objects=False))
+    remaining = sorted(
+        path.relative_to(tmp_path).as_posix()
+        for path in tmp_path.rglob("*")
+        if path.is_file()
+    )
+    assert remaining == [
+        "botocore/docs/__init__.py",
+        "pandas/__init__.py",
+        "pandas/io/formats/doc/__init__.py",
+        "six-1.16.0.dist-info/LICENSE",
+        "six-1.16.0.dist-info/METADATA",
+        "six-1.16.0.dist-info/licenses/COPYING.txt",
+        "six.py",
+    ]
+
+
+if __name__ == "__main__":
+    from aws_lambda_python_example.tests import run_cov_test
+
+    run_cov_test(__file__, "automation.lbd_layer_prune")
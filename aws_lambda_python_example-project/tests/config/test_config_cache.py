@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import json
+from datetime import datetime
+
+from aws_lambda_python_example.config import cache
+from aws_lambda_python_example.config.cache import (
+    load_parameter_data,
+    clear_cache,
+)
+
+
+class SsmClient:
+    def __init__(self):
+        self.version = 1
+        self.calls = list()
+
+    def get_parameter(self, Name: str, WithDecryption: bool = False):
+        self.calls.append(WithDecryption)
+        return {
+            "Parameter": {
+                "Name": Name,
+                "Type": "SecureString",
+                "Value": json.dumps({"version": self.version}),
+                "Version": self.version,
+                "LastModifiedDate": datetime.utcnow(),
+                "DataType": "text",
+                "ARN": "",
+            }
+        }
+
+
+def test_load_parameter_data():
+    name = "/my-project/dev"
+    ssm_client = SsmClient()
+
+    # first call, fetch the body
+    data = load_parameter_data(ssm_client, name, ttl=60, now=0)
+    assert data == {"version": 1}
+    assert ssm_client.calls == [True]
+
+    # within the TTL, no API call
+    assert load_parameter_data(ssm_client, name, ttl=60, now=30) is data
+    assert ssm_client.calls == [True]
+
+    # after the TTL, same version, only check the version
+    assert load_parameter_data(ssm_client, name, ttl=60, now=70) is data
+    assert ssm_client.calls == [True, False]
+
+    # after the TTL, new version, fetch the body again
+    ssm_client.version = 2
+    data = load_parameter_data(ssm_client, name, ttl=60, now=140)
+    assert data == {"version": 2}
+    assert ssm_client.calls == [True, False, False, True]
+
+    # the cache is disabled
+    assert load_parameter_data(ssm_client, name, ttl=0, now=150) == data
+    assert len(ssm_client.calls) == 5
+
+    # a new execution environment, nothing is cached
+    clear_cache(name)
+    assert name not in cache._memory_cache
+    assert load_parameter_data(ssm_client, name, ttl=60, now=150) == data
+    assert ssm_client.calls[-1] is True
+
+
+if __name__ == "__main__":
+    from aws_lambda_python_example.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_lambda_python_example.config.cache")
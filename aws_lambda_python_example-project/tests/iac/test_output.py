@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+from aws_lambda_python_example.iac import output as output_module
+from aws_lambda_python_example.iac.output import Output
+from aws_lambda_python_example.lazy import LazyProxy, is_resolved
+
+
+def test_get(tmp_path, monkeypatch):
+    monkeypatch.setattr(output_module, "dir_stack_output_cache", tmp_path)
+    calls = list()
+
+    def _get_from_stack(env_name: str) -> Output:
+        calls.append(env_name)
+        return Output(iam_role_lambda_arn=f"arn:{env_name}")
+
+    monkeypatch.setattr(Output, "_get_from_stack", _get_from_stack)
+    Output.clear_cache("dev")
+
+    # lazy, no call until the first attribute access
+    stack_output = LazyProxy(lambda: Output.get("dev"))
+    assert len(calls) == 0
+    assert stack_output.iam_role_lambda_arn == "arn:dev"
+    assert is_resolved(stack_output)
+    assert calls == ["dev"]
+
+    # memoized
+    assert Output.get("dev").iam_role_lambda_arn == "arn:dev"
+    assert calls == ["dev"]
+
+    # local file cache, for example a new process
+    output_module._memory_cache.clear()
+    assert Output.get("dev").iam_role_lambda_arn == "arn:dev"
+    assert calls == ["dev"]
+
+    # expired
+    output_module._memory_cache.clear()
+    assert Output.get("dev", ttl=0).iam_role_lambda_arn == "arn:dev"
+    assert calls == ["dev", "dev"]
+
+    Output.clear_cache("dev")
+    assert Output.get("dev").iam_role_lambda_arn == "arn:dev"
+    assert calls == ["dev", "dev", "dev"]
+    Output.clear_cache("dev")
+
+
+if __name__ == "__main__":
+    from aws_lambda_python_example.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_lambda_python_example.iac.output")
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import moto
+import pynamodb_mate as pm
+from boto_session_manager import BotoSesManager
+
+from aws_lambda_python_example import idempotency
+from aws_lambda_python_example.idempotency import LRUCache, IdempotencyStore
+
+TABLE_NAME = "idempotency"
+
+
+def test_lru_cache():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is the least recently used now
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+    cache.remove("a")
+    assert cache.get("a") is None
+
+
+def test_is_completed_in_cache():
+    store = IdempotencyStore(table_name=TABLE_NAME)
+    store.lru_cache.put("k", 100)
+    assert store.is_completed_in_cache("k", now=99) is True
+    assert store.is_completed_in_cache("k", now=100) is False
+    assert store.lru_cache.get("k") is None
+    # a cached completed key is a duplicate, no DynamoDB call
+    store.lru_cache.put("k", 2**40)
+    assert store.claim("k") is False
+
+
+@pytest.fixture
+def mock_table(monkeypatch):
+    for key in ["AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"]:
+        monkeypatch.setenv(key, "testing")
+    monkeypatch.delenv("AWS_PROFILE", raising=False)
+    with moto.mock_dynamodb():
+        bsm = BotoSesManager(region_name="us-east-1")
+        bsm.dynamodb_client.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "pk", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        monkeypatch.setattr(idempotency, "bsm", bsm)
+        monkeypatch.setattr(
+            idempotency,
+            "pynamodb_connection",
+            pm.Connection(region=bsm.aws_region),
+        )
+        yield
+
+
+def get_status(store: IdempotencyStore, key: str) -> str:
+    return store.model_class.get(key).status
+
+
+def test_claim_complete_release(mock_table):
+    store = IdempotencyStore(table_name=TABLE_NAME)
+
+    # the second claim of an in progress key fails
+    assert store.claim("k1") is True
+    assert get_status(store, "k1") == idempotency.StatusEnum.in_progress
+    assert store.claim("k1") is False
+
+    # a completed key is a duplicate, also for a cold LRU cache
+    store.complete("k1")
+    assert get_status(store, "k1") == idempotency.StatusEnum.completed
+    assert store.lru_cache.get("k1") is not None
+    store.lru_cache.remove("k1")
+    assert store.claim("k1") is False
+
+    # a released key can be claimed again
+    assert store.claim("k2") is True
+    store.release("k2")
+    assert store.model_class.count("k2") == 0
+    assert store.claim("k2") is True
+
+    # release doesn't remove a completed key
+    store.release("k1")
+    assert get_status(store, "k1") == idempotency.StatusEnum.completed
+
+    # an expired claim, for example the handler timed out, can be claimed
+    expired_store = IdempotencyStore(table_name=TABLE_NAME, in_progress_ttl=-10)
+    assert expired_store.claim("k3") is True
+    assert expired_store.claim("k3") is True
+
+
+def test_run(mock_table):
+    store = IdempotencyStore(table_name=TABLE_NAME)
+    calls = list()
+
+    def func():
+        calls.append(1)
+        return "ok"
+
+    assert store.run("k1", func) == (True, "ok")
+    assert store.run("k1", func) == (False, None)
+    assert len(calls) == 1
+
+    def fail():
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        store.run("k2", fail)
+    assert store.run("k2", func) == (True, "ok")
+    assert len(calls) == 2
+
+
+if __name__ == "__main__":
+    from aws_lambda_python_example.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_lambda_python_example.idempotency")
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+from aws_lambda_python_example.metric import create_metric, UnitEnum
+
+
+def test_create_metric():
+    record = create_metric(
+        name="skipped_bytes",
+        value=100,
+        unit=UnitEnum.bytes,
+        dimensions={"FunctionName": "s3sync"},
+        namespace="my_project",
+        timestamp=1,
+    )
+    assert record == {
+        "_aws": {
+            "Timestamp": 1,
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": "my_project",
+                    "Dimensions": [["FunctionName"]],
+                    "Metrics": [{"Name": "skipped_bytes", "Unit": "Bytes"}],
+                }
+            ],
+        },
+        "skipped_bytes": 100,
+        "FunctionName": "s3sync",
+    }
+
+
+if __name__ == "__main__":
+    from aws_lambda_python_example.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_lambda_python_example.metric")
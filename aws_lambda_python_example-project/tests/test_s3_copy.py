@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+import boto3
+import moto
+
+from aws_lambda_python_example.s3_copy import (
+    MB,
+    GB,
+    MAX_PARTS,
+    SOURCE_ETAG_METADATA_KEY,
+    CopyMethodEnum,
+    get_checksum_algorithm,
+    head_object,
+    is_identical,
+    copy_object,
+    get_part_size,
+    get_part_ranges,
+)
+
+
+def test_get_checksum_algorithm():
+    assert get_checksum_algorithm({"ChecksumSHA256": "abc"}) == "SHA256"
+    assert get_checksum_algorithm({"ChecksumCRC32C": "abc"}) == "CRC32C"
+    assert get_checksum_algorithm({"ETag": "abc"}) is None
+
+
+def test_get_part_size():
+    assert get_part_size(1 * GB) == 64 * MB
+    assert get_part_size(1 * GB, part_size=1 * MB) == 5 * MB
+    size = 1024 * GB
+    part_size = get_part_size(size)
+    assert part_size % MB == 0
+    assert part_size * MAX_PARTS >= size
+    assert get_part_size(1 * MB, part_size=10 * GB) == 5 * GB
+
+
+def test_get_part_ranges():
+    assert get_part_ranges(10, 5) == [(1, 0, 4), (2, 5, 9)]
+    assert get_part_ranges(11, 5) == [(1, 0, 4), (2, 5, 9), (3, 10, 10)]
+    part_ranges = get_part_ranges(12 * MB + 1, 5 * MB)
+    assert len(part_ranges) == 3
+    assert part_ranges[-1][2] == 12 * MB
+
+
+def test_is_identical():
+    src = {"ContentLength": 10, "ETag": '"a"', "ChecksumSHA256": "x"}
+    assert is_identical(src, None) is False
+    assert is_identical(src, dict(src)) is True
+    # different size
+    assert is_identical(src, {**src, "ContentLength": 11}) is False
+    # same ETag, different checksum
+    assert is_identical(src, {**src, "ChecksumSHA256": "y"}) is False
+    # different ETag, same full object checksum
+    assert is_identical(src, {**src, "ETag": '"b-2"'}) is True
+    # different ETag, multipart checksum
+    dst = {"ContentLength": 10, "ETag": '"b-2"', "ChecksumSHA256": "z-2"}
+    assert is_identical(src, dst) is False
+    # multipart copy of the source
+    dst["Metadata"] = {SOURCE_ETAG_METADATA_KEY: '"a"'}
+    assert is_identical(src, dst) is True
+
+
+@moto.mock_s3
+def test_copy_multipart_uploaded_object_in_single_part(monkeypatch):
+    """
+    The object uploaded in parts and copied by ``CopyObject`` has a different
+    ETag, it is identical by the source ETag metadata.
+    """
+    for key in ["AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"]:
+        monkeypatch.setenv(key, "testing")
+    monkeypatch.delenv("AWS_PROFILE", raising=False)
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    bucket = "my-bucket"
+    s3_client.create_bucket(Bucket=bucket)
+    upload_id = s3_client.create_multipart_upload(
+        Bucket=bucket,
+        Key="src.txt",
+        ContentType="text/plain",
+        Metadata={"author": "alice"},
+    )["UploadId"]
+    parts = list()
+    for part_number, body in enumerate([b"a" * 5 * MB, b"b"], start=1):
+        response = s3_client.upload_part(
+            Bucket=bucket,
+            Key="src.txt",
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+    s3_client.complete_multipart_upload(
+        Bucket=bucket,
+        Key="src.txt",
+        UploadId=upload_id,
+        MultipartUpload={"Parts": parts},
+    )
+
+    src_head = head_object(s3_client, bucket, "src.txt")
+    assert src_head["ETag"].endswith('-2"')
+    assert is_identical(src_head, head_object(s3_client, bucket, "dst.txt")) is False
+    result = copy_object(s3_client, bucket, "src.txt", bucket, "dst.txt")
+    assert result.method == CopyMethodEnum.copy_object
+    dst_head = head_object(s3_client, bucket, "dst.txt")
+    assert dst_head["ETag"] != src_head["ETag"]
+    assert dst_head["ContentType"] == "text/plain"
+    assert dst_head["Metadata"]["author"] == "alice"
+    assert is_identical(src_head, dst_head) is True
+
+
+if __name__ == "__main__":
+    from aws_lambda_python_example.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_lambda_python_example.s3_copy")
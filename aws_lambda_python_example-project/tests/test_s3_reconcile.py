@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+from aws_lambda_python_example.s3_reconcile import (
+    DiffStatusEnum,
+    ObjectInfo,
+    prefetch,
+    iter_merged,
+    get_diff_status,
+    get_shard_ranges,
+)
+
+
+def objects(*keys: str, etag: str = '"e"') -> list:
+    return [ObjectInfo(key=key, size=1, etag=etag) for key in keys]
+
+
+def test_prefetch():
+    pages = [objects("a", "b"), objects("c")]
+    assert [obj.key for obj in prefetch(iter(pages), max_pages=1)] == ["a", "b", "c"]
+
+
+def test_iter_merged():
+    src = objects("a", "b", "d", "e")
+    dst = objects("b", "c", "e", "f")
+    assert [
+        (key, src is not None, dst is not None)
+        for key, src, dst in iter_merged(src, dst)
+    ] == [
+        ("a", True, False),
+        ("b", True, True),
+        ("c", False, True),
+        ("d", True, False),
+        ("e", True, True),
+        ("f", False, True),
+    ]
+    assert list(iter_merged([], [])) == []
+
+
+def test_get_diff_status():
+    obj = ObjectInfo(key="a", size=1, etag='"e"')
+    assert get_diff_status(obj, None) == DiffStatusEnum.missing
+    assert get_diff_status(None, obj) == DiffStatusEnum.extra
+    assert get_diff_status(obj, ObjectInfo("a", 1, '"e"')) == DiffStatusEnum.same
+    assert get_diff_status(obj, ObjectInfo("a", 2, '"e"')) == DiffStatusEnum.stale
+    assert get_diff_status(obj, ObjectInfo("a", 1, '"x"')) == DiffStatusEnum.stale
+
+
+def test_get_shard_ranges():
+    assert get_shard_ranges([]) == [(None, None)]
+    assert get_shard_ranges(["b/", "d/"]) == [
+        (None, "b/"),
+        ("b/", "d/"),
+        ("d/", None),
+    ]
+
+
+if __name__ == "__main__":
+    from aws_lambda_python_example.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_lambda_python_example.s3_reconcile")
@@ -6,10 +6,60 @@
     This module is "ZERO-DEPENDENCY".
 """
 
+import typing as T
 import hashlib
+import sysconfig
+import subprocess
+from pathlib import Path
 
 
 def sha256_of_bytes(b: bytes) -> str:
     sha256 = hashlib.sha256()
     sha256.update(b)
     return sha256.hexdigest()
+
+
+def sha256_of_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    sha256 = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def repr_data_size(size: int) -> str:
+    """
+    Human readable data size, for example: ``1.23 MB``.
+    """
+    value = float(size)
+    for unit in ["B", "KB", "MB", "GB"]:
+        if value < 1024 or unit == "GB":
+            break
+        value = value / 1024
+    if unit == "B":
+        return f"{size} B"
+    return f"{value:.2f} {unit}"
+
+
+def get_platform_tag() -> str:
+    """
+    The platform of the current build environment, for example:
+    ``linux_x86_64``, ``macosx_11_0_arm64``.
+    """
+    return sysconfig.get_platform().replace("-", "_").replace(".", "_")
+
+
+def get_interpreter_version(bin_python: T.Union[str, Path]) -> str:
+    """
+    :return: the ``${major}.${minor}`` version of the given interpreter.
+    """
+    res = subprocess.run(
+        [
+            f"{bin_python}",
+            "-c",
+            "import sys; print('%s.%s' % sys.version_info[:2])",
+        ],
+        capture_output=True,
+        check=True,
+    )
+    return res.stdout.decode("utf-8").strip()
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+
+"""
+Static import graph analyzer for the Chalice ``app.py``.
+
+Starting from each registered handler in ``app.py``, it follows the
+``import`` statements of the modules in our own package, and finds the
+transitive set of modules (the code closure) that the handler depends on.
+Nothing is imported or executed, the source code is only parsed by
+:mod:`ast`.
+
+A module is attributed to a handler if:
+
+- it is imported at the ``app.py`` module level. Loading ``app.py`` runs
+    the import, so these modules are shared by all handlers, no matter
+    which handler uses the name.
+- it is imported inside the handler body.
+- it is imported, directly or indirectly, by any of the modules above.
+    The parent packages' ``__init__.py`` are included too, because
+    Python runs them before the module.
+
+Third party modules are ignored, they are in the Lambda layer.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import ast
+import dataclasses
+from pathlib import Path
+
+
+def resolve_module_path(dir_root: Path, module: str) -> T.Optional[Path]:
+    """
+    :return: the ``.py`` file of the module, or the ``__init__.py`` of the
+        package, None if it is not a module under ``dir_root``.
+    """
+    dir_module = dir_root.joinpath(*module.split("."))
+    path = dir_module.parent / f"{dir_module.name}.py"
+    if path.exists():
+        return path
+    path = dir_module / "__init__.py"
+    if path.exists():
+        return path
+    return None
+
+
+def _resolve_relative(
+    module: str,
+    is_package: bool,
+    level: int,
+    name: T.Optional[str],
+) -> str:
+    """
+    Resolve ``from ..a import b`` style relative import to the absolute
+    module name, for example ``{{ cookiecutter.package_name }}.a``.
+    """
+    parts = module.split(".")
+    if not is_package:
+        parts = parts[:-1]
+    if level > 1:
+        parts = parts[: -(level - 1)]
+    if name:
+        parts.extend(name.split("."))
+    return ".".join(parts)
+
+
+def get_imports(path: Path, module: str) -> T.Set[str]:
+    """
+    Find all modules imported by a module, including the imports inside
+    functions. For ``from a import b``, both ``a`` and ``a.b`` are returned,
+    because ``b`` may be a sub module.
+
+    :param path: the source file of the module.
+    :param module: the absolute module name.
+    """
+    is_package = path.name == "__init__.py"
+    imports = set()
+    for node in ast.walk(ast.parse(path.read_text(), filename=f"{path}")):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.add(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = _resolve_relative(module, is_package, node.level, node.module)
+            else:
+                base = node.module
+            imports.add(base)
+            for alias in node.names:
+                if alias.name != "*":
+                    imports.add(f"{base}.{alias.name}")
+    return imports
+
+
+def _with_parent_packages(module: str) -> T.List[str]:
+    parts = module.split(".")
+    return [".".join(parts[: i + 1]) for i in range(len(parts))]
+
+
+def get_module_closure(
+    dir_root: Path,
+    package_name: str,
+    modules: T.Iterable[str],
+) -> T.Dict[str, Path]:
+    """
+    Find the transitive set of modules in ``package_name`` that the given
+    modules depend on.
+
+    :param dir_root: the folder that has the ``package_name`` folder.
+    :param package_name: only follow the modules in this package.
+    :param modules: the starting absolute module names.
+
+    :return: module name to source file mapping.
+    """
+    closure = dict()
+    stack = list(modules)
+    while stack:
+        for module in _with_parent_packages(stack.pop()):
+            if module in closure or module.split(".")[0] != package_name:
+                continue
+            path = resolve_module_path(dir_root, module)
+            if path is None:  # an attribute, not a module
+                continue
+            closure[module] = path
+            stack.extend(get_imports(path, module))
+    return closure
+
+
+@dataclasses.dataclass
+class Handler:
+    """
+    A Lambda function registered in ``app.py``.
+
+    :param handler_name: the Python function name in ``app.py``.
+    :param name: the ``name="..."`` argument of the decorator, if it is
+        a string literal.
+    :param name_attr: the last attribute of the ``name=...`` argument if it
+        is an expression like ``env.func_name_hello``, the caller can
+        resolve it to the real name.
+    :param modules: the absolute module names that the handler body imports.
+    """
+
+    handler_name: str = dataclasses.field()
+    name: T.Optional[str] = dataclasses.field(default=None)
+    name_attr: T.Optional[str] = dataclasses.field(default=None)
+    modules: T.Set[str] = dataclasses.field(default_factory=set)
+
+
+def _get_imported_modules(node: ast.AST) -> T.Set[str]:
+    """
+    Find the absolute modules imported by the import statement, for
+    ``from a import b``, both ``a`` and ``a.b`` are returned, because ``b``
+    may be a sub module. The relative imports are ignored, ``app.py`` is
+    not in a package.
+    """
+    if isinstance(node, ast.Import):
+        return {alias.name for alias in node.names}
+    elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+        modules = {node.module}
+        for alias in node.names:
+            if alias.name != "*":
+                modules.add(f"{node.module}.{alias.name}")
+        return modules
+    return set()
+
+
+def _is_app_decorator(node: ast.AST, app_name: str) -> bool:
+    """
+    Match ``@app.lambda_function(...)``, ``@app.on_s3_event(...)``, etc.
+    """
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and isinstance(node.func.value, ast.Name)
+        and node.func.value.id == app_name
+    )
+
+
+def parse_app(
+    path_app_py: Path,
+    app_name: str = "app",
+) -> T.Tuple[T.List[Handler], T.Set[str]]:
+    """
+    Find the registered handlers in the Chalice ``app.py``.
+
+    :return: the handlers, and the absolute module names imported by the
+        module level code, which are shared by all handlers.
+    """
+    tree = ast.parse(path_app_py.read_text(), filename=f"{path_app_py}")
+
+    handlers = list()
+    shared_modules = set()
+    for node in tree.body:
+        decorators = [
+            decorator
+            for decorator in getattr(node, "decorator_list", [])
+            if _is_app_decorator(decorator, app_name)
+        ]
+        if isinstance(node, ast.FunctionDef) and decorators:
+            handler = Handler(handler_name=node.name)
+            for keyword in decorators[0].keywords:
+                if keyword.arg != "name":
+                    continue
+                if isinstance(keyword.value, ast.Constant):
+                    handler.name = keyword.value.value
+                elif isinstance(keyword.value, ast.Attribute):
+                    handler.name_attr = keyword.value.attr
+            if handler.name is None and handler.name_attr is None:
+                handler.name = node.name  # Chalice uses the function name
+            handler.modules = {
+                module
+                for child in node.body
+                for sub_node in ast.walk(child)
+                for module in _get_imported_modules(sub_node)
+            }
+            handlers.append(handler)
+        else:
+            # the import statements, and the imports in the other module
+            # level code, such as ``if`` and ``try`` blocks
+            for sub_node in ast.walk(node):
+                shared_modules.update(_get_imported_modules(sub_node))
+    return handlers, shared_modules
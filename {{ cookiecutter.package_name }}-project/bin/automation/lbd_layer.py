@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""
+Lambda layer build and publish locations.
+
+A project may publish more than one Lambda layer (see
+:mod:`automation.lbd_layer_partition`), this module defines where to build
+each layer locally, and where to store its artifacts on S3.
+"""
+
+import typing as T
+import dataclasses
+from pathlib import Path
+
+from s3pathlib import S3Path
+
+from {{ cookiecutter.package_name }}.config.init import config
+from {{ cookiecutter.package_name }}.config.define import LambdaArchitectureEnum
+from {{ cookiecutter.package_name }}.boto_ses import bsm, DEFAULT_AWS_REGION
+
+from .paths import (
+    dir_build_lambda,
+    path_requirements_main,
+)
+
+
+@dataclasses.dataclass
+class LambdaLayer:
+    """
+    :param layer_name: the Lambda layer name.
+    :param path_requirements: the ``requirements.txt`` file to build the layer from.
+    :param dir_build: the local build folder, the layer content is installed
+        to ``${dir_build}/python`` and zipped to ``${dir_build}/layer.zip``.
+    :param s3dir_tmp: the S3 folder to upload the artifacts to before
+        publishing a new layer version.
+    :param s3dir_versions: the S3 folder to store the immutable artifacts of
+        each published layer version.
+    :param s3path_index: the requirements fingerprint index object,
+        see :mod:`automation.lbd_layer_index`.
+    :param architecture: the instruction set architecture of the layer,
+        ``x86_64`` or ``arm64``.
+    """
+
+    layer_name: str = dataclasses.field()
+    path_requirements: Path = dataclasses.field()
+    dir_build: Path = dataclasses.field()
+    s3dir_tmp: S3Path = dataclasses.field()
+    s3dir_versions: S3Path = dataclasses.field()
+    s3path_index: S3Path = dataclasses.field()
+    architecture: str = dataclasses.field(default=LambdaArchitectureEnum.x86_64)
+
+    @property
+    def dir_python(self) -> Path:
+        return self.dir_build / "python"
+
+    @property
+    def path_layer_zip(self) -> Path:
+        return self.dir_build / "layer.zip"
+
+    @property
+    def s3path_tmp_layer_zip(self) -> S3Path:
+        return self.s3dir_tmp.joinpath("layer.zip")
+
+    @property
+    def s3path_tmp_requirements_txt(self) -> S3Path:
+        return self.s3dir_tmp.joinpath("requirements.txt")
+
+    def get_s3path_layer_zip(self, version: int) -> S3Path:
+        return self.s3dir_versions.joinpath(str(version).zfill(6), "layer.zip")
+
+    def get_s3path_requirements_txt(self, version: int) -> S3Path:
+        return self.s3dir_versions.joinpath(str(version).zfill(6), "requirements.txt")
+
+
+def get_layer_aws_region() -> T.Optional[str]:
+    """
+    The Lambda layer is a regional resource, the layer of each region has its
+    own S3 artifacts and fingerprint index, so the deployments of the same
+    env in different regions don't overwrite each other.
+
+    :return: None for the default region, it keeps the original S3
+        locations, otherwise the current region.
+    """
+    if bsm.aws_region == DEFAULT_AWS_REGION:
+        return None
+    return bsm.aws_region
+
+
+def get_dir_build_lambda(architecture: str) -> Path:
+    """
+    The local build folder of the given architecture, the x86_64 one is
+    ``build/lambda``, the others are ``build/lambda/${architecture}``.
+    """
+    if architecture == LambdaArchitectureEnum.x86_64:
+        return dir_build_lambda
+    return dir_build_lambda / architecture
+
+
+def get_default_lambda_layer(
+    architecture: str = LambdaArchitectureEnum.x86_64,
+) -> LambdaLayer:
+    """
+    The single Lambda layer that includes everything in ``requirements-main.txt``.
+    """
+    aws_region = get_layer_aws_region()
+    return LambdaLayer(
+        layer_name=config.env.get_lambda_layer_name(architecture),
+        path_requirements=path_requirements_main,
+        dir_build=get_dir_build_lambda(architecture),
+        s3dir_tmp=config.env.get_s3dir_tmp_lambda_layer(architecture, aws_region),
+        s3dir_versions=config.env.get_s3dir_lambda_layer(architecture, aws_region),
+        s3path_index=config.env.get_s3path_lambda_layer_index(
+            architecture, aws_region
+        ),
+        architecture=architecture,
+    )
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+
+"""
+Per-distribution build cache for the AWS Lambda layer.
+
+Instead of running ``pip install -r requirements-main.txt -t ./build/lambda/python``
+from scratch every time, every pinned distribution in the exported
+``requirements-main.txt`` file is cached as a small zip file. The cache key is
+``(name, version, python_version, platform)``. When we build the layer:
+
+1. unchanged distributions are restored from the local cache folder, or from
+    the S3 backed cache if the local one doesn't have it (CI build job).
+2. only the new or changed distributions are installed with one
+    ``pip install --no-deps`` call, then split into one cache entry per
+    distribution using the ``RECORD`` file in its ``*.dist-info`` folder,
+    and stored to both the local and the S3 cache for the next build.
+
+The cache layout looks like::
+
+    ${cache_root}/py${python_version}/${platform}/${name}-${version}.zip
+"""
+
+import typing as T
+import os
+import re
+import csv
+import stat
+import shutil
+import zipfile
+import subprocess
+import dataclasses
+from pathlib import Path
+
+from s3pathlib import S3Path
+
+from .logger import logger
+from .emoji import Emoji
+from .pip_requirements import Requirement, normalize_name, parse_requirements
+
+
+@dataclasses.dataclass
+class LayerBuildCache:
+    """
+    The local and S3 backed distribution cache of a Lambda layer build.
+
+    :param dir_local: the local cache root folder.
+    :param python_version: the target Python version, for example ``3.8``.
+    :param platform: the target platform tag, for example ``linux_x86_64``.
+    :param s3dir_remote: the S3 cache root folder, if None, we only use
+        the local cache.
+    """
+
+    dir_local: Path = dataclasses.field()
+    python_version: str = dataclasses.field()
+    platform: str = dataclasses.field()
+    s3dir_remote: T.Optional[S3Path] = dataclasses.field(default=None)
+
+    @property
+    def _sub_folders(self) -> T.Tuple[str, str]:
+        return f"py{self.python_version}", self.platform
+
+    def get_local_path(self, requirement: Requirement) -> Path:
+        return self.dir_local.joinpath(*self._sub_folders, requirement.basename)
+
+    def get_s3path(self, requirement: Requirement) -> T.Optional[S3Path]:
+        if self.s3dir_remote is None:
+            return None
+        return self.s3dir_remote.joinpath(*self._sub_folders, requirement.basename)
+
+    def fetch(self, requirement: Requirement) -> T.Optional[Path]:
+        """
+        Locate the cached distribution zip file, download it from S3 if
+        it is not in the local cache.
+
+        :return: the local path of the cached zip file, None if it's a cache miss.
+        """
+        path = self.get_local_path(requirement)
+        if path.exists():
+            return path
+        s3path = self.get_s3path(requirement)
+        if s3path is not None and s3path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(s3path.read_bytes())
+            return path
+        return None
+
+    def store(
+        self,
+        requirement: Requirement,
+        dir_installed: Path,
+        files: T.Optional[T.Iterable[str]] = None,
+    ) -> Path:
+        """
+        Zip an installed distribution into the local cache, and then
+        upload it to the S3 cache.
+
+        :param dir_installed: the folder the distribution is installed into.
+        :param files: the relative paths of the files of this distribution,
+            if None, we zip everything in ``dir_installed``.
+        """
+        if files is None:
+            paths = [p for p in dir_installed.glob("**/*") if p.is_file()]
+        else:
+            paths = [dir_installed / file for file in files]
+        path = self.get_local_path(requirement)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path_tmp = path.parent / f"{path.name}.tmp"
+        with zipfile.ZipFile(path_tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            # ZipFile.write stores the file mode bits in ZipInfo.external_attr
+            for p in sorted(paths):
+                zf.write(p, arcname=p.relative_to(dir_installed).as_posix())
+        path_tmp.replace(path)  # atomic, never leave a corrupted cache entry
+        s3path = self.get_s3path(requirement)
+        if s3path is not None:
+            s3path.upload_file(f"{path}", overwrite=True)
+        return path
+
+
+def extract_zip(path: Path, dir_target: Path):
+    """
+    Extract a cached distribution zip file. Unlike ``ZipFile.extractall``,
+    it restores the file mode bits, so the console scripts in ``bin`` and
+    the ``*.so`` files stay executable.
+    """
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            path_extracted = zf.extract(info, dir_target)
+            mode = stat.S_IMODE(info.external_attr >> 16)
+            if mode and not info.is_dir():
+                os.chmod(path_extracted, mode)
+
+
+_dist_info_pattern = re.compile(r"^(?P<name>.+)-(?P<version>[^-]+)\.dist-info$")
+
+
+def get_installed_files(dir_installed: Path) -> T.Dict[str, T.List[str]]:
+    """
+    Find out which files belong to which distribution in a folder that
+    several distributions are installed into, using the ``RECORD`` file
+    of each ``*.dist-info`` folder.
+
+    :return: the normalized distribution name to the list of relative file
+        paths mapping.
+    """
+    installed_files = dict()
+    for dir_dist_info in dir_installed.glob("*.dist-info"):
+        match = _dist_info_pattern.match(dir_dist_info.name)
+        path_record = dir_dist_info / "RECORD"
+        if match is None or path_record.exists() is False:
+            continue
+        files = set()
+        with path_record.open(newline="") as f:
+            for row in csv.reader(f):
+                if not row:
+                    continue
+                # pip --target moves the scripts from ``../../bin`` to ``bin``
+                parts = [part for part in row[0].split("/") if part != ".."]
+                file = "/".join(parts)
+                if dir_installed.joinpath(file).is_file():
+                    files.add(file)
+        installed_files[normalize_name(match.group("name"))] = sorted(files)
+    return installed_files
+
+
+def _pip_install_no_deps(
+    bin_pip: T.Union[str, Path],
+    requirements: T.List[Requirement],
+    dir_target: Path,
+    dir_tmp: Path,
+    pip_args: T.Optional[T.List[str]] = None,
+):
+    """
+    Install exactly the given pinned distributions (without their dependencies)
+    into the target folder with a single ``pip install`` call.
+
+    :param pip_args: additional ``pip install`` arguments.
+    """
+    path_requirements = dir_tmp / "requirements.txt"
+    path_requirements.write_text(
+        "\n".join(requirement.line for requirement in requirements) + "\n"
+    )
+    args = [
+        f"{bin_pip}",
+        "install",
+        "-r",
+        f"{path_requirements}",
+        "-t",
+        f"{dir_target}",
+        "--no-deps",
+        "--disable-pip-version-check",
+        "--quiet",
+    ]
+    if pip_args:
+        args.extend(pip_args)
+    subprocess.run(args, check=True)
+
+
+def build_layer_with_cache(
+    bin_pip: T.Union[str, Path],
+    path_requirements: Path,
+    dir_target: Path,
+    dir_staging: Path,
+    cache: LayerBuildCache,
+    pip_args: T.Optional[T.List[str]] = None,
+) -> T.Tuple[T.List[Requirement], T.List[Requirement]]:
+    """
+    Assemble the layer ``python`` folder from the build cache, only install
+    the distributions that are not in the cache yet.
+
+    :param bin_pip: the pip executable used to install cache misses.
+    :param path_requirements: the exported ``requirements-main.txt`` file.
+    :param dir_target: the layer ``build/lambda/python`` folder, it has to be empty.
+    :param dir_staging: a temp folder to install cache misses into.
+    :param cache: the :class:`LayerBuildCache` object.
+    :param pip_args: additional ``pip install`` arguments for cache misses,
+        for example, install from the wheelhouse.
+
+    :return: the list of cache hits and the list of cache misses.
+    """
+    requirements = parse_requirements(path_requirements)
+    dir_target.mkdir(parents=True, exist_ok=True)
+    shutil.rmtree(dir_staging, ignore_errors=True)
+    dir_staging.mkdir(parents=True, exist_ok=True)
+
+    hits, misses = list(), list()
+    for requirement in requirements:
+        path = cache.fetch(requirement)
+        if path is None:
+            misses.append(requirement)
+        else:
+            hits.append(requirement)
+            extract_zip(path, dir_target)
+    logger.info(
+        f"{Emoji.green_circle} restored {len(hits)} packages from build cache",
+        indent=1,
+    )
+
+    if misses:
+        for requirement in misses:
+            logger.info(
+                f"{Emoji.yellow_circle} install {requirement.name}=={requirement.version} ...",
+                indent=1,
+            )
+        dir_installed = dir_staging / "python"
+        _pip_install_no_deps(
+            bin_pip=bin_pip,
+            requirements=misses,
+            dir_target=dir_installed,
+            dir_tmp=dir_staging,
+            pip_args=pip_args,
+        )
+        installed_files = get_installed_files(dir_installed)
+        for requirement in misses:
+            files = installed_files.get(requirement.name)
+            if files:
+                cache.store(requirement, dir_installed, files)
+            else:
+                logger.info(
+                    f"{Emoji.warning} can't find the RECORD of "
+                    f"{requirement.name}, skip caching it",
+                    indent=1,
+                )
+        shutil.copytree(dir_installed, dir_target, dirs_exist_ok=True)
+
+    shutil.rmtree(dir_staging, ignore_errors=True)
+    return hits, misses
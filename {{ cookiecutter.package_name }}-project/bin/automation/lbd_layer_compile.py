@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pre-compile the Lambda layer to bytecode for the Lambda runtime Python.
+
+The ``/opt`` folder (where the layer is extracted) is read-only in Lambda.
+If the layer doesn't ship usable ``*.pyc`` files, every cold start compiles
+every imported module from source, and the result is thrown away.
+
+We use `unchecked-hash <https://peps.python.org/pep-0552/>`_ pyc files:
+
+- they are deterministic, they don't embed the source file mtime,
+    so the layer.zip stays reproducible.
+- the interpreter doesn't stat / hash the source file to validate the pyc,
+    so they still work after the zip resets all timestamps.
+
+.. note::
+
+    The pyc magic number depends on the Python minor version. We have to
+    compile with the same minor version as the Lambda runtime, which is
+    ``pyproject.python_version``.
+"""
+
+import typing as T
+import os
+import subprocess
+from pathlib import Path
+
+from .logger import logger
+from .helpers import get_interpreter_version
+
+
+class BytecodeModeEnum:
+    """
+    - source: ship the ``*.py`` files only, don't compile.
+    - both: ship the ``*.py`` files and ``__pycache__/*.cpython-XY.pyc`` files.
+        The Lambda runtime doesn't use ``-O``, so only optimization level 0
+        pyc files are picked up in this mode.
+    - pyc_only: ship the sourceless ``*.pyc`` files next to where the ``*.py``
+        were. Any optimization level works in this mode, but the package
+        won't be able to read its own source code, for example ``inspect.getsource``.
+    """
+
+    source = "source"
+    both = "both"
+    pyc_only = "pyc_only"
+
+
+def compile_layer(
+    bin_python: T.Union[str, Path],
+    dir_root: Path,
+    python_version: str,
+    mode: str = BytecodeModeEnum.both,
+    optimization_level: int = 0,
+) -> int:
+    """
+    Compile all ``*.py`` files in the layer folder with ``compileall``.
+
+    :param bin_python: the interpreter used to compile, it has to be the
+        same minor version as the Lambda runtime.
+    :param dir_root: the layer ``build/lambda/python`` folder.
+    :param python_version: the Lambda runtime Python version, for example ``3.8``.
+    :param mode: see :class:`BytecodeModeEnum`.
+    :param optimization_level: 0, 1 (``-O``) or 2 (``-OO``).
+
+    :return: number of ``*.py`` files removed in ``pyc_only`` mode.
+    """
+    if mode == BytecodeModeEnum.source:
+        return 0
+    if mode not in (BytecodeModeEnum.both, BytecodeModeEnum.pyc_only):
+        raise ValueError(f"invalid bytecode mode {mode!r}")
+    if optimization_level not in (0, 1, 2):
+        raise ValueError(f"invalid optimization level {optimization_level!r}")
+    if mode == BytecodeModeEnum.both and optimization_level != 0:
+        raise ValueError(
+            "Lambda runtime doesn't run Python with '-O', it ignores the "
+            "optimized pyc in __pycache__, use the 'pyc_only' mode instead."
+        )
+
+    interpreter_version = get_interpreter_version(bin_python)
+    if interpreter_version != python_version:
+        raise ValueError(
+            f"{bin_python} is Python {interpreter_version}, but the Lambda "
+            f"runtime is Python {python_version}, the compiled pyc won't work!"
+        )
+
+    # compileall in Python 3.8 doesn't have the '-o' option,
+    # so we use the interpreter '-O' / '-OO' flag
+    args = [f"{bin_python}"]
+    if optimization_level:
+        args.append("-" + "O" * optimization_level)
+    args.extend(
+        [
+            "-m",
+            "compileall",
+            "-q",
+            "-j",
+            "0",
+            "--invalidation-mode",
+            "unchecked-hash",
+        ]
+    )
+    if mode == BytecodeModeEnum.pyc_only:
+        args.append("-b")  # write legacy 'module.pyc' next to the 'module.py'
+    args.append(f"{dir_root}")
+    logger.info(
+        f"compile layer to bytecode, mode = {mode}, "
+        f"optimization level = {optimization_level}",
+        indent=1,
+    )
+    # some packages ship files with invalid syntax (e.g. py2 only test data),
+    # compileall returns non-zero for them, they just stay as source
+    res = subprocess.run(args)
+    if res.returncode != 0:
+        logger.info("some files failed to compile, they will stay as source", indent=1)
+
+    n_removed = 0
+    if mode == BytecodeModeEnum.pyc_only:
+        for dirpath, dirnames, filenames in os.walk(dir_root):
+            for filename in filenames:
+                if filename.endswith(".py"):
+                    path = Path(dirpath, filename)
+                    if path.with_suffix(".pyc").exists():
+                        path.unlink()
+                        n_removed += 1
+        logger.info(f"removed {n_removed} source files", indent=1)
+    return n_removed
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+
+"""
+Slim down the Lambda layer ``build/lambda/python`` folder before we zip it.
+
+Smaller layer unpacks faster at cold start, and keeps us further below the
+250 MB unzipped deployment package limit.
+
+Ref:
+
+- Lambda quotas: https://docs.aws.amazon.com/lambda/latest/dg/gettingstarted-limits.html
+"""
+
+import typing as T
+import os
+import re
+import shutil
+import fnmatch
+import subprocess
+import dataclasses
+from pathlib import Path
+
+from .logger import logger
+from .emoji import Emoji
+from .helpers import repr_data_size
+
+LAMBDA_UNZIPPED_SIZE_LIMIT = 250 * 1000 * 1000
+
+
+@dataclasses.dataclass
+class LayerPruneConfig:
+    """
+    Configure what to remove from the layer.
+
+    :param remove_pycache: remove ``__pycache__`` folders. pip compiles
+        the pyc for the Python of the build environment, which may not be
+        the Lambda runtime Python.
+    :param remove_tests: remove ``tests`` and ``test`` folders. Only the
+        top level ones are removed, i.e. a top level ``tests`` package or
+        ``${package}/tests``, a nested folder with this name may be
+        imported at runtime.
+    :param remove_type_stubs: remove ``*.pyi`` files.
+    :param remove_docs: remove ``docs``, ``doc``, ``examples`` and ``example``
+        folders, with the same top level rule as ``remove_tests``.
+    :param slim_dist_info: only keep the files in ``*.dist-info`` that are
+        used at runtime by ``importlib.metadata``, see ``dist_info_keep``,
+        and the license files, see ``dist_info_keep_patterns``.
+    :param strip_shared_objects: remove debug symbols from ``*.so`` files
+        using ``strip --strip-debug``. It is skipped if ``strip`` is not available.
+    :param keep_packages: the top level packages that import their ``tests``
+        or ``docs`` folder at runtime, for example ``botocore.docs``,
+        these folders are never removed.
+    :param dist_info_keep: the files to keep in ``*.dist-info``.
+    :param dist_info_keep_patterns: the glob patterns of the files and folders
+        to keep in ``*.dist-info``, the license files have to ship with
+        the package.
+    :param extra_patterns: additional glob patterns, matched against the
+        relative path, for example ``"pandas/io/formats/templates/*"``.
+    """
+
+    remove_pycache: bool = dataclasses.field(default=True)
+    remove_tests: bool = dataclasses.field(default=True)
+    remove_type_stubs: bool = dataclasses.field(default=True)
+    remove_docs: bool = dataclasses.field(default=True)
+    slim_dist_info: bool = dataclasses.field(default=True)
+    strip_shared_objects: bool = dataclasses.field(default=True)
+    keep_packages: T.List[str] = dataclasses.field(
+        default_factory=lambda: [
+            "boto3",
+            "botocore",
+        ]
+    )
+    dist_info_keep: T.List[str] = dataclasses.field(
+        default_factory=lambda: [
+            "METADATA",
+            "entry_points.txt",
+            "top_level.txt",
+            "namespace_packages.txt",
+        ]
+    )
+    dist_info_keep_patterns: T.List[str] = dataclasses.field(
+        default_factory=lambda: [
+            "licenses",
+            "LICENSE*",
+            "LICENCE*",
+            "COPYING*",
+            "NOTICE*",
+        ]
+    )
+    extra_patterns: T.List[str] = dataclasses.field(default_factory=list)
+
+    def get_removed_dir_names(self) -> T.Set[str]:
+        """
+        The folder names to remove from the top level of a distribution.
+        """
+        names = set()
+        if self.remove_tests:
+            names.update(["tests", "test"])
+        if self.remove_docs:
+            names.update(["docs", "doc", "examples", "example"])
+        return names
+
+    def is_removed_dir(self, rel_dir: Path, dirname: str) -> bool:
+        """
+        Check if the folder ``dirname`` under ``rel_dir`` (relative to the
+        layer root) should be removed.
+        """
+        if dirname == "__pycache__":
+            return self.remove_pycache
+        parts = rel_dir.parts
+        # only the top level folder and the folder right under a top level package
+        if len(parts) > 1:
+            return False
+        if parts and parts[0] in self.keep_packages:
+            return False
+        return dirname in self.get_removed_dir_names()
+
+    def is_dist_info_kept(self, name: str) -> bool:
+        return name in self.dist_info_keep or any(
+            fnmatch.fnmatch(name, p) for p in self.dist_info_keep_patterns
+        )
+
+
+def get_dir_size(path: Path) -> int:
+    total = 0
+    for dirpath, dirnames, filenames in os.walk(path):
+        for filename in filenames:
+            total += os.lstat(os.path.join(dirpath, filename)).st_size
+    return total
+
+
+_dist_info_pattern = re.compile(r"^(?P<name>.+?)-[^-]+\.(dist|egg)-info$")
+
+
+def get_package_name(top_level_name: str) -> str:
+    """
+    Group the top level entries in the layer by package, so that
+    ``six.py``, ``six-1.16.0.dist-info`` and ``numpy.libs`` are grouped
+    under ``six`` and ``numpy``.
+    """
+    match = _dist_info_pattern.match(top_level_name)
+    if match:
+        name = match.group("name")
+    elif top_level_name.endswith(".libs"):
+        name = top_level_name[: -len(".libs")]
+    elif top_level_name.endswith(".py"):
+        name = top_level_name[: -len(".py")]
+    else:
+        name = top_level_name.split(".")[0]
+    return name.lower().replace("-", "_")
+
+
+def measure_packages(dir_root: Path) -> T.Dict[str, int]:
+    """
+    :return: package name to total bytes mapping.
+    """
+    sizes = dict()
+    for path in dir_root.iterdir():
+        name = get_package_name(path.name)
+        if path.is_dir():
+            size = get_dir_size(path)
+        else:
+            size = path.lstat().st_size
+        sizes[name] = sizes.get(name, 0) + size
+    return sizes
+
+
+def _strip_shared_object(bin_strip: str, path: Path):
+    # strip fails on some non ELF files shipped with a .so extension,
+    # it is safe to leave them as they are
+    subprocess.run(
+        [bin_strip, "--strip-debug", f"{path}"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def prune_layer(
+    dir_root: Path,
+    config: LayerPruneConfig,
+):
+    """
+    Remove unnecessary files from the layer folder in place.
+    """
+    bin_strip = shutil.which("strip") if config.strip_shared_objects else None
+    if config.strip_shared_objects and bin_strip is None:
+        logger.info(
+            f"{Emoji.warning} 'strip' command not found, skip stripping *.so files",
+            indent=1,
+        )
+    for dirpath, dirnames, filenames in os.walk(dir_root, topdown=True):
+        dir_path = Path(dirpath)
+        rel_dir = dir_path.relative_to(dir_root)
+        is_dist_info = dir_path.name.endswith(".dist-info")
+
+        for dirname in list(dirnames):
+            rel_path = (rel_dir / dirname).as_posix()
+            if (
+                config.is_removed_dir(rel_dir, dirname)
+                or (
+                    is_dist_info
+                    and config.slim_dist_info
+                    and not config.is_dist_info_kept(dirname)
+                )
+                or any(fnmatch.fnmatch(rel_path, p) for p in config.extra_patterns)
+            ):
+                shutil.rmtree(dir_path / dirname)
+                dirnames.remove(dirname)
+
+        for filename in filenames:
+            path = dir_path / filename
+            rel_path = (rel_dir / filename).as_posix()
+            if (
+                (config.remove_type_stubs and filename.endswith(".pyi"))
+                or (
+                    is_dist_info
+                    and config.slim_dist_info
+                    and not config.is_dist_info_kept(filename)
+                )
+                or any(fnmatch.fnmatch(rel_path, p) for p in config.extra_patterns)
+            ):
+                path.unlink()
+            elif (
+                bin_strip is not None
+                and (filename.endswith(".so") or ".so." in filename)
+                and not path.is_symlink()
+            ):
+                _strip_shared_object(bin_strip, path)
+
+
+def log_prune_report(
+    before: T.Dict[str, int],
+    after: T.Dict[str, int],
+):
+    """
+    Print the per-package size report, the biggest package first.
+    """
+    rows = sorted(before.items(), key=lambda x: x[1], reverse=True)
+    logger.info(f"{'package':<32} {'before':>12} {'after':>12} {'saved':>8}", indent=1)
+    for name, size_before in rows:
+        size_after = after.get(name, 0)
+        saved = (size_before - size_after) / size_before if size_before else 0.0
+        logger.info(
+            f"{name:<32} {repr_data_size(size_before):>12} "
+            f"{repr_data_size(size_after):>12} {saved:>8.1%}",
+            indent=1,
+        )
+    total_before = sum(before.values())
+    total_after = sum(after.values())
+    saved = (total_before - total_after) / total_before if total_before else 0.0
+    logger.info(
+        f"{'TOTAL':<32} {repr_data_size(total_before):>12} "
+        f"{repr_data_size(total_after):>12} {saved:>8.1%}",
+        indent=1,
+    )
+    if total_after > LAMBDA_UNZIPPED_SIZE_LIMIT:
+        logger.info(
+            f"{Emoji.warning} the unzipped layer is larger than the 250 MB Lambda limit!",
+            indent=1,
+        )
+
+
+def prune_layer_with_report(
+    dir_root: Path,
+    config: T.Optional[LayerPruneConfig] = None,
+) -> T.Tuple[T.Dict[str, int], T.Dict[str, int]]:
+    """
+    Prune the layer folder and print the per-package report of bytes
+    before and after.
+
+    :return: package sizes before and after pruning.
+    """
+    if config is None:
+        config = LayerPruneConfig()
+    before = measure_packages(dir_root)
+    prune_layer(dir_root, config)
+    after = measure_packages(dir_root)
+    log_prune_report(before, after)
+    return before, after
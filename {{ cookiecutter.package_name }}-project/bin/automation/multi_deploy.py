@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+"""
+Deploy to multiple ``(env, region)`` targets concurrently.
+
+The automation scripts pick the env and the AWS region once at import time,
+and keep the state in the project folder, such as the chalice deployed JSON
+file, the ``.current-env-name.json`` file and the ``build`` folder. So each
+target runs the regular deployment scripts in its own process, in its own
+copy of the project folder::
+
+    ${dir_project_root}/build/deploy-targets/${env_name}-${aws_region}/
+
+The target is passed to the process by the ``DEPLOY_TARGET_ENV_NAME`` and
+``DEPLOY_TARGET_AWS_REGION`` environment variables, so every target has its
+own boto session. The output of each target goes to a log file in its
+folder. A failed target doesn't stop the other targets, all results are
+reported in one summary at the end.
+
+The Lambda layer is a regional resource, so each target also deploys the
+layer in its own region, see :func:`automation.lbd_layer.get_layer_aws_region`.
+The layer is only published by the CI on a layer branch, as usual.
+"""
+
+import typing as T
+import os
+import time
+import subprocess
+import dataclasses
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from {{ cookiecutter.package_name }}.config.define import (
+    EnvEnum,
+    ENV_VAR_DEPLOY_TARGET_ENV_NAME,
+)
+from {{ cookiecutter.package_name }}.boto_ses import ENV_VAR_DEPLOY_TARGET_AWS_REGION
+
+from .paths import (
+    dir_project_root,
+    dir_build,
+    dir_venv,
+    bin_python,
+)
+from .pyproject import pyproject
+from .logger import logger
+from .emoji import Emoji
+from .dir_sync import sync_dir
+
+dir_deploy_targets = dir_build / "deploy-targets"
+
+
+class DeployStepEnum:
+    """
+    The deployment steps, the value is the script in the ``bin`` folder.
+    """
+
+    cloudformation = "s04_1_deploy_cloudformation.py"
+    lambda_layer = "s05_2_lambda_publish_layer.py"
+    lambda_app = "s05_4_lambda_deploy.py"
+
+
+DEFAULT_STEPS = [
+    DeployStepEnum.cloudformation,
+    DeployStepEnum.lambda_layer,
+    DeployStepEnum.lambda_app,
+]
+
+WORKSPACE_EXCLUDE = [
+    ".git",
+    ".venv",
+    "build",
+    "dist",
+    "htmlcov",
+    ".pytest_cache",
+    "__pycache__",
+    "*.pyc",
+    "*.egg-info",
+    f"{pyproject.package_name}-*",  # the extracted source artifacts
+    "vendor",
+    "deployed",
+    ".current-env-name.json",
+]
+
+
+@dataclasses.dataclass(frozen=True)
+class DeployTarget:
+    env_name: str = dataclasses.field()
+    aws_region: str = dataclasses.field()
+
+    @classmethod
+    def parse(cls, s: str) -> "DeployTarget":
+        """
+        Parse the ``${env_name}:${aws_region}`` string, for example
+        ``prod:us-west-2``.
+        """
+        env_name, aws_region = s.split(":", 1)
+        if env_name not in EnvEnum._value2member_map_:
+            raise ValueError(f"Invalid environment name {env_name!r}!")
+        return cls(env_name=env_name, aws_region=aws_region)
+
+    @property
+    def key(self) -> str:
+        return f"{self.env_name}-{self.aws_region}"
+
+    @property
+    def dir_workspace(self) -> Path:
+        return dir_deploy_targets / self.key
+
+    @property
+    def path_log(self) -> Path:
+        return self.dir_workspace / "deploy.log"
+
+
+@dataclasses.dataclass
+class DeployResult:
+    target: DeployTarget = dataclasses.field()
+    succeeded: bool = dataclasses.field()
+    failed_step: T.Optional[str] = dataclasses.field(default=None)
+    elapsed: float = dataclasses.field(default=0.0)
+
+
+def create_workspace(target: DeployTarget) -> Path:
+    """
+    Sync the project folder to the target's own folder, only the changed
+    files are copied. The virtualenv is shared by a symlink.
+    """
+    dir_workspace = target.dir_workspace
+    sync_dir(
+        dir_project_root,
+        dir_workspace,
+        exclude=WORKSPACE_EXCLUDE,
+        keep=[dir_venv.name, target.path_log.name],
+    )
+    dir_workspace_venv = dir_workspace / dir_venv.name
+    if not dir_workspace_venv.is_symlink():
+        dir_workspace_venv.symlink_to(dir_venv, target_is_directory=True)
+    return dir_workspace
+
+
+def deploy_target(
+    target: DeployTarget,
+    steps: T.List[str],
+) -> DeployResult:
+    """
+    Run the deployment steps of one target in its own process and folder.
+    """
+    start = time.time()
+    dir_workspace = create_workspace(target)
+    env = os.environ.copy()
+    env[ENV_VAR_DEPLOY_TARGET_ENV_NAME] = target.env_name
+    env[ENV_VAR_DEPLOY_TARGET_AWS_REGION] = target.aws_region
+    # the package is installed in editable mode from the original project
+    # folder, put the workspace first, so the package paths, such as the
+    # chalice config file, resolve to the workspace
+    env["PYTHONPATH"] = os.pathsep.join(
+        [f"{dir_workspace}"]
+        + [p for p in env.get("PYTHONPATH", "").split(os.pathsep) if p]
+    )
+    with target.path_log.open("w") as f:
+        for step in steps:
+            res = subprocess.run(
+                [f"{bin_python}", f"{dir_workspace / 'bin' / step}"],
+                cwd=f"{dir_workspace}",
+                env=env,
+                stdout=f,
+                stderr=subprocess.STDOUT,
+            )
+            if res.returncode != 0:
+                return DeployResult(
+                    target=target,
+                    succeeded=False,
+                    failed_step=step,
+                    elapsed=time.time() - start,
+                )
+    return DeployResult(
+        target=target,
+        succeeded=True,
+        elapsed=time.time() - start,
+    )
+
+
+def _deploy_target_safely(
+    target: DeployTarget,
+    steps: T.List[str],
+) -> DeployResult:
+    try:
+        return deploy_target(target, steps)
+    except Exception as e:
+        logger.error(f"{target.key}: {e!r}", indent=1)
+        return DeployResult(target=target, succeeded=False)
+
+
+@logger.block(
+    msg="Deploy to Multiple Targets",
+    start_emoji=Emoji.deploy,
+    end_emoji=Emoji.deploy,
+    pipe=Emoji.deploy,
+)
+def deploy_targets(
+    targets: T.List[DeployTarget],
+    steps: T.Optional[T.List[str]] = None,
+    max_workers: int = 4,
+) -> T.List[DeployResult]:
+    """
+    Deploy to the targets concurrently, at most ``max_workers`` targets at
+    the same time.
+
+    :param steps: the list of :class:`DeployStepEnum`, default is deploying
+        the CloudFormation stack, the Lambda layer, then the Lambda app.
+
+    :return: the result of each target, in the same order.
+    """
+    if steps is None:
+        steps = DEFAULT_STEPS
+    targets = list(dict.fromkeys(targets))  # remove duplicates, keep order
+    logger.info(
+        f"deploy {len(targets)} targets, at most {max_workers} at the same time"
+    )
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_deploy_target_safely, target, steps)
+            for target in targets
+        ]
+        results = [future.result() for future in futures]
+
+    logger.info("summary:")
+    for result in results:
+        if result.succeeded:
+            status = f"{Emoji.succeeded} succeeded"
+        elif result.failed_step:
+            status = f"{Emoji.failed} failed at {result.failed_step}"
+        else:
+            status = f"{Emoji.failed} failed"
+        logger.info(
+            f"{result.target.key}: {status} in {result.elapsed:.1f}s, "
+            f"log: {result.target.path_log}",
+            indent=1,
+        )
+    return results
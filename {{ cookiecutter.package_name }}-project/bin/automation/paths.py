@@ -76,6 +76,7 @@ path_requirements_automation = dir_project_root / "requirements-automation.txt"
 
 path_poetry_lock = dir_project_root / "poetry.lock"
 path_poetry_lock_hash_json = dir_project_root / ".poetry-lock-hash.json"
+dir_wheelhouse = dir_home / ".projects" / pyproject.package_name / "wheelhouse"
 
 # ------------------------------------------------------------------------------
 # Env Related
@@ -108,10 +109,14 @@ dir_build_lambda_python = dir_build_lambda / "python"
 path_build_lambda_bin_aws = dir_build_lambda_python / "aws"
 path_build_lambda_source_zip = dir_build_lambda / "source.zip"
 path_build_lambda_layer_zip = dir_build_lambda / "layer.zip"
+dir_build_lambda_layer_staging = dir_build / "lambda-layer-staging"
+path_lambda_source_hash_index = dir_build / "lambda-source-hash-index.json"
+dir_lambda_layer_cache = dir_home / ".projects" / pyproject.package_name / "lambda-layer-cache"
 
 dir_lambda_app = dir_project_root / "lambda_app"
 path_chalice_config = dir_lambda_app / ".chalice" / "config.json"
 dir_lambda_app_vendor = dir_lambda_app / "vendor"
+path_lambda_app_config_snapshot_json = dir_lambda_app_vendor / "config-snapshot.json"
 dir_lambda_app_deployed = dir_lambda_app / ".chalice" / "deployed"
 path_update_chalice_config_script = dir_lambda_app / "update_chalice_config.py"
 path_app_py = dir_lambda_app / "app.py"
@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+
+"""
+A shared local wheelhouse for the virtualenv and the Lambda layer builds.
+
+Without it, every ``pip install -r requirements-***.txt`` downloads its
+wheels one by one, and the layer build downloads them again. Instead:
+
+1. pull the wheelhouse from the S3 mirror, if configured.
+2. download the distributions of all pinned requirements that are not
+    in the wheelhouse yet, concurrently, one ``pip download --no-deps``
+    process per requirement.
+3. push the new distributions back to the S3 mirror.
+4. every install runs offline with ``--no-index --find-links ${wheelhouse}``.
+
+The wheelhouse stores the original distributions, the wheel if there is
+one for the platform, otherwise the source distribution. The exported
+requirements are hash pinned, a wheel built from a source distribution
+locally doesn't match the hash, so it can't be used. The offline install
+builds the source distribution, its build requirements, such as
+``setuptools`` and ``wheel``, are also downloaded to the wheelhouse. The
+wheelhouse layout looks like::
+
+    ${wheelhouse_root}/py${python_version}/${platform}/${filename}
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY", because it is used to install the
+    dependencies. The S3 mirror uses the ``aws s3 sync`` command, it is
+    skipped if the AWS CLI is not installed.
+"""
+
+import typing as T
+import os
+import re
+import shutil
+import tarfile
+import zipfile
+import tempfile
+import subprocess
+import dataclasses
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from .logger import logger
+from .emoji import Emoji
+from .pip_requirements import Requirement, normalize_name, parse_requirements
+
+ENV_VAR_WHEELHOUSE_S3URI = "WHEELHOUSE_S3URI"
+"""
+The S3 folder uri to mirror the wheelhouse to, for example
+``s3://my-bucket/projects/my_project/wheelhouse/``.
+"""
+
+
+SDIST_EXTENSIONS = (".tar.gz", ".zip")
+
+DEFAULT_BUILD_REQUIRES = ["setuptools>=40.8.0", "wheel"]
+"""
+The build requirements of a source distribution without ``pyproject.toml``,
+see https://pip.pypa.io/en/stable/reference/build-system/pyproject-toml/#fallback-behaviour
+"""
+
+
+class WheelFetchError(Exception):
+    """
+    Raised when some requirements don't have a distribution for the target
+    platform, or failed to download.
+    """
+
+    pass
+
+
+def parse_wheel_filename(filename: str) -> T.Tuple[str, str]:
+    """
+    :return: the normalized distribution name and the version, for example
+        ``("s3pathlib", "1.4.1")`` for ``s3pathlib-1.4.1-py3-none-any.whl``.
+    """
+    parts = filename[: -len(".whl")].split("-")
+    return normalize_name(parts[0]), parts[1]
+
+
+def parse_sdist_filename(filename: str) -> T.Tuple[str, str]:
+    """
+    :return: the normalized distribution name and the version, for example
+        ``("python-editor", "1.0.4")`` for ``python-editor-1.0.4.tar.gz``.
+    """
+    for ext in SDIST_EXTENSIONS:
+        if filename.endswith(ext):
+            filename = filename[: -len(ext)]
+    name, version = filename.rsplit("-", 1)
+    return normalize_name(name), version
+
+
+def parse_distribution_filename(filename: str) -> T.Optional[T.Tuple[str, str]]:
+    """
+    :return: the normalized distribution name and the version, None if it is
+        not a wheel or a source distribution.
+    """
+    if filename.endswith(".whl"):
+        return parse_wheel_filename(filename)
+    if filename.endswith(SDIST_EXTENSIONS):
+        return parse_sdist_filename(filename)
+    return None
+
+
+_build_system_requires_pattern = re.compile(
+    r"^\[build-system\][^\[]*?^requires\s*=\s*\[(?P<requires>[^\]]*)\]",
+    re.MULTILINE | re.DOTALL,
+)
+_requirement_name_pattern = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._\-]*)")
+
+
+def parse_build_requires(pyproject_toml: T.Optional[str]) -> T.List[str]:
+    """
+    Parse the ``build-system.requires`` of the ``pyproject.toml`` content,
+    without a toml parser.
+
+    :param pyproject_toml: None if the source distribution doesn't have
+        the ``pyproject.toml`` file.
+    """
+    if pyproject_toml is None:
+        return list(DEFAULT_BUILD_REQUIRES)
+    match = _build_system_requires_pattern.search(pyproject_toml)
+    if match is None:
+        return list(DEFAULT_BUILD_REQUIRES)
+    return re.findall(r"[\"']([^\"']+)[\"']", match.group("requires"))
+
+
+def read_sdist_pyproject_toml(path: Path) -> T.Optional[str]:
+    """
+    :return: the content of the top level ``pyproject.toml`` in the source
+        distribution archive, None if it doesn't have one.
+    """
+    if path.name.endswith(".zip"):
+        with zipfile.ZipFile(path) as zf:
+            for name in zf.namelist():
+                if name.count("/") == 1 and name.endswith("/pyproject.toml"):
+                    return zf.read(name).decode("utf-8")
+    else:
+        with tarfile.open(path) as tf:
+            for member in tf.getmembers():
+                if member.name.count("/") == 1 and member.name.endswith(
+                    "/pyproject.toml"
+                ):
+                    return tf.extractfile(member).read().decode("utf-8")
+    return None
+
+
+@dataclasses.dataclass
+class Wheelhouse:
+    """
+    :param dir_root: the local wheelhouse root folder.
+    :param python_version: the target Python version, for example ``3.8``.
+    :param platform: the target platform tag, for example ``linux_x86_64``.
+    :param s3uri_root: the S3 mirror root folder uri, if None, we only use
+        the local wheelhouse.
+    :param platform_pip_args: the pip arguments to resolve the wheels for a
+        different target platform, see
+        :meth:`automation.lbd_layer_platform.LambdaTargetPlatform.get_pip_args`.
+    """
+
+    dir_root: Path = dataclasses.field()
+    python_version: str = dataclasses.field()
+    platform: str = dataclasses.field()
+    s3uri_root: T.Optional[str] = dataclasses.field(default=None)
+    platform_pip_args: T.Optional[T.List[str]] = dataclasses.field(default=None)
+
+    @property
+    def dir_wheels(self) -> Path:
+        return self.dir_root / f"py{self.python_version}" / self.platform
+
+    @property
+    def s3uri_wheels(self) -> T.Optional[str]:
+        if self.s3uri_root is None:
+            return None
+        return f"{self.s3uri_root.rstrip('/')}/py{self.python_version}/{self.platform}/"
+
+    def list_distributions(self) -> T.Set[T.Tuple[str, str]]:
+        """
+        :return: the set of ``(name, version)`` that already have a wheel or
+            a source distribution.
+        """
+        if not self.dir_wheels.exists():
+            return set()
+        distributions = set()
+        for path in self.dir_wheels.iterdir():
+            distribution = parse_distribution_filename(path.name)
+            if distribution is not None:
+                distributions.add(distribution)
+        return distributions
+
+    def get_missing(self, requirements: T.List[Requirement]) -> T.List[Requirement]:
+        distributions = self.list_distributions()
+        return [
+            requirement
+            for requirement in requirements
+            if (requirement.name, requirement.version) not in distributions
+        ]
+
+    def _s3_sync(self, src: str, dst: str):
+        bin_aws = shutil.which("aws")
+        if bin_aws is None:
+            logger.info(
+                f"{Emoji.warning} 'aws' command not found, skip the S3 mirror",
+                indent=1,
+            )
+            return
+        subprocess.run(
+            [
+                bin_aws,
+                "s3",
+                "sync",
+                src,
+                dst,
+                "--exclude",
+                "*",
+                "--include",
+                "*.whl",
+                "--include",
+                "*.tar.gz",
+                "--include",
+                "*.zip",
+                "--only-show-errors",
+            ],
+            check=True,
+        )
+
+    def pull(self):
+        """
+        Download the distributions from the S3 mirror that the local
+        wheelhouse doesn't have.
+        """
+        if self.s3uri_wheels is None:
+            return
+        logger.info(f"pull wheelhouse from {self.s3uri_wheels}", indent=1)
+        self.dir_wheels.mkdir(parents=True, exist_ok=True)
+        self._s3_sync(self.s3uri_wheels, f"{self.dir_wheels}")
+
+    def push(self):
+        """
+        Upload the distributions that the S3 mirror doesn't have.
+        """
+        if self.s3uri_wheels is None:
+            return
+        logger.info(f"push wheelhouse to {self.s3uri_wheels}", indent=1)
+        self._s3_sync(f"{self.dir_wheels}", self.s3uri_wheels)
+
+    def _fetch_one(
+        self,
+        bin_pip: T.Union[str, Path],
+        requirement: Requirement,
+    ) -> T.List[Path]:
+        """
+        Download the distribution of exactly one pinned requirement, pip
+        verifies it against the hashes in the requirement. Each process
+        works in its own temp folder, and only moves the finished file to
+        the wheelhouse, so a failed or concurrent run never leaves a partial
+        file behind.
+        """
+        with tempfile.TemporaryDirectory(prefix=f"{requirement.name}-") as dir_tmp:
+            dir_tmp = Path(dir_tmp)
+            path_requirements = dir_tmp / "requirements.txt"
+            path_requirements.write_text(requirement.line + "\n")
+            dir_out = dir_tmp / "wheels"
+            args = [f"{bin_pip}", "download", "-d", f"{dir_out}"]
+            if self.platform_pip_args is not None:
+                args.extend(self.platform_pip_args)
+            args.extend(
+                [
+                    "-r",
+                    f"{path_requirements}",
+                    "--no-deps",
+                    "--disable-pip-version-check",
+                    "--quiet",
+                ]
+            )
+            subprocess.run(args, check=True)
+            paths = list()
+            if dir_out.exists():
+                for path in dir_out.iterdir():
+                    path_dst = self.dir_wheels / path.name
+                    shutil.move(f"{path}", f"{path_dst}")
+                    paths.append(path_dst)
+            return paths
+
+    def fetch_build_requires(
+        self,
+        bin_pip: T.Union[str, Path],
+        requirements: T.List[Requirement],
+    ):
+        """
+        Download the build requirements of the source distributions of the
+        given requirements, with their dependencies, so the offline install
+        can build them. Only the missing ones by name are downloaded.
+        """
+        pinned = {(r.name, r.version) for r in requirements}
+        build_requires = dict()
+        for path in self.dir_wheels.iterdir():
+            if not path.name.endswith(SDIST_EXTENSIONS):
+                continue
+            if parse_sdist_filename(path.name) not in pinned:
+                continue
+            for build_require in parse_build_requires(read_sdist_pyproject_toml(path)):
+                name = normalize_name(
+                    _requirement_name_pattern.match(build_require).group(1)
+                )
+                build_requires.setdefault(name, build_require)
+        names = {name for name, _ in self.list_distributions()}
+        missing = [v for k, v in build_requires.items() if k not in names]
+        if not missing:
+            return
+        logger.info(f"fetch build requirements: {', '.join(missing)}", indent=1)
+        args = [f"{bin_pip}", "download", "-d", f"{self.dir_wheels}"]
+        args.extend(missing)
+        args.extend(["--disable-pip-version-check", "--quiet"])
+        subprocess.run(args, check=True)
+
+    def prefetch(
+        self,
+        bin_pip: T.Union[str, Path],
+        paths_requirements: T.Iterable[Path],
+        max_workers: T.Optional[int] = None,
+    ) -> T.List[Requirement]:
+        """
+        Make sure the wheelhouse has the wheels for all pinned requirements
+        in the given ``requirements-***.txt`` files.
+
+        :param bin_pip: the pip executable of the target Python.
+        :param paths_requirements: the exported requirements files.
+        :param max_workers: number of concurrent ``pip download`` processes,
+            it is network bound, default is 4 times of the CPU count.
+
+        :return: the list of requirements fetched in this run.
+
+        :raises WheelFetchError: if any requirement failed to fetch, all
+            requirements are tried first, so we see all failures at once.
+        """
+        requirements = dict()
+        for path in paths_requirements:
+            for requirement in parse_requirements(path):
+                requirements.setdefault(
+                    (requirement.name, requirement.version), requirement
+                )
+        requirements = list(requirements.values())
+
+        self.dir_wheels.mkdir(parents=True, exist_ok=True)
+        missing = self.get_missing(requirements)
+        if missing and self.s3uri_wheels is not None:
+            self.pull()
+            missing = self.get_missing(requirements)
+        logger.info(
+            f"{Emoji.green_circle} {len(requirements) - len(missing)} distributions "
+            f"in wheelhouse, {len(missing)} to fetch",
+            indent=1,
+        )
+        if not missing:
+            self.fetch_build_requires(bin_pip, requirements)
+            return missing
+
+        if max_workers is None:
+            max_workers = (os.cpu_count() or 1) * 4
+        failed = list()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._fetch_one, bin_pip, requirement)
+                for requirement in missing
+            ]
+            for requirement, future in zip(missing, futures):
+                try:
+                    paths = future.result()
+                except subprocess.CalledProcessError:
+                    failed.append(requirement)
+                    logger.info(
+                        f"{Emoji.red_circle} can't fetch {requirement.name}=={requirement.version}",
+                        indent=1,
+                    )
+                    continue
+                if paths:
+                    logger.info(
+                        f"{Emoji.yellow_circle} fetched {requirement.name}=={requirement.version}",
+                        indent=1,
+                    )
+                else:  # the environment marker doesn't match
+                    logger.info(
+                        f"skip {requirement.name}=={requirement.version}, "
+                        f"not required for this platform",
+                        indent=1,
+                    )
+        self.fetch_build_requires(bin_pip, requirements)
+        self.push()
+        if failed:
+            raise WheelFetchError(
+                "can't fetch the distribution for {} on {}: {}".format(
+                    f"py{self.python_version}",
+                    self.platform,
+                    ", ".join(f"{r.name}=={r.version}" for r in failed),
+                )
+            )
+        return missing
+
+    def get_pip_install_args(self) -> T.List[str]:
+        """
+        The ``pip install`` arguments to install from the wheelhouse only.
+        """
+        return ["--no-index", "--find-links", f"{self.dir_wheels}"]
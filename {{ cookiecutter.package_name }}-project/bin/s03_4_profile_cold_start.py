@@ -0,0 +1,7 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from automation.env import CURRENT_ENV
+from automation.cold_start import profile_cold_start
+
+profile_cold_start(env_name=CURRENT_ENV)
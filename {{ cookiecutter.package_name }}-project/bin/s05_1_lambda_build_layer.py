@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
 
 """
-This script can be used for local test.
+This script can be used for local test. It resolves the wheels for the
+Lambda runtime platform, so the layer works in AWS Lambda even if it is
+built on your laptop.
 """
 
+from automation.pyproject import pyproject
 from automation.lbd import build_lambda_layer_artifacts
+from automation.lbd_layer_platform import LambdaTargetPlatform
 
-build_lambda_layer_artifacts()
+build_lambda_layer_artifacts(
+    target_platform=LambdaTargetPlatform(python_version=pyproject.python_version),
+)
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+"""
+Usage::
+
+    python bin/s07_1_s3sync_backfill.py --shards 16 --max-workers 32
+    python bin/s07_1_s3sync_backfill.py --dry-run
+"""
+
+import sys
+import argparse
+
+from {{ cookiecutter.package_name }}.lbd.s3sync import backfill
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--shards", type=int, default=16)
+parser.add_argument("--max-workers", type=int, default=32)
+parser.add_argument(
+    "--boundaries",
+    default=None,
+    help="comma separated shard boundary keys, relative to the source folder",
+)
+parser.add_argument("--restart", action="store_true", help="ignore the checkpoint")
+parser.add_argument("--dry-run", action="store_true", help="only compare")
+args = parser.parse_args()
+
+result = backfill(
+    n_shards=args.shards,
+    max_workers=args.max_workers,
+    boundaries=args.boundaries.split(",") if args.boundaries else None,
+    restart=args.restart,
+    dry_run=args.dry_run,
+)
+if result.n_failed:
+    sys.exit(1)
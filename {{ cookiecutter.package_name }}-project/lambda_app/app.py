@@ -1,20 +1,21 @@
 # -*- coding: utf-8 -*-
 
 from chalice import Chalice
-from chalice.app import S3Event
+from chalice.app import S3Event, SQSEvent
 
 from {{ cookiecutter.package_name }}.config.init import config
-from {{ cookiecutter.package_name }}.iac.output import Output
-from {{ cookiecutter.package_name }}.lbd import hello, s3sync
 
 env = config.env
 app = Chalice(app_name=env.chalice_app_name)
 
-stack_output = Output.get()
-
 
 @app.lambda_function(name=env.func_name_hello)
 def hello_lambda_handler(event, context):
+    # each handler imports its own ``lbd`` module in the handler body, so
+    # the code closure of a function doesn't include the other functions'
+    # modules, see ``bin/automation/import_graph.py``
+    from {{ cookiecutter.package_name }}.lbd import hello
+
     return hello.lambda_handler(event, context)
 
 
@@ -25,4 +26,27 @@ def hello_lambda_handler(event, context):
     events=["s3:ObjectCreated:*"],
 )
 def s3sync_lambda_handler(event: S3Event):
-    return s3sync.lambda_handler(bucket=event.bucket, key=event.key)
+    from {{ cookiecutter.package_name }}.lbd import s3sync
+
+    obj = event.to_dict()["Records"][0]["s3"]["object"]
+    return s3sync.lambda_handler(
+        bucket=event.bucket,
+        key=event.key,
+        version_id=obj.get("versionId"),
+        sequencer=obj.get("sequencer"),
+    )
+
+
+# the s3sync queue is fed by the EventBridge rule of the source folder, see
+# ``{{ cookiecutter.package_name }}.iac.define.sqs``, the partial batch response
+# is turned on after deployment, see ``automation.lbd``
+@app.on_sqs_message(
+    name=env.func_name_s3sync_batch,
+    queue=env.sqs_queue_name_s3sync,
+    batch_size=10,
+    maximum_batching_window_in_seconds=5,
+)
+def s3sync_batch_lambda_handler(event: SQSEvent):
+    from {{ cookiecutter.package_name }}.lbd import s3sync
+
+    return s3sync.batch_lambda_handler(event.to_dict())
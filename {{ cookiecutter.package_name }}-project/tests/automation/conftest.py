@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+"""
+The ``automation`` package is in the ``bin`` folder, it is not installed.
+"""
+
+import sys
+
+from {{ cookiecutter.package_name }}.paths import dir_project_root
+
+sys.path.insert(0, f"{dir_project_root.joinpath('bin')}")
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+
+from {{ cookiecutter.package_name }}.paths import dir_project_root, dir_lambda_app
+from automation.import_graph import parse_app, get_module_closure
+
+
+def _write(path: Path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def test_parse_app(tmp_path: Path):
+    _write(tmp_path / "my_pkg" / "__init__.py", "")
+    _write(tmp_path / "my_pkg" / "shared.py", "")
+    _write(tmp_path / "my_pkg" / "util.py", "")
+    _write(tmp_path / "my_pkg" / "lbd" / "__init__.py", "")
+    _write(tmp_path / "my_pkg" / "lbd" / "a.py", "from ..util import helper\n")
+    _write(tmp_path / "my_pkg" / "lbd" / "b.py", "")
+    path_app_py = tmp_path / "app.py"
+    _write(
+        path_app_py,
+        "\n".join(
+            [
+                "from chalice import Chalice",
+                "from my_pkg import shared",
+                "app = Chalice(app_name='app')",
+                "",
+                "@app.lambda_function(name='func_a')",
+                "def handler_a(event, context):",
+                "    from my_pkg.lbd import a",
+                "",
+                "@app.lambda_function()",
+                "def handler_b(event, context):",
+                "    from my_pkg.lbd import b",
+            ]
+        ),
+    )
+
+    handlers, shared_modules = parse_app(path_app_py)
+    assert [handler.name for handler in handlers] == ["func_a", "handler_b"]
+    # a module level import is shared, even if no handler uses the name
+    assert "my_pkg.shared" in shared_modules
+
+    closure_a = get_module_closure(
+        tmp_path, "my_pkg", shared_modules | handlers[0].modules
+    )
+    assert sorted(closure_a) == [
+        "my_pkg",
+        "my_pkg.lbd",
+        "my_pkg.lbd.a",
+        "my_pkg.shared",
+        "my_pkg.util",
+    ]
+    closure_b = get_module_closure(
+        tmp_path, "my_pkg", shared_modules | handlers[1].modules
+    )
+    assert sorted(closure_b) == [
+        "my_pkg",
+        "my_pkg.lbd",
+        "my_pkg.lbd.b",
+        "my_pkg.shared",
+    ]
+
+
+def test_lambda_app_closure():
+    handlers, shared_modules = parse_app(dir_lambda_app.joinpath("app.py"))
+    closures = {
+        handler.handler_name: get_module_closure(
+            dir_project_root,
+            "{{ cookiecutter.package_name }}",
+            shared_modules | handler.modules,
+        )
+        for handler in handlers
+    }
+    hello = closures["hello_lambda_handler"]
+    s3sync = closures["s3sync_lambda_handler"]
+    s3sync_batch = closures["s3sync_batch_lambda_handler"]
+    assert "{{ cookiecutter.package_name }}.lbd.hello" in hello
+    assert "{{ cookiecutter.package_name }}.lbd.s3sync" not in hello
+    assert "{{ cookiecutter.package_name }}.lbd.s3sync" in s3sync
+    assert "{{ cookiecutter.package_name }}.lbd.hello" not in s3sync
+    assert "{{ cookiecutter.package_name }}.lbd.s3sync" in s3sync_batch
+    assert "{{ cookiecutter.package_name }}.lbd.hello" not in s3sync_batch
+    # imported at the app.py module level, shared by all functions
+    for closure in [hello, s3sync, s3sync_batch]:
+        assert "{{ cookiecutter.package_name }}.config.init" in closure
+
+
+if __name__ == "__main__":
+    from {{ cookiecutter.package_name }}.tests import run_cov_test
+
+    run_cov_test(__file__, "automation.import_graph")
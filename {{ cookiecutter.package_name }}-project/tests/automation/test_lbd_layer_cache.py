@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+import os
+import stat
+from pathlib import Path
+
+from automation.pip_requirements import Requirement
+from automation.lbd_layer_cache import (
+    LayerBuildCache,
+    extract_zip,
+    get_installed_files,
+)
+
+
+def test_split_and_restore(tmp_path: Path):
+    dir_installed = tmp_path / "installed"
+    files = {
+        "six.py": "",
+        "six-1.16.0.dist-info/RECORD": (
+            "six.py,,\nsix-1.16.0.dist-info/RECORD,,\n"
+        ),
+        "my_cli/__init__.py": "",
+        "my_cli/_speedups.so": "",
+        "bin/my-cli": "#!/usr/bin/env python",
+        "my_cli-0.1.0.dist-info/RECORD": (
+            "my_cli/__init__.py,,\nmy_cli/_speedups.so,,\n"
+            "../../bin/my-cli,,\nmy_cli-0.1.0.dist-info/RECORD,,\n"
+        ),
+    }
+    for file, content in files.items():
+        path = dir_installed / file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    os.chmod(dir_installed / "bin/my-cli", 0o755)
+    os.chmod(dir_installed / "my_cli/_speedups.so", 0o755)
+
+    installed_files = get_installed_files(dir_installed)
+    assert installed_files == {
+        "six": ["six-1.16.0.dist-info/RECORD", "six.py"],
+        "my-cli": [
+            "bin/my-cli",
+            "my_cli-0.1.0.dist-info/RECORD",
+            "my_cli/__init__.py",
+            "my_cli/_speedups.so",
+        ],
+    }
+
+    cache = LayerBuildCache(
+        dir_local=tmp_path / "cache",
+        python_version="3.8",
+        platform="linux_x86_64",
+    )
+    requirement = Requirement(name="my-cli", version="0.1.0", line="my-cli==0.1.0")
+    path_zip = cache.store(requirement, dir_installed, installed_files["my-cli"])
+    assert cache.fetch(requirement) == path_zip
+
+    dir_target = tmp_path / "target"
+    extract_zip(path_zip, dir_target)
+    assert (dir_target / "six.py").exists() is False
+    assert os.stat(dir_target / "bin/my-cli").st_mode & stat.S_IXUSR
+    assert os.stat(dir_target / "my_cli/_speedups.so").st_mode & stat.S_IXUSR
+    assert not (os.stat(dir_target / "my_cli/__init__.py").st_mode & stat.S_IXUSR)
+
+
+if __name__ == "__main__":
+    from {{ cookiecutter.package_name }}.tests import run_cov_test
+
+    run_cov_test(__file__, "automation.lbd_layer_cache")
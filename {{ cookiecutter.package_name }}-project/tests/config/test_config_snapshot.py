@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+from {{ cookiecutter.package_name }}.config.define import EnvEnum, Env, Config
+from {{ cookiecutter.package_name }}.config.snapshot import (
+    create_snapshot,
+    write_snapshot,
+    read_snapshot,
+    create_config_from_snapshot,
+)
+
+
+def test_snapshot(tmp_path):
+    config = Config(
+        data={
+            "shared": {"project_name": "my_project"},
+            "envs": {
+                "dev": {"username": "dev.user"},
+                "prod": {"username": "prod.user"},
+            },
+        },
+        secret_data={
+            "shared": {},
+            "envs": {
+                "dev": {"password": "dev.password"},
+                "prod": {"password": "prod.password"},
+            },
+        },
+        Env=Env,
+        EnvEnum=EnvEnum,
+    )
+    snapshot = create_snapshot(config, "dev")
+    assert list(snapshot["data"]["envs"]) == ["dev"]
+    assert snapshot["secret_keys"] == ["password"]
+    assert "dev.password" not in str(snapshot)
+
+    path = f"{tmp_path / 'config-snapshot.json'}"
+    assert read_snapshot(path) is None
+    write_snapshot(path, snapshot)
+    assert read_snapshot(path) == snapshot
+
+    secret_data = config.secret_data
+    calls = list()
+
+    def load_secret_data() -> dict:
+        calls.append(1)
+        return secret_data
+
+    config = create_config_from_snapshot(
+        snapshot=read_snapshot(path),
+        config_class=Config,
+        env_class=Env,
+        env_enum_class=EnvEnum,
+        load_secret_data=load_secret_data,
+    )
+    env = config.get_env("dev")
+    assert isinstance(env, Env)
+    assert env.username == "dev.user"
+    assert env.project_name == "my_project"
+    assert len(calls) == 0
+
+    assert env.password == "dev.password"
+    assert env.password == "dev.password"
+    assert len(calls) == 1
+
+    # the secrets are loaded only once
+    assert config.get_env("dev").password == "dev.password"
+    assert len(calls) == 1
+
+
+if __name__ == "__main__":
+    from {{ cookiecutter.package_name }}.tests import run_cov_test
+
+    run_cov_test(__file__, "{{ cookiecutter.package_name }}.config.snapshot")
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from {{ cookiecutter.package_name }}.lbd.s3sync import (
+    Record,
+    RecordResult,
+    parse_records,
+    get_batch_item_failures,
+    get_idempotency_key,
+)
+
+
+def s3_notification(*keys: str) -> dict:
+    return {
+        "Records": [
+            {
+                "eventSource": "aws:s3",
+                "s3": {
+                    "bucket": {"name": "my-bucket"},
+                    "object": {"key": key, "sequencer": f"00{i}"},
+                },
+            }
+            for i, key in enumerate(keys)
+        ]
+    }
+
+
+def eventbridge_event(id: str, key: str) -> dict:
+    return {
+        "id": id,
+        "detail-type": "Object Created",
+        "detail": {
+            "bucket": {"name": "my-bucket"},
+            "object": {"key": key, "version-id": "v1", "sequencer": "001"},
+        },
+    }
+
+
+def test_parse_records():
+    # S3 event notification, the key is URL encoded
+    records = parse_records(s3_notification("a/hello+world.txt", "a/b%26c.txt"))
+    assert [record.key for record in records] == ["a/hello world.txt", "a/b&c.txt"]
+    assert [record.sequencer for record in records] == ["000", "001"]
+
+    # SQS event
+    event = {
+        "Records": [
+            {
+                "messageId": "m1",
+                "eventSource": "aws:sqs",
+                "body": json.dumps(s3_notification("a/1.txt", "a/2.txt")),
+            },
+            {
+                "messageId": "m2",
+                "eventSource": "aws:sqs",
+                "body": json.dumps(eventbridge_event("e1", "a/3.txt")),
+            },
+        ]
+    }
+    records = parse_records(event)
+    assert [(record.item_id, record.key) for record in records] == [
+        ("m1", "a/1.txt"),
+        ("m1", "a/2.txt"),
+        ("m2", "a/3.txt"),
+    ]
+
+    # EventBridge Pipes batch and single EventBridge event
+    records = parse_records([eventbridge_event("e1", "a/1.txt")])
+    assert [(record.item_id, record.key) for record in records] == [("e1", "a/1.txt")]
+    assert (records[0].version_id, records[0].sequencer) == ("v1", "001")
+    records = parse_records(eventbridge_event("e2", "a/2.txt"))
+    assert [(record.item_id, record.key) for record in records] == [("e2", "a/2.txt")]
+
+
+def test_get_idempotency_key():
+    assert get_idempotency_key("b", "k", "v1", "001") == "b/k@v1"
+    assert get_idempotency_key("b", "k", None, "001") == "b/k#001"
+    assert get_idempotency_key("b", "k") is None
+
+
+def test_get_batch_item_failures():
+    results = [
+        RecordResult(record=Record("m1", "b", "k1"), succeeded=True),
+        RecordResult(record=Record("m1", "b", "k2"), succeeded=False, error="e"),
+        RecordResult(record=Record("m1", "b", "k3"), succeeded=False, error="e"),
+        RecordResult(record=Record("m2", "b", "k4"), succeeded=True),
+    ]
+    assert get_batch_item_failures(results) == [{"itemIdentifier": "m1"}]
+
+
+if __name__ == "__main__":
+    from {{ cookiecutter.package_name }}.tests import run_cov_test
+
+    run_cov_test(__file__, "{{ cookiecutter.package_name }}.lbd.s3sync")
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+from {{ cookiecutter.package_name }}.lazy import LazyProxy, resolve, is_resolved
+
+
+class Client:
+    def __init__(self):
+        self.name = "client"
+
+    def hello(self) -> str:
+        return f"hello {self.name}"
+
+
+def test_lazy_proxy():
+    calls = list()
+
+    def factory():
+        calls.append(1)
+        return Client()
+
+    proxy = LazyProxy(factory)
+    assert is_resolved(proxy) is False
+    assert len(calls) == 0
+
+    assert proxy.hello() == "hello client"
+    assert is_resolved(proxy) is True
+    proxy.name = "alice"
+    assert proxy.hello() == "hello alice"
+    assert isinstance(resolve(proxy), Client)
+    assert len(calls) == 1
+
+    client = Client()
+    assert resolve(client) is client
+
+
+if __name__ == "__main__":
+    from {{ cookiecutter.package_name }}.tests import run_cov_test
+
+    run_cov_test(__file__, "{{ cookiecutter.package_name }}.lazy")
@@ -5,6 +5,8 @@ import dataclasses
 
 from s3pathlib import S3Path
 
+from .lbd_deploy import LambdaArchitectureEnum
+
 if T.TYPE_CHECKING:
     from .main import Env
 
@@ -29,3 +31,32 @@ class LambdaFunctionMixin:
     @property
     def func_fullname_s3sync(self: "Env") -> str:
         return self._get_func_fullname(self.func_name_s3sync)
+
+    @property
+    def func_name_s3sync_batch(self: "Env") -> str:
+        return "s3sync_batch"
+
+    @property
+    def func_fullname_s3sync_batch(self: "Env") -> str:
+        return self._get_func_fullname(self.func_name_s3sync_batch)
+
+    @property
+    def lambda_function_architectures(self: "Env") -> T.Dict[str, str]:
+        """
+        The instruction set architecture of each Lambda function, see
+        :class:`~.lbd_deploy.LambdaArchitectureEnum`. Switch the CPU bound
+        functions to ``arm64`` for better price performance, the layer built
+        for the same architecture is attached to the function.
+        """
+        return {
+            self.func_name_hello: LambdaArchitectureEnum.x86_64,
+            self.func_name_s3sync: LambdaArchitectureEnum.x86_64,
+            self.func_name_s3sync_batch: LambdaArchitectureEnum.x86_64,
+        }
+
+    @property
+    def lambda_architectures(self: "Env") -> T.List[str]:
+        """
+        The architectures that we need to build the Lambda layer for.
+        """
+        return sorted(set(self.lambda_function_architectures.values()))
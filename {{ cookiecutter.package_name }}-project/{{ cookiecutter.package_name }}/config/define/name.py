@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
 
+import typing as T
 import dataclasses
 
+if T.TYPE_CHECKING:
+    from .main import Env
+
 
 @dataclasses.dataclass
 class NameMixin:
@@ -9,3 +13,26 @@ class NameMixin:
     This mixin class derive all AWS Resource name based on the project name
     and the env name.
     """
+
+    @property
+    def dynamodb_table_name_idempotency(self: "Env") -> str:
+        """
+        The DynamoDB table to dedupe the at-least-once delivered events.
+        """
+        return f"{self.prefix_name_snake}-idempotency"
+
+    @property
+    def sqs_queue_name_s3sync(self: "Env") -> str:
+        """
+        The SQS queue that buffers the S3 events of the source folder for
+        the batched s3sync Lambda function.
+        """
+        return f"{self.prefix_name_snake}-s3sync"
+
+    @property
+    def event_rule_name_s3sync(self: "Env") -> str:
+        """
+        The EventBridge rule that sends the S3 "Object Created" events of the
+        source folder to the s3sync SQS queue.
+        """
+        return f"{self.prefix_name_snake}-s3sync"
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+"""
+Deploy time baked config snapshot.
+
+At deploy time, the non-sensitive config data of the target environment is
+written to a JSON file in the ``lambda_app/vendor`` folder, it is at the
+root of the Lambda deployment package. At runtime, the config is created
+from the snapshot without any API call. The secret fields are not in the
+snapshot, they are loaded on the first access of any of them, all secrets
+in one batch, so a Lambda function that never reads a secret never calls
+the parameter store.
+
+Example snapshot::
+
+    {
+        "env_name": "dev",
+        "data": {
+            "shared": {"project_name": "my_project", ...},
+            "envs": {"dev": {"username": "dev.user", ...{% raw %}}}{% endraw %}
+        },
+        "secret_keys": ["password"]
+    }
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import json
+import threading
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from .define import Env, Config
+
+
+def create_snapshot(config: "Config", env_name: str) -> dict:
+    """
+    Create the snapshot of the non-sensitive config data of one environment,
+    the secret values are not included, only the secret field names.
+    """
+    secret_keys = set(config.secret_data.get("shared", {}))
+    secret_keys.update(config.secret_data.get("envs", {}).get(env_name, {}))
+    return {
+        "env_name": env_name,
+        "data": {
+            "shared": config.data["shared"],
+            "envs": {env_name: config.data["envs"][env_name]},
+        },
+        "secret_keys": sorted(secret_keys),
+    }
+
+
+def write_snapshot(path: str, snapshot: dict):
+    with open(path, "w") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+
+
+def read_snapshot(path: str) -> T.Optional[dict]:
+    """
+    :return: None if the snapshot file doesn't exist.
+    """
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+_NOTHING = object()
+
+
+class SecretLoader:
+    """
+    Load the secrets of one environment in one batch, only once.
+
+    :param load_secret_data: a function that takes no argument and returns
+        the ``secret_data`` of the config, with ``shared`` and ``envs`` keys.
+    """
+
+    def __init__(self, load_secret_data: T.Callable[[], dict]):
+        self._load_secret_data = load_secret_data
+        self._secrets: T.Dict[str, dict] = dict()
+        self._lock = threading.Lock()
+
+    def get_secrets(self, env_name: str) -> dict:
+        """
+        :return: the secret field name to value mapping of the environment.
+        """
+        with self._lock:
+            if env_name not in self._secrets:
+                secret_data = self._load_secret_data()
+                secrets = dict(secret_data.get("shared", {}))
+                secrets.update(secret_data.get("envs", {}).get(env_name, {}))
+                self._secrets[env_name] = secrets
+        return self._secrets[env_name]
+
+
+class _SecretField:
+    """
+    A data descriptor of a secret dataclass field, it loads the secrets on
+    the first access.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:  # pragma: no cover
+            return self
+        value = instance.__dict__.get(self.name, _NOTHING)
+        if value is _NOTHING:
+            secrets = owner._secret_loader.get_secrets(instance.env_name)
+            for key in owner._secret_keys:
+                instance.__dict__.setdefault(key, secrets.get(key))
+            value = instance.__dict__[self.name]
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+
+
+def create_lazy_secret_env_class(
+    env_class: T.Type["Env"],
+    secret_keys: T.List[str],
+    secret_loader: SecretLoader,
+) -> T.Type["Env"]:
+    """
+    Create a subclass of ``env_class``, the secret fields are loaded by the
+    ``secret_loader`` on the first access instead of at creation.
+    """
+
+    def __user_post_init__(self):
+        # the secret fields are set to the default value by the dataclass
+        # ``__init__``, remove them so they are loaded on the first access
+        for key in secret_keys:
+            self.__dict__.pop(key, None)
+        env_class.__user_post_init__(self)
+
+    namespace = {
+        "_secret_keys": list(secret_keys),
+        "_secret_loader": secret_loader,
+        "__user_post_init__": __user_post_init__,
+    }
+    for key in secret_keys:
+        namespace[key] = _SecretField(key)
+    return type(env_class.__name__, (env_class,), namespace)
+
+
+def create_config_from_snapshot(
+    snapshot: dict,
+    config_class: T.Type["Config"],
+    env_class: T.Type["Env"],
+    env_enum_class: T.Type,
+    load_secret_data: T.Callable[[], dict],
+) -> "Config":
+    """
+    Create the config object from the snapshot, without any API call.
+
+    :param load_secret_data: see :class:`SecretLoader`.
+    """
+    env_name = snapshot["env_name"]
+    return config_class(
+        data=snapshot["data"],
+        secret_data={"shared": dict(), "envs": {env_name: dict(){% raw %}}}{% endraw %},
+        Env=create_lazy_secret_env_class(
+            env_class,
+            snapshot["secret_keys"],
+            SecretLoader(load_secret_data),
+        ),
+        EnvEnum=env_enum_class,
+    )
@@ -15,6 +15,7 @@ from ..config.init import config
 from ..runtime import IS_CI
 
 from .define import Stack
+from .output import Output
 
 
 def deploy_cloudformation_stack(
@@ -33,6 +34,7 @@ def deploy_cloudformation_stack(
     stack = Stack(env=env)
 
     tpl.add(stack.rg1_iam)
+    tpl.add(stack.rg2_dynamodb)
 
     tpl.batch_tagging(
         tags=dict(
@@ -60,6 +62,7 @@ def deploy_cloudformation_stack(
             timeout=120,
             change_set_timeout=120,
         )
+        Output.clear_cache(env_name)
 
     return stack.stack_name
 
@@ -84,4 +87,5 @@ def delete_cloudformation_stack(env_name: str) -> T.Optional[str]:
     if IS_CI:
         kwargs["skip_prompt"] = True
     cf_env.delete(**kwargs)
+    Output.clear_cache(env_name)
     return stack.stack_name
@@ -1,13 +1,32 @@
 # -*- coding: utf-8 -*-
 
+"""
+CloudFormation stack output accessor.
+
+In local and CI, the stack output is read from the CloudFormation stack, the
+result is memoized in memory and cached in a local file for a while, so
+loading the Chalice app (``chalice deploy``, ``chalice package``, unit test)
+doesn't call ``describe_stacks`` every time. Use :data:`stack_output` to
+resolve the output of the current env on the first attribute access.
+"""
+
 import typing as T
 import os
+import json
+import time
 
 import attr
 
 from ..config.init import config
 from ..boto_ses import bsm
 from ..runtime import IS_LAMBDA
+from ..paths import dir_stack_output_cache
+from ..lazy import LazyProxy
+
+DEFAULT_OUTPUT_CACHE_TTL = 3600
+"""
+The stack output local file cache TTL in seconds.
+"""
 
 
 class StackDoesntExist(Exception):
@@ -54,10 +73,79 @@ class Output:
         )
 
     @classmethod
-    def get(cls, env_name: T.Optional[str] = None) -> "Output":
+    def _get_path_cache(cls, env_name: str) -> str:
+        """
+        example: ``${HOME}/.projects/{{ cookiecutter.package_name }}/stack-output-cache/dev-{{ cookiecutter.aws_region }}.json``
+        """
+        return f"{dir_stack_output_cache.joinpath(f'{env_name}-{bsm.aws_region}.json')}"
+
+    @classmethod
+    def _get_from_cache(cls, env_name: str, ttl: int) -> T.Optional["Output"]:
+        """
+        :return: None if the cache file doesn't exist, is expired or broken.
+        """
+        try:
+            with open(cls._get_path_cache(env_name), "r") as f:
+                data = json.load(f)
+            if (time.time() - data["fetched_at"]) >= ttl:
+                return None
+            return cls(**data["output"])
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return None
+
+    @classmethod
+    def _write_cache(cls, env_name: str, output: "Output"):
+        path = cls._get_path_cache(env_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"fetched_at": time.time(), "output": attr.asdict(output)}, f)
+
+    @classmethod
+    def clear_cache(cls, env_name: str):
+        """
+        Remove the memoized and the cached output, call it after the stack is
+        deployed or deleted.
+        """
+        _memory_cache.pop(env_name, None)
+        try:
+            os.remove(cls._get_path_cache(env_name))
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def get(
+        cls,
+        env_name: T.Optional[str] = None,
+        ttl: int = DEFAULT_OUTPUT_CACHE_TTL,
+    ) -> "Output":
+        """
+        :param ttl: the local file cache TTL in seconds, ``0`` always reads
+            from the stack.
+        """
         if IS_LAMBDA:
             return cls._get_from_env_var()
         else:
             if env_name is None:
                 env_name = config.get_current_env()
-            return cls._get_from_stack(env_name)
+            if ttl > 0:
+                output = _memory_cache.get(env_name)
+                if output is not None:
+                    return output
+                output = cls._get_from_cache(env_name, ttl)
+                if output is not None:
+                    _memory_cache[env_name] = output
+                    return output
+            output = cls._get_from_stack(env_name)
+            if output is not None:
+                _memory_cache[env_name] = output
+                cls._write_cache(env_name, output)
+            return output
+
+
+_memory_cache: T.Dict[str, Output] = dict()
+
+stack_output: Output = LazyProxy(Output.get)
+"""
+The stack output of the current env, it is resolved on the first attribute
+access, for example ``stack_output.iam_role_lambda_arn``.
+"""
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+"""
+DynamoDB backed idempotency store for the at-least-once delivered events.
+
+Each event has an idempotency key, for the S3 event it is the object
+version id or the sequencer. The event handler claims the key before
+processing with a conditional write, a duplicate event fails the claim and
+is dropped. Then:
+
+- on success, the key is marked as ``completed``, it expires after
+    ``completed_ttl`` seconds, the duplicates in this period are dropped.
+- on failure, the claim is released, so the retry can claim it again.
+- if the handler dies, for example timeout, the ``in_progress`` claim
+    expires after ``in_progress_ttl`` seconds, then the retry can claim it.
+
+The DynamoDB TTL deletes the expired items within days, not immediately, so
+the claim condition also accepts an expired item.
+
+The completed keys are also kept in an in-process LRU cache, the hot
+duplicates delivered to the same warm Lambda container are dropped without
+a DynamoDB round trip.
+
+Ref:
+
+- Condition expressions: https://docs.aws.amazon.com/amazondynamodb/latest/developerguide/Expressions.ConditionExpressions.html
+- Expiring items by using DynamoDB TTL: https://docs.aws.amazon.com/amazondynamodb/latest/developerguide/TTL.html
+"""
+
+import typing as T
+import time
+import threading
+import collections
+
+from .boto_ses import bsm, pynamodb_connection
+from .lazy import resolve
+
+DEFAULT_IN_PROGRESS_TTL = 900
+"""
+The ``in_progress`` claim expiry in seconds, it should be no less than the
+Lambda function timeout.
+"""
+
+DEFAULT_COMPLETED_TTL = 7 * 24 * 3600
+"""
+The ``completed`` key expiry in seconds, it should be longer than the max
+duplicate delivery delay.
+"""
+
+DEFAULT_LRU_SIZE = 10000
+
+
+class StatusEnum:
+    in_progress = "in_progress"
+    completed = "completed"
+
+
+class LRUCache:
+    """
+    A thread-safe fixed size cache, the least recently used key is evicted
+    when it is full.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_LRU_SIZE):
+        self.max_size = max_size
+        self._data: T.OrderedDict[str, float] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> T.Optional[float]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: float):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def remove(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def create_model_class(table_name: str):
+    """
+    Create the pynamodb model of the idempotency table. ``pynamodb`` is
+    imported here, so importing this module doesn't pay for it on cold start.
+    The model uses the shared connection in :mod:`~{{ cookiecutter.package_name }}.boto_ses`.
+    """
+    import pynamodb_mate as pm
+
+    _table_name = table_name
+
+    class Idempotency(pm.Model):
+        class Meta:
+            table_name = _table_name
+            region = bsm.aws_region
+
+        pk = pm.UnicodeAttribute(hash_key=True)
+        status = pm.UnicodeAttribute()
+        expire_at = pm.NumberAttribute()  # epoch seconds, the TTL attribute
+
+    # the model creates its own connection, replace it with the shared one,
+    # so all models reuse one botocore client
+    table_connection = Idempotency._get_connection()
+    connection = resolve(pynamodb_connection)
+    try:
+        connection.add_meta_table(table_connection.connection.get_meta_table(table_name))
+    except ValueError:  # already added by another model of the same table
+        pass
+    table_connection.connection = connection
+    return Idempotency
+
+
+def _is_condition_failed(e: Exception) -> bool:
+    return getattr(e, "cause_response_code", None) == "ConditionalCheckFailedException"
+
+
+class IdempotencyStore:
+    """
+    :param table_name: the DynamoDB table, the hash key is ``pk`` (string),
+        the TTL attribute is ``expire_at``.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        in_progress_ttl: int = DEFAULT_IN_PROGRESS_TTL,
+        completed_ttl: int = DEFAULT_COMPLETED_TTL,
+        lru_size: int = DEFAULT_LRU_SIZE,
+    ):
+        self.table_name = table_name
+        self.in_progress_ttl = in_progress_ttl
+        self.completed_ttl = completed_ttl
+        self.lru_cache = LRUCache(max_size=lru_size)
+        self._model_class = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_class(self):
+        with self._lock:
+            if self._model_class is None:
+                self._model_class = create_model_class(self.table_name)
+        return self._model_class
+
+    def is_completed_in_cache(self, key: str, now: T.Optional[float] = None) -> bool:
+        if now is None:
+            now = time.time()
+        expire_at = self.lru_cache.get(key)
+        if expire_at is None:
+            return False
+        if expire_at <= now:
+            self.lru_cache.remove(key)
+            return False
+        return True
+
+    def claim(self, key: str) -> bool:
+        """
+        Claim the key before processing.
+
+        :return: True if claimed, False if the key is in progress or completed
+            by another invocation.
+        """
+        now = time.time()
+        if self.is_completed_in_cache(key, now):
+            return False
+        Model = self.model_class
+        item = Model(
+            pk=key,
+            status=StatusEnum.in_progress,
+            expire_at=int(now) + self.in_progress_ttl,
+        )
+        try:
+            item.save(condition=Model.pk.does_not_exist() | (Model.expire_at < int(now)))
+            return True
+        except Exception as e:
+            if _is_condition_failed(e):
+                return False
+            raise e
+
+    def complete(self, key: str):
+        """
+        Mark the claimed key as completed.
+        """
+        expire_at = int(time.time()) + self.completed_ttl
+        Model = self.model_class
+        Model(pk=key).update(
+            actions=[
+                Model.status.set(StatusEnum.completed),
+                Model.expire_at.set(expire_at),
+            ]
+        )
+        self.lru_cache.put(key, expire_at)
+
+    def release(self, key: str):
+        """
+        Release the claimed key after a failure, so the retry can claim it.
+        """
+        Model = self.model_class
+        try:
+            Model(pk=key).delete(condition=Model.status == StatusEnum.in_progress)
+        except Exception as e:
+            if not _is_condition_failed(e):
+                raise e
+
+    def run(
+        self,
+        key: str,
+        func: T.Callable[[], T.Any],
+    ) -> T.Tuple[bool, T.Any]:
+        """
+        Run the function once per key.
+
+        :return: ``(True, return value of the function)``, or ``(False, None)``
+            if the key is a duplicate.
+        """
+        if not self.claim(key):
+            return False, None
+        try:
+            result = func()
+        except Exception as e:
+            self.release(key)
+            raise e
+        self.complete(key)
+        return True, result
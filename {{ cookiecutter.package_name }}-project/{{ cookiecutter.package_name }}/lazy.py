@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+"""
+Lazy object creation helpers.
+
+The expensive objects, such as boto sessions, clients and database
+connections, are created on first use instead of at import time, so the
+Lambda functions that don't use them don't pay for them on cold start.
+The object is cached on the module level proxy, so the warm invocations
+reuse it.
+
+.. note::
+
+    This module is "ZERO-DEPENDENCY".
+"""
+
+import typing as T
+import threading
+
+_NOTHING = object()
+
+
+class LazyProxy:
+    """
+    A proxy that calls the ``factory`` on the first attribute access, then
+    delegates all attribute access to the created object.
+
+    Example::
+
+        s3_client = LazyProxy(lambda: boto3.client("s3"))
+        s3_client.list_buckets()  # the client is created here
+
+    :param factory: a function that takes no argument and returns the object.
+    """
+
+    __slots__ = ("_factory", "_obj", "_lock")
+
+    def __init__(self, factory: T.Callable[[], T.Any]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_obj", _NOTHING)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def __getattr__(self, name: str):
+        return getattr(resolve(self), name)
+
+    def __setattr__(self, name: str, value: T.Any):
+        setattr(resolve(self), name, value)
+
+    def __repr__(self) -> str:
+        if is_resolved(self):
+            return f"LazyProxy({object.__getattribute__(self, '_obj')!r})"
+        return "LazyProxy(<not created>)"
+
+
+def resolve(proxy: T.Any) -> T.Any:
+    """
+    Get the real object behind the proxy, create it if not created yet.
+    A non proxy object is returned as it is.
+    """
+    if not isinstance(proxy, LazyProxy):
+        return proxy
+    obj = object.__getattribute__(proxy, "_obj")
+    if obj is _NOTHING:
+        with object.__getattribute__(proxy, "_lock"):
+            obj = object.__getattribute__(proxy, "_obj")
+            if obj is _NOTHING:  # another thread may have created it
+                obj = object.__getattribute__(proxy, "_factory")()
+                object.__setattr__(proxy, "_obj", obj)
+    return obj
+
+
+def is_resolved(proxy: "LazyProxy") -> bool:
+    """
+    Check if the real object behind the proxy is created.
+    """
+    return object.__getattribute__(proxy, "_obj") is not _NOTHING
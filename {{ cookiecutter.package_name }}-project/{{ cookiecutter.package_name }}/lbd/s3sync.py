@@ -1,24 +1,380 @@
 # -*- coding: utf-8 -*-
 
+"""
+Copy the S3 object from the source folder to the target folder.
+
+- :func:`lambda_handler` copies one object per invocation, it is used by the
+    S3 event trigger.
+- :func:`batch_lambda_handler` copies all objects in a batch of records
+    concurrently, it is for the SQS buffered or the EventBridge Pipes
+    batched trigger, the failed records are reported for partial batch retry.
+
+The S3 event is delivered at least once, the handlers drop the duplicate
+events by the object version id or the event sequencer, see
+:mod:`{{ cookiecutter.package_name }}.idempotency`.
+
+:func:`backfill` copies the objects that the event trigger didn't copy, for
+example, created before the trigger existed, it runs in local or CI.
+"""
+
+import typing as T
+import json
+import dataclasses
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
 from s3pathlib import S3Path
 
-from ..config.init import config
+from ..config.init import get_config
+from ..boto_ses import bsm
 from ..logger import logger
+from ..s3_copy import (
+    head_object,
+    is_identical,
+    copy_object,
+    DEFAULT_MULTIPART_THRESHOLD,
+)
+from ..metric import put_metric, UnitEnum
+from ..idempotency import IdempotencyStore
+from ..lazy import LazyProxy
+from ..paths import dir_s3sync_checkpoint
+from .. import s3_reconcile
+
+
+class StatusEnum:
+    copied = "copied"
+    skipped = "skipped"
+    duplicate = "duplicate"
+
+
+DEFAULT_MAX_WORKERS = 10
+"""
+The max number of concurrent copies in a batch, it is the default max
+connection pool size of the boto3 client, the threads share one client.
+"""
 
 
 def low_level_api(
     s3path_source: S3Path,
-):
+    multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD,
+) -> str:
+    """
+    Copy the object to the target folder, skip it if the target already has
+    an identical object, for example, a retried event, or a re-upload of
+    the same content. It emits the ``copied`` or ``skipped`` metric.
+
+    :param multipart_threshold: the objects larger than this are copied with
+        the concurrent multipart copy, see :mod:`{{ cookiecutter.package_name }}.s3_copy`.
+
+    :return: one of :class:`StatusEnum`.
+    """
     logger.info(f"copy {s3path_source.uri}")
     logger.info(f"preview: {s3path_source.console_url}", indent=1)
 
-    s3path_target = config.env.s3dir_target.joinpath(
-        s3path_source.relative_to(config.env.s3dir_source)
+    env = get_config().env
+    s3path_target = env.s3dir_target.joinpath(
+        s3path_source.relative_to(env.s3dir_source)
     )
     logger.info(f"to {s3path_target.uri}")
     logger.info(f"preview: {s3path_target.console_url}", indent=1)
-    s3path_source.copy_to(s3path_target, overwrite=True)
+    s3_client = bsm.s3_client
+    src_head = head_object(s3_client, s3path_source.bucket, s3path_source.key)
+    if src_head is None:
+        raise FileNotFoundError(f"{s3path_source.uri} doesn't exist!")
+    dst_head = head_object(s3_client, s3path_target.bucket, s3path_target.key)
+    if is_identical(src_head, dst_head):
+        logger.info("skip, the target is identical to the source", indent=1)
+        put_metric(StatusEnum.skipped)
+        put_metric(
+            f"{StatusEnum.skipped}_bytes",
+            src_head["ContentLength"],
+            unit=UnitEnum.bytes,
+        )
+        return StatusEnum.skipped
+    result = copy_object(
+        s3_client=s3_client,
+        src_bucket=s3path_source.bucket,
+        src_key=s3path_source.key,
+        dst_bucket=s3path_target.bucket,
+        dst_key=s3path_target.key,
+        multipart_threshold=multipart_threshold,
+        head_object_response=src_head,
+    )
+    logger.info(f"copied {result.size} bytes in {result.n_parts} parts", indent=1)
+    put_metric(StatusEnum.copied)
+    return StatusEnum.copied
+
+
+idempotency_store: IdempotencyStore = LazyProxy(
+    lambda: IdempotencyStore(
+        table_name=get_config().env.dynamodb_table_name_idempotency,
+    )
+)
+
+
+def get_idempotency_key(
+    bucket: str,
+    key: str,
+    version_id: T.Optional[str] = None,
+    sequencer: T.Optional[str] = None,
+) -> T.Optional[str]:
+    """
+    The version id identifies the object in a versioned bucket, otherwise
+    the sequencer identifies the PUT event of the key.
+
+    :return: None if the event has neither, then it is not deduped.
+    """
+    if version_id:
+        return f"{bucket}/{key}@{version_id}"
+    if sequencer:
+        return f"{bucket}/{key}#{sequencer}"
+    return None
+
+
+def copy_once(
+    bucket: str,
+    key: str,
+    version_id: T.Optional[str] = None,
+    sequencer: T.Optional[str] = None,
+) -> str:
+    """
+    Copy the object, drop the duplicate event, it emits the ``duplicate``
+    metric.
+
+    :return: one of :class:`StatusEnum`.
+    """
+    s3path_source = S3Path(bucket, key)
+    idempotency_key = get_idempotency_key(bucket, key, version_id, sequencer)
+    if idempotency_key is None:
+        return low_level_api(s3path_source=s3path_source)
+    is_first, status = idempotency_store.run(
+        idempotency_key,
+        lambda: low_level_api(s3path_source=s3path_source),
+    )
+    if is_first:
+        return status
+    logger.info(f"drop the duplicate event of {s3path_source.uri}, {idempotency_key}")
+    put_metric(StatusEnum.duplicate)
+    return StatusEnum.duplicate
+
+
+def lambda_handler(
+    bucket: str,
+    key: str,
+    version_id: T.Optional[str] = None,
+    sequencer: T.Optional[str] = None,
+):
+    return copy_once(bucket, key, version_id=version_id, sequencer=sequencer)
+
+
+@dataclasses.dataclass
+class Record:
+    """
+    An S3 object to copy.
+
+    :param item_id: the identifier to report the failure, it is the SQS
+        message id or the EventBridge event id. Multiple records may have
+        the same item id, for example, one SQS message of an S3 event
+        notification with multiple records.
+    """
+
+    item_id: str = dataclasses.field()
+    bucket: str = dataclasses.field()
+    key: str = dataclasses.field()
+    version_id: T.Optional[str] = dataclasses.field(default=None)
+    sequencer: T.Optional[str] = dataclasses.field(default=None)
 
 
-def lambda_handler(bucket: str, key: str):
-    return low_level_api(s3path_source=S3Path(bucket, key))
+@dataclasses.dataclass
+class RecordResult:
+    record: Record = dataclasses.field()
+    succeeded: bool = dataclasses.field()
+    error: T.Optional[str] = dataclasses.field(default=None)
+    status: T.Optional[str] = dataclasses.field(default=None)
+
+
+def _parse_s3_record(item_id: T.Optional[str], record: dict) -> Record:
+    """
+    The key in the S3 event notification is URL encoded.
+    """
+    bucket = record["s3"]["bucket"]["name"]
+    obj = record["s3"]["object"]
+    key = urllib.parse.unquote_plus(obj["key"])
+    return Record(
+        item_id=f"{bucket}/{key}" if item_id is None else item_id,
+        bucket=bucket,
+        key=key,
+        version_id=obj.get("versionId"),
+        sequencer=obj.get("sequencer"),
+    )
+
+
+def _parse_s3_notification(item_id: str, notification: dict) -> T.List[Record]:
+    return [
+        _parse_s3_record(item_id, record)
+        for record in notification.get("Records", [])
+        if "s3" in record
+    ]
+
+
+def _parse_item(item: dict) -> T.List[Record]:
+    if item.get("eventSource") == "aws:sqs":
+        body = json.loads(item["body"])
+        records = _parse_item(body)
+        for record in records:
+            record.item_id = item["messageId"]
+        return records
+    elif "detail" in item:  # EventBridge S3 "Object Created" event
+        obj = item["detail"]["object"]
+        return [
+            Record(
+                item_id=item["id"],
+                bucket=item["detail"]["bucket"]["name"],
+                key=obj["key"],
+                version_id=obj.get("version-id"),
+                sequencer=obj.get("sequencer"),
+            )
+        ]
+    elif "s3" in item:  # one record of the S3 event notification
+        return [_parse_s3_record(None, item)]
+    else:  # S3 event notification
+        return _parse_s3_notification(item_id="", notification=item)
+
+
+def parse_records(event: T.Union[dict, T.List[dict]]) -> T.List[Record]:
+    """
+    Find the S3 objects to copy in the event, it could be:
+
+    - an SQS event, the message body is an S3 event notification or an
+        EventBridge event.
+    - a list of EventBridge events, from EventBridge Pipes.
+    - an S3 event notification.
+    """
+    if isinstance(event, list):
+        items = event
+    else:
+        items = event.get("Records", [event])
+    records = list()
+    for item in items:
+        records.extend(_parse_item(item))
+    return records
+
+
+def _copy_record(record: Record) -> RecordResult:
+    try:
+        status = copy_once(
+            record.bucket,
+            record.key,
+            version_id=record.version_id,
+            sequencer=record.sequencer,
+        )
+        return RecordResult(record=record, succeeded=True, status=status)
+    except Exception as e:
+        return RecordResult(record=record, succeeded=False, error=repr(e))
+
+
+def process_records(
+    records: T.List[Record],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> T.List[RecordResult]:
+    """
+    Copy the S3 objects concurrently, a failed copy doesn't stop the others.
+
+    :return: the result of each record, in the same order.
+    """
+    # create the shared clients before the threads start
+    _ = bsm.s3_client
+    if any(
+        get_idempotency_key(r.bucket, r.key, r.version_id, r.sequencer)
+        for r in records
+    ):
+        _ = idempotency_store.model_class
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_copy_record, records))
+
+
+def get_batch_item_failures(results: T.List[RecordResult]) -> T.List[dict]:
+    """
+    :return: the ``batchItemFailures`` of the partial batch response, an item
+        is failed if any of its records is failed.
+    """
+    item_ids = dict.fromkeys(
+        result.record.item_id for result in results if not result.succeeded
+    )
+    return [{"itemIdentifier": item_id} for item_id in item_ids]
+
+
+def batch_lambda_handler(
+    event: T.Union[dict, T.List[dict]],
+    context=None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> dict:  # pragma: no cover
+    """
+    Copy all S3 objects in the batch. Turn on ``ReportBatchItemFailures``
+    in the event source mapping, so only the failed items are retried.
+    """
+    results = process_records(parse_records(event), max_workers=max_workers)
+    for result in results:
+        if not result.succeeded:
+            logger.error(
+                f"failed to copy s3://{result.record.bucket}/{result.record.key}: "
+                f"{result.error}"
+            )
+    return {"batchItemFailures": get_batch_item_failures(results)}
+
+
+def backfill(
+    n_shards: int = s3_reconcile.DEFAULT_N_SHARDS,
+    max_workers: int = s3_reconcile.DEFAULT_MAX_WORKERS,
+    boundaries: T.Optional[T.List[str]] = None,
+    restart: bool = False,
+    dry_run: bool = False,
+) -> s3_reconcile.ReconcileResult:  # pragma: no cover
+    """
+    Reconcile the target folder with the source folder of the current env,
+    copy the missing and stale objects, see
+    :mod:`{{ cookiecutter.package_name }}.s3_reconcile`. An interrupted backfill
+    resumes from the checkpoint in
+    ``${HOME}/.projects/{{ cookiecutter.package_name }}/s3sync-checkpoint/``.
+
+    :param restart: ignore the checkpoint and start over.
+    """
+    from botocore.config import Config
+
+    env = get_config().env
+    path_checkpoint = dir_s3sync_checkpoint.joinpath(
+        f"{env.env_name}-{bsm.aws_region}.json"
+    )
+    if restart and path_checkpoint.exists():
+        path_checkpoint.remove()
+    s3dir_source = env.s3dir_source
+    s3dir_target = env.s3dir_target
+    logger.info(f"backfill {s3dir_target.uri} from {s3dir_source.uri}")
+    # each shard lists the source and the target concurrently
+    s3_client = bsm.boto_ses.client(
+        "s3",
+        config=Config(max_pool_connections=max_workers + 2 * n_shards),
+    )
+    result = s3_reconcile.reconcile(
+        s3_client=s3_client,
+        src_bucket=s3dir_source.bucket,
+        src_prefix=s3dir_source.key,
+        dst_bucket=s3dir_target.bucket,
+        dst_prefix=s3dir_target.key,
+        path_checkpoint=f"{path_checkpoint}",
+        boundaries=boundaries,
+        n_shards=n_shards,
+        max_workers=max_workers,
+        dry_run=dry_run,
+    )
+    logger.info(
+        f"same: {result.n_same}, missing: {result.n_missing}, "
+        f"stale: {result.n_stale}, extra: {result.n_extra}"
+    )
+    logger.info(
+        f"copied: {result.n_copied}, skipped: {result.n_skipped}, "
+        f"failed: {result.n_failed}"
+    )
+    for error in result.errors:
+        logger.error(error, indent=1)
+    return result
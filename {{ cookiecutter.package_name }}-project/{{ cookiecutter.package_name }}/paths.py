@@ -22,6 +22,10 @@ path_config_json = dir_config / "config.json"
 path_config_secret_json = dir_home_project_root / "config-secret.json"
 # cache file for current environment name, will only be used in CI
 path_current_env_name_json = dir_project_root / ".current-env-name.json"
+# cache folder for the CloudFormation stack output, will only be used in local and CI
+dir_stack_output_cache = dir_home_project_root / "stack-output-cache"
+# checkpoint folder of the s3sync backfill, will only be used in local and CI
+dir_s3sync_checkpoint = dir_home_project_root / "s3sync-checkpoint"
 
 # ------------------------------------------------------------------------------
 # Virtual Environment Related
@@ -43,3 +47,6 @@ dir_int_test = dir_project_root / "tests_int"
 # ------------------------------------------------------------------------------
 dir_lambda_app = dir_project_root / "lambda_app"
 path_chalice_config = dir_lambda_app / ".chalice" / "config.json"
+# the deploy time baked config snapshot, it is in the lambda_app/vendor folder
+# at deploy time, and at the root of the deployment package at runtime
+path_config_snapshot_json = dir_project_root / "config-snapshot.json"
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+
+"""
+S3 server side copy engine.
+
+- the objects up to the multipart threshold are copied with a single
+    ``CopyObject`` call, the metadata and the tags are copied by S3.
+- the larger objects are copied with concurrent ``UploadPartCopy`` calls,
+    ``CopyObject`` fails above 5 GB and is slow for multi GB objects. The
+    part size is picked from the object size. The metadata, the system
+    metadata (content type, cache control, ...), the tags, the encryption
+    settings and the checksum algorithm of the source object are preserved.
+
+The copy is pinned to the source ETag, so a source object replaced during
+the copy fails the copy instead of mixing two versions.
+
+The ETag of the target may be different from the source ETag, for
+example, the multipart copy of a single part object, or the single part
+copy of an object uploaded in parts (``${md5}-${n_parts}``), so both copy
+methods also write the source ETag to the ``source-etag`` user metadata,
+:func:`is_identical` uses it to tell if the target is a copy of the source.
+
+.. note::
+
+    The multipart copy keeps the checksum algorithm, but the checksum of a
+    multipart object is the checksum of the part checksums, so the value
+    is different from the source object's full object checksum.
+
+Ref:
+
+- Copying objects: https://docs.aws.amazon.com/AmazonS3/latest/userguide/copy-object.html
+- UploadPartCopy: https://docs.aws.amazon.com/AmazonS3/latest/API/API_UploadPartCopy.html
+- Checking object integrity: https://docs.aws.amazon.com/AmazonS3/latest/userguide/checking-object-integrity.html
+"""
+
+import typing as T
+import dataclasses
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_s3 import S3Client
+
+MB = 1024 * 1024
+GB = 1024 * MB
+
+MIN_PART_SIZE = 5 * MB
+MAX_PART_SIZE = 5 * GB
+MAX_PARTS = 10000
+
+DEFAULT_MULTIPART_THRESHOLD = 256 * MB
+DEFAULT_PART_SIZE = 64 * MB
+DEFAULT_MAX_WORKERS = 8
+
+CHECKSUM_ALGORITHMS = ["CRC32", "CRC32C", "SHA1", "SHA256"]
+
+SOURCE_ETAG_METADATA_KEY = "source-etag"
+
+# the system metadata that ``CreateMultipartUpload`` doesn't copy from the
+# source object, the head object response keys are the same as the arguments
+_SYSTEM_METADATA_KEYS = [
+    "CacheControl",
+    "ContentDisposition",
+    "ContentEncoding",
+    "ContentLanguage",
+    "ContentType",
+    "Expires",
+    "WebsiteRedirectLocation",
+    "ServerSideEncryption",
+    "SSEKMSKeyId",
+    "BucketKeyEnabled",
+    "StorageClass",
+]
+
+
+class CopyMethodEnum:
+    copy_object = "copy_object"
+    multipart = "multipart"
+
+
+@dataclasses.dataclass
+class CopyResult:
+    method: str = dataclasses.field()
+    size: int = dataclasses.field()
+    n_parts: int = dataclasses.field(default=1)
+
+
+def get_checksum_algorithm(head_object_response: dict) -> T.Optional[str]:
+    """
+    :return: the additional checksum algorithm of the object, None if it
+        doesn't have one. The head object call needs ``ChecksumMode="ENABLED"``.
+    """
+    for algorithm in CHECKSUM_ALGORITHMS:
+        if f"Checksum{algorithm}" in head_object_response:
+            return algorithm
+    return None
+
+
+def head_object(
+    s3_client: "S3Client",
+    bucket: str,
+    key: str,
+) -> T.Optional[dict]:
+    """
+    :return: the ``head_object`` response with the additional checksums,
+        None if the object doesn't exist.
+    """
+    try:
+        return s3_client.head_object(Bucket=bucket, Key=key, ChecksumMode="ENABLED")
+    except Exception as e:
+        if "Not Found" in str(e) or "404" in str(e):
+            return None
+        raise e
+
+
+def is_identical(src_head: dict, dst_head: T.Optional[dict]) -> bool:
+    """
+    Tell if the target object has the same content as the source object by
+    their ``head_object`` responses, no data is read.
+
+    - the size has to be the same.
+    - the full object checksums of the same algorithm, if both have, have to
+        be the same. The checksum of a multipart object has a ``-${n_parts}``
+        suffix, it depends on the part size and is not compared.
+    - then it is identical if the ETag is the same, or the full object
+        checksum is the same, or the target is a multipart copy of the source,
+        see :data:`SOURCE_ETAG_METADATA_KEY`.
+    """
+    if dst_head is None:
+        return False
+    if src_head["ContentLength"] != dst_head["ContentLength"]:
+        return False
+    is_checksum_matched = False
+    for algorithm in CHECKSUM_ALGORITHMS:
+        src_checksum = src_head.get(f"Checksum{algorithm}")
+        dst_checksum = dst_head.get(f"Checksum{algorithm}")
+        if src_checksum is None or dst_checksum is None:
+            continue
+        if "-" in src_checksum or "-" in dst_checksum:
+            continue
+        if src_checksum != dst_checksum:
+            return False
+        is_checksum_matched = True
+    if src_head["ETag"] == dst_head["ETag"]:
+        return True
+    if is_checksum_matched:
+        return True
+    metadata = dst_head.get("Metadata", {})
+    return metadata.get(SOURCE_ETAG_METADATA_KEY) == src_head["ETag"]
+
+
+def get_part_size(size: int, part_size: int = DEFAULT_PART_SIZE) -> int:
+    """
+    Use the given part size, or a larger one if the object would have more
+    than 10,000 parts, rounded up to MB.
+    """
+    min_part_size = -(-size // MAX_PARTS)  # ceil division
+    part_size = max(part_size, min_part_size, MIN_PART_SIZE)
+    part_size = -(-part_size // MB) * MB
+    return min(part_size, MAX_PART_SIZE)
+
+
+def get_part_ranges(size: int, part_size: int) -> T.List[T.Tuple[int, int, int]]:
+    """
+    :return: list of ``(part_number, first_byte, last_byte)``, the last byte
+        is inclusive, as the ``CopySourceRange`` argument.
+    """
+    return [
+        (i + 1, start, min(start + part_size, size) - 1)
+        for i, start in enumerate(range(0, size, part_size))
+    ]
+
+
+def _get_metadata_kwargs(head_object_response: dict) -> dict:
+    """
+    :return: the user metadata with the source ETag and the system metadata
+        arguments of the copy, they are the same for ``CopyObject`` with
+        ``MetadataDirective="REPLACE"`` and ``CreateMultipartUpload``.
+    """
+    metadata = dict(head_object_response.get("Metadata", {}))
+    metadata[SOURCE_ETAG_METADATA_KEY] = head_object_response["ETag"]
+    kwargs = dict(Metadata=metadata)
+    for k in _SYSTEM_METADATA_KEYS:
+        if k in head_object_response:
+            kwargs[k] = head_object_response[k]
+    return kwargs
+
+
+def _copy_single(
+    s3_client: "S3Client",
+    copy_source: dict,
+    bucket: str,
+    key: str,
+    head_object_response: dict,
+    checksum_algorithm: T.Optional[str],
+):
+    # replace the metadata to add the source ETag, the other metadata is
+    # copied from the source explicitly
+    kwargs = dict(
+        CopySource=copy_source,
+        CopySourceIfMatch=head_object_response["ETag"],
+        Bucket=bucket,
+        Key=key,
+        MetadataDirective="REPLACE",
+        TaggingDirective="COPY",
+        **_get_metadata_kwargs(head_object_response),
+    )
+    if checksum_algorithm:
+        kwargs["ChecksumAlgorithm"] = checksum_algorithm
+    s3_client.copy_object(**kwargs)
+
+
+def _copy_multipart(
+    s3_client: "S3Client",
+    copy_source: dict,
+    bucket: str,
+    key: str,
+    head_object_response: dict,
+    checksum_algorithm: T.Optional[str],
+    part_size: int,
+    max_workers: int,
+) -> int:
+    """
+    :return: number of parts.
+    """
+    etag = head_object_response["ETag"]
+    kwargs = dict(
+        Bucket=bucket,
+        Key=key,
+        **_get_metadata_kwargs(head_object_response),
+    )
+    tags = s3_client.get_object_tagging(
+        Bucket=copy_source["Bucket"], Key=copy_source["Key"]
+    )["TagSet"]
+    if tags:
+        kwargs["Tagging"] = urllib.parse.urlencode(
+            [(tag["Key"], tag["Value"]) for tag in tags]
+        )
+    if checksum_algorithm:
+        kwargs["ChecksumAlgorithm"] = checksum_algorithm
+    upload_id = s3_client.create_multipart_upload(**kwargs)["UploadId"]
+
+    checksum_key = f"Checksum{checksum_algorithm}" if checksum_algorithm else None
+
+    def copy_part(part_range: T.Tuple[int, int, int]) -> dict:
+        part_number, first_byte, last_byte = part_range
+        response = s3_client.upload_part_copy(
+            CopySource=copy_source,
+            CopySourceIfMatch=etag,
+            CopySourceRange=f"bytes={first_byte}-{last_byte}",
+            Bucket=bucket,
+            Key=key,
+            PartNumber=part_number,
+            UploadId=upload_id,
+        )
+        part = {
+            "PartNumber": part_number,
+            "ETag": response["CopyPartResult"]["ETag"],
+        }
+        if checksum_key and checksum_key in response["CopyPartResult"]:
+            part[checksum_key] = response["CopyPartResult"][checksum_key]
+        return part
+
+    part_ranges = get_part_ranges(head_object_response["ContentLength"], part_size)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            parts = list(executor.map(copy_part, part_ranges))
+        s3_client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+    except Exception as e:
+        s3_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        raise e
+    return len(parts)
+
+
+def copy_object(
+    s3_client: "S3Client",
+    src_bucket: str,
+    src_key: str,
+    dst_bucket: str,
+    dst_key: str,
+    multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD,
+    part_size: int = DEFAULT_PART_SIZE,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    head_object_response: T.Optional[dict] = None,
+) -> CopyResult:
+    """
+    Server side copy, it uses the concurrent multipart copy for the objects
+    larger than the ``multipart_threshold``.
+
+    :param part_size: the preferred part size, it is increased for very large
+        objects, see :func:`get_part_size`.
+    :param max_workers: the max number of concurrent part copies.
+    :param head_object_response: the source object ``head_object`` response
+        with ``ChecksumMode="ENABLED"``, if the caller already has it.
+    """
+    if head_object_response is None:
+        head_object_response = s3_client.head_object(
+            Bucket=src_bucket,
+            Key=src_key,
+            ChecksumMode="ENABLED",
+        )
+    copy_source = {"Bucket": src_bucket, "Key": src_key}
+    checksum_algorithm = get_checksum_algorithm(head_object_response)
+    size = head_object_response["ContentLength"]
+    if size <= multipart_threshold:
+        _copy_single(
+            s3_client,
+            copy_source,
+            dst_bucket,
+            dst_key,
+            head_object_response,
+            checksum_algorithm,
+        )
+        return CopyResult(method=CopyMethodEnum.copy_object, size=size)
+    n_parts = _copy_multipart(
+        s3_client,
+        copy_source,
+        dst_bucket,
+        dst_key,
+        head_object_response,
+        checksum_algorithm,
+        get_part_size(size, part_size),
+        max_workers,
+    )
+    return CopyResult(method=CopyMethodEnum.multipart, size=size, n_parts=n_parts)